@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from models.database import get_db
-from models.models import Claim, ClaimCalculation, MedicalDiagnosis, MedicalReceipt, User, UserContract, InsuranceProduct, InsuranceClause
+from models.models import BenefitAccumulator, Claim, ClaimCalculation, MedicalDiagnosis, MedicalReceipt, User, UserContract, InsuranceProduct, InsuranceClause
 from models.schemas import ClaimCreate
 from typing import Optional
 from pydantic import BaseModel
 from services.claim_calculator import ClaimCalculator
+from services.benefit_ledger import BenefitLedger
 import json
 from datetime import datetime
 from collections import Counter, defaultdict
@@ -97,39 +98,17 @@ async def create_claim(
         # 보험금 계산 (claim_calculator.py 활용)
         calculator = ClaimCalculator(db)
         
-        # 해당 보험상품의 특약들 조회
+        # 해당 보험상품의 특약들 조회 (id 순서 고정 - 특약 개수 제한 시 결과가 바뀌지 않도록)
         clauses = db.query(InsuranceClause).filter(
             InsuranceClause.product_id == contract.product_id,
             InsuranceClause.is_deleted == False
-        ).all()
+        ).order_by(InsuranceClause.id).all()
         
         # 보험금 계산 실행 - calculate_claim_with_clauses 메서드 사용
         calculation_result = calculator.calculate_claim_with_clauses(claim.id, clauses)
         
-        # 계산 결과를 claim_reason에 JSON 형태로 저장
-        detailed_info = {
-            "applied_clauses": [
-                {
-                    "clause_name": calc["clause_name"],
-                    "category": calc["category"],
-                    "amount": calc["calculated_amount"],
-                    "calculation_logic": calc["calculation_logic"]
-                }
-                for calc in calculation_result["calculations"]
-            ],
-            "calculation_basis": f"총 {len(calculation_result['calculations'])}개 특약 적용, 총 보험금 {calculation_result['total_amount']:,}원",
-            "total_amount": calculation_result["total_amount"]
-        }
-        
-        # claim_reason 업데이트
-        claim.claim_reason = f"상세내역: {json.dumps(detailed_info, ensure_ascii=False)}"
-        claim.claim_amount = calculation_result["total_amount"]
-        
-        # 청구 상태 설정 (보험금이 있으면 passed, 없으면 failed)
-        if calculation_result["total_amount"] > 0:
-            claim.status = "passed"
-        else:
-            claim.status = "failed"
+        # 계산 결과를 claim_reason(JSON), 금액, 상태(passed/failed)에 반영
+        detailed_info = calculator.apply_result(claim, calculation_result)
         
         db.commit()
         
@@ -226,6 +205,43 @@ async def search_claims_by_patient_name(
         })
     return results
 
+@router.post("/claims/recalculate/stale",
+    summary="변경된 청구 일괄 재계산",
+    description="특약/규칙/진단서/영수증 수정으로 계산 입력값(fingerprint)이 바뀐 청구만 골라서 재계산합니다.",
+    response_description="재계산 결과 통계",
+    dependencies=[Depends(get_current_user)]
+)
+def recalculate_stale_claims(force: bool = False, db: Session = Depends(get_db)):
+    # 청구 전체를 동기 DB/계산으로 처리하므로 일반 def 로 두어 스레드풀에서 실행 (이벤트 루프를 막지 않음)
+    try:
+        stats = ClaimCalculator(db).recalculate_stale_claims(force=force)
+        return {"message": f"재계산 완료: {stats['recalculated']}개 재계산, {stats['up_to_date']}개 최신", **stats}
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"일괄 재계산 실패: {str(e)}")
+
+@router.post("/claims/{claim_id}/recalculate",
+    summary="청구 재계산",
+    description="청구 보험금을 다시 계산합니다. 계산 입력값이 바뀌지 않았으면 기존 결과를 반환합니다 (force=true 로 강제 재계산).",
+    response_description="재계산 결과",
+    dependencies=[Depends(get_current_user)]
+)
+def recalculate_claim(claim_id: int, force: bool = False, db: Session = Depends(get_db)):
+    try:
+        result = ClaimCalculator(db).recalculate_claim(claim_id, force=force)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"재계산 실패: {str(e)}")
+    return {
+        "claim_id": claim_id,
+        "recalculated": result["recalculated"],
+        "claim_amount": result["total_amount"],
+        "applied_clauses": len(result["calculations"]),
+        "calculations": result["calculations"]
+    }
+
 @router.get("/claims/statistics/{claim_id}",
     summary="청구 상세 통계 조회",
     description="특정 청구의 통계 정보를 조회합니다.",
@@ -391,12 +407,13 @@ async def delete_selected_claims(
         
         for claim_id in delete_data.claim_ids:
             try:
-                # ClaimCalculation 먼저 삭제
-                db.query(ClaimCalculation).filter(ClaimCalculation.claim_id == claim_id).delete()
-                
-                # Claim 삭제
                 claim = db.query(Claim).filter(Claim.id == claim_id).first()
                 if claim:
+                    # 누적 지급액 차감 후 ClaimCalculation 삭제
+                    BenefitLedger(db).release_claim(claim)
+                    db.query(ClaimCalculation).filter(ClaimCalculation.claim_id == claim_id).delete()
+
+                    # Claim 삭제
                     db.delete(claim)
                     deleted_count += 1
                 else:
@@ -432,7 +449,8 @@ async def delete_claim(claim_id: int, db: Session = Depends(get_db)):
     claim = db.query(Claim).filter(Claim.id == claim_id).first()
     if not claim:
         raise HTTPException(status_code=404, detail="청구를 찾을 수 없습니다")
-    # 관련 ClaimCalculation 등도 함께 삭제(필요시)
+    # 누적 지급액 차감 후 관련 ClaimCalculation 등도 함께 삭제
+    BenefitLedger(db).release_claim(claim)
     db.query(ClaimCalculation).filter(ClaimCalculation.claim_id == claim_id).delete()
     db.delete(claim)
     db.commit()
@@ -445,7 +463,8 @@ async def delete_claim(claim_id: int, db: Session = Depends(get_db)):
     dependencies=[Depends(get_current_user)]
 )
 async def delete_all_claims(db: Session = Depends(get_db)):
-    # ClaimCalculation 등 종속 데이터 먼저 삭제
+    # 누적 지급액, ClaimCalculation 등 종속 데이터 먼저 삭제
+    db.query(BenefitAccumulator).delete()
     db.query(ClaimCalculation).delete()
     db.query(Claim).delete()
     db.commit()
@@ -4,70 +4,34 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from models.schemas import ForgeryRequest
 from models.models import MedicalDiagnosis, MedicalReceipt, ForgeryAnalysis
-from services.forgery_service import analyze_forgery_from_local_path
+from services.forgery_cache import analyze_cached, evict_if_due
+from services.forgery_service import FORGERY_STAGE_SECONDS, analyze_forgery_tiles
+from services.storage_service import storage_service
 from models.database import get_db
-import requests
+import asyncio
 import os
-import tempfile
-from services.storage_service import storage_service
-import uuid
+import time
 import traceback
 import json
 
 router = APIRouter()
 logger = logging.getLogger("forgery_debug")
 
-def download_file_to_temp(file_url: str) -> str:
-    """파일을 임시 디렉토리에 다운로드하여 로컬 경로 반환"""
+async def download_image(file_url: str) -> bytes:
+    """이미지 바이트 읽기 (GCS 는 로컬 디스크 캐시를 거쳐 읽음, 임시 파일 없이 메모리에서 처리)"""
     try:
-        if file_url.startswith('http'):
-            response = requests.get(file_url)
-            response.raise_for_status()
-            # 직접 경로로 파일 생성
-            temp_filename = f"/app/tmp/{uuid.uuid4().hex}.jpg"
-            with open(temp_filename, "wb") as f:
-                f.write(response.content)
-            logger.warning(f"임시 파일 생성: {temp_filename}, 존재 여부: {os.path.exists(temp_filename)}")
-            # 파일로도 남기기
-            try:
-                with open("/app/tmp/forgery_debug.log", "a", encoding="utf-8") as logf:
-                    logf.write(f"임시 파일 생성: {temp_filename}, 존재 여부: {os.path.exists(temp_filename)}\n")
-            except Exception as log_e:
-                pass
-            if not os.path.exists(temp_filename):
-                try:
-                    with open("/app/tmp/forgery_debug.log", "a", encoding="utf-8") as logf:
-                        logf.write(f"임시 파일 생성 실패: {temp_filename}\n")
-                except Exception as log_e:
-                    pass
-                raise HTTPException(status_code=500, detail=f"임시 파일 생성 실패: {temp_filename}")
-            return temp_filename
-        else:
-            # 이미 uploads/로 시작하면 중복 방지, 아니면 uploads/를 붙임
-            if file_url.startswith("uploads/"):
-                rel_path = file_url
-            else:
-                rel_path = os.path.join("uploads", file_url)
-            # 항상 프로젝트 루트(backend/) 기준으로 경로 생성
-            abs_path = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(__file__)), rel_path))
-            return abs_path
+        return await storage_service.open_bytes(file_url)
     except Exception as e:
-        logger.warning(f"임시 파일 생성/다운로드 except: {str(e)}")
+        logger.warning(f"파일 다운로드 실패: {file_url}: {str(e)}")
         logger.warning(traceback.format_exc())
-        # 파일로도 남기기
-        try:
-            with open("/app/tmp/forgery_debug.log", "a", encoding="utf-8") as logf:
-                logf.write(f"임시 파일 생성/다운로드 except: {str(e)}\n{traceback.format_exc()}\n")
-        except Exception as log_e:
-            pass
-        raise HTTPException(status_code=500, detail=f"파일 다운로드/임시파일 생성 실패: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"파일 다운로드 실패: {str(e)}")
 
 @router.post(
     "/forgery_analysis",
     summary="위조분석 실행",
-    description="진단서와 영수증을 위조분석합니다."
+    description="진단서와 영수증을 위조분석합니다. 두 이미지를 동시에 다운로드/분석하고 단계별 소요 시간(timings, 초)을 함께 반환합니다. 같은 이미지를 같은 모델로 분석한 결과가 있으면 재사용합니다. (force=true 면 다시 분석)"
 )
-def analyze_forgery(data: ForgeryRequest, db: Session = Depends(get_db)):
+async def analyze_forgery(data: ForgeryRequest, force: bool = False, db: Session = Depends(get_db)):
     # 진단서, 영수증 존재 확인
     diagnosis = db.query(MedicalDiagnosis).filter_by(id=data.diagnosis_id).first()
     if not diagnosis or not getattr(diagnosis, "image_url", None):
@@ -77,21 +41,17 @@ def analyze_forgery(data: ForgeryRequest, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Receipt not found or no image_url")
 
     try:
-        # 파일을 임시 디렉토리에 다운로드
-        diagnosis_temp_path = download_file_to_temp(diagnosis.image_url)
-        logger.warning(f"분석 시작(진단서): {diagnosis_temp_path}, 존재 여부: {os.path.exists(diagnosis_temp_path)}")
-        receipt_temp_path = download_file_to_temp(receipt.image_url)
-        logger.warning(f"분석 시작(영수증): {receipt_temp_path}, 존재 여부: {os.path.exists(receipt_temp_path)}")
-
-        # 각각 위조분석
-        diagnosis_result = analyze_forgery_from_local_path(diagnosis_temp_path)
-        receipt_result = analyze_forgery_from_local_path(receipt_temp_path)
+        started = time.perf_counter()
+        # 진단서/영수증 동시 다운로드
+        images = await asyncio.gather(download_image(diagnosis.image_url), download_image(receipt.image_url))
+        downloaded = time.perf_counter()
+        FORGERY_STAGE_SECONDS.labels(stage="download").observe(downloaded - started)
 
-        # 임시 파일 정리
-        if diagnosis_temp_path.startswith('/tmp'):
-            os.unlink(diagnosis_temp_path)
-        if receipt_temp_path.startswith('/tmp'):
-            os.unlink(receipt_temp_path)
+        # 위조분석 (캐시에 없는 이미지만 ELA 동시 변환 + 한 번의 배치 추론, 이벤트 루프 밖 스레드에서 실행)
+        timings = {"download": downloaded - started, "ela": 0.0, "inference": 0.0}
+        (diagnosis_result, diagnosis_cached), (receipt_result, receipt_cached) = await asyncio.to_thread(
+            analyze_cached, db, list(images), force, timings
+        )
 
         # 결과 저장
         forgery = ForgeryAnalysis(
@@ -107,26 +67,66 @@ def analyze_forgery(data: ForgeryRequest, db: Session = Depends(get_db)):
         db.add(forgery)
         db.commit()
         db.refresh(forgery)
+        timings["total"] = time.perf_counter() - started
+        await asyncio.to_thread(evict_if_due, db)
 
         return {
             "forgery_analysis_id": forgery.id,
             "diagnosis_result": diagnosis_result,
-            "receipt_result": receipt_result
+            "receipt_result": receipt_result,
+            "cached": {"diagnosis": diagnosis_cached, "receipt": receipt_cached},
+            "timings": {stage: round(seconds, 4) for stage, seconds in timings.items()}
         }
+    except HTTPException:
+        raise
     except Exception as e:
-        # 임시 파일 정리
-        if 'diagnosis_temp_path' in locals() and diagnosis_temp_path.startswith('/tmp'):
-            try:
-                os.unlink(diagnosis_temp_path)
-            except:
-                pass
-        if 'receipt_temp_path' in locals() and receipt_temp_path.startswith('/tmp'):
-            try:
-                os.unlink(receipt_temp_path)
-            except:
-                pass
         raise HTTPException(status_code=500, detail=f"위조분석 실패: {str(e)}")
 
+# 타일 분석 대상 문서: 이름 → 모델
+TILE_TARGETS = {"diagnosis": MedicalDiagnosis, "receipt": MedicalReceipt}
+
+@router.post(
+    "/forgery_analysis/tiles",
+    summary="타일 위조분석 (히트맵)",
+    description="고해상도 문서 스캔을 겹치는 224px 타일로 나눠 위조분석하고, 타일별 위조 확률 히트맵과 최댓값(max_score)을 반환합니다. 타일 수는 FORGERY_TILE_MAX_TILES 로 제한됩니다."
+)
+async def analyze_forgery_tiled(document_type: str, document_id: int, db: Session = Depends(get_db)):
+    if document_type not in TILE_TARGETS:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 문서 종류입니다: {document_type} (diagnosis / receipt)")
+    document = db.query(TILE_TARGETS[document_type]).filter_by(id=document_id).first()
+    if not document or not getattr(document, "image_url", None):
+        raise HTTPException(status_code=404, detail=f"{document_type} not found or no image_url")
+
+    try:
+        started = time.perf_counter()
+        image_data = await download_image(document.image_url)
+        downloaded = time.perf_counter()
+        FORGERY_STAGE_SECONDS.labels(stage="download").observe(downloaded - started)
+
+        timings = {"download": downloaded - started, "ela": 0.0, "inference": 0.0}
+        result = await asyncio.to_thread(analyze_forgery_tiles, image_data, timings)
+
+        forgery = ForgeryAnalysis(
+            analysis_result=f"{document_type} (tiled): {'forged' if result['is_forged'] else 'authentic'}",
+            confidence_score=result["max_score"],
+            fraud_indicators=json.dumps({f"{document_type}_result": result}),
+            **{f"{document_type}_id": document_id}
+        )
+        db.add(forgery)
+        db.commit()
+        db.refresh(forgery)
+        timings["total"] = time.perf_counter() - started
+
+        return {
+            "forgery_analysis_id": forgery.id,
+            f"{document_type}_result": result,
+            "timings": {stage: round(seconds, 4) for stage, seconds in timings.items()}
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"타일 위조분석 실패: {str(e)}")
+
 @router.get(
     "/forgery_analysis/{forgery_analysis_id}",
     summary="위조분석 결과 조회",
@@ -1,61 +1,139 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from models.database import get_db
-from models.models import MedicalDiagnosis, MedicalReceipt
-from fastapi.responses import RedirectResponse, FileResponse
+from models.models import Document, MedicalDiagnosis, MedicalReceipt
+from fastapi.responses import Response, StreamingResponse
+from collections import OrderedDict
+from typing import Optional, Tuple
+import asyncio
+import hashlib
+import mimetypes
 import os
-import requests
-from fastapi.responses import Response
+import re
+from services.storage_service import storage_service
 
 router = APIRouter()
 
+IMAGE_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, OPTIONS",
+    "Access-Control-Allow-Headers": "*",
+    "Cache-Control": "public, max-age=31536000"
+}
+
+SHA256_NAME = re.compile(r"^[0-9a-f]{64}$")
+RANGE_HEADER = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# 내용 주소 방식 이전에 저장된 파일의 SHA-256 (경로, 크기, 수정 시각) → 해시, 최근 사용한 것만 유지
+IMAGE_HASH_CACHE_SIZE = int(os.getenv("IMAGE_HASH_CACHE_SIZE", "10000"))
+_legacy_hashes: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+
+def guess_content_type(file_url: str) -> str:
+    return mimetypes.guess_type(file_url)[0] or "image/jpeg"
+
+def _file_sha256(f, image_url: str) -> str:
+    stat = os.fstat(f.fileno())
+    key = (image_url, stat.st_size, stat.st_mtime_ns)
+    if key in _legacy_hashes:
+        _legacy_hashes.move_to_end(key)
+        return _legacy_hashes[key]
+    f.seek(0)
+    sha256 = hashlib.file_digest(f, "sha256").hexdigest()
+    _legacy_hashes[key] = sha256
+    while len(_legacy_hashes) > IMAGE_HASH_CACHE_SIZE:
+        _legacy_hashes.popitem(last=False)
+    return sha256
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match 는 약한 비교 (W/ 접두어 무시, RFC 9110)"""
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Range 헤더 (bytes=start-end, bytes=start-, bytes=-suffix) → (start, end) 포함 범위
+    여러 범위 등 지원하지 않는 형식은 None (전체 응답), 만족할 수 없는 범위는 ValueError
+    """
+    match = RANGE_HEADER.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if not first:
+        # 끝에서부터 suffix 바이트
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise ValueError(header)
+        return max(0, size - suffix), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, end
+
+async def document_response(request: Request, db: Session, record, folder: str):
+    """
+    저장된 문서를 청크 단위로 응답 (GCS 는 로컬 디스크 캐시를 거쳐 읽음, 리다이렉트 방지)
+    - ETag: 파일 내용 SHA-256 (강한 검증자). If-None-Match 가 같으면 304
+    - Range: 단일 범위 요청은 206 (큰 PDF 의 부분 로딩)
+    """
+    image_url = record.image_url
+    document = db.query(Document).filter(Document.id == record.document_id).first() if record.document_id else None
+    try:
+        f = await storage_service.open_file(image_url, "" if os.path.isabs(image_url) else folder)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="이미지 파일이 존재하지 않습니다.")
+
+    try:
+        size = os.fstat(f.fileno()).st_size
+        name = os.path.splitext(os.path.basename(image_url))[0]
+        if document is not None:
+            sha256 = document.sha256
+        elif SHA256_NAME.match(name):
+            sha256 = name
+        else:
+            sha256 = await asyncio.to_thread(_file_sha256, f, image_url)
+        etag = f'"{sha256}"'
+        headers = dict(IMAGE_HEADERS, **{"ETag": etag, "Accept-Ranges": "bytes"})
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, etag):
+            f.close()
+            return Response(status_code=304, headers=headers)
+
+        byte_range = None
+        range_header = request.headers.get("range")
+        if_range = request.headers.get("if-range")
+        if range_header and (not if_range or if_range.strip() == etag):
+            try:
+                byte_range = parse_range(range_header, size)
+            except ValueError:
+                f.close()
+                return Response(status_code=416, headers=dict(headers, **{"Content-Range": f"bytes */{size}"}))
+    except BaseException:
+        f.close()
+        raise
+
+    media_type = (document.content_type if document is not None else None) or guess_content_type(image_url)
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(storage_service.stream_file(f), media_type=media_type, headers=headers)
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(storage_service.stream_file(f, start, end - start + 1),
+                             status_code=206, media_type=media_type, headers=headers)
+
 @router.get("/images/diagnosis/{diagnosis_id}", summary="진단서 이미지 반환")
-async def get_diagnosis_image(diagnosis_id: int, db: Session = Depends(get_db)):
+async def get_diagnosis_image(diagnosis_id: int, request: Request, db: Session = Depends(get_db)):
     diagnosis = db.query(MedicalDiagnosis).filter(MedicalDiagnosis.id == diagnosis_id).first()
     if not diagnosis or not diagnosis.image_url:
         raise HTTPException(status_code=404, detail="진단서 이미지가 없습니다.")
-    if diagnosis.image_url.startswith("http"):
-        # GCS에서 직접 이미지 받아서 바이너리로 응답 (리다이렉트 방지)
-        r = requests.get(diagnosis.image_url, allow_redirects=False)
-        if r.status_code != 200:
-            raise HTTPException(status_code=404, detail="GCS 이미지가 없습니다.")
-        headers = {
-            "Content-Type": r.headers.get("Content-Type", "image/jpeg"),
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Methods": "GET, OPTIONS",
-            "Access-Control-Allow-Headers": "*",
-            "Cache-Control": "public, max-age=31536000"
-        }
-        return Response(content=r.content, headers=headers)
-    # 이하 로컬 파일 처리 동일
-    local_path = diagnosis.image_url
-    if not os.path.isabs(local_path):
-        local_path = os.path.join("uploads", "diagnosis", os.path.basename(local_path))
-    if not os.path.exists(local_path):
-        raise HTTPException(status_code=404, detail="로컬 이미지 파일이 없습니다.")
-    return FileResponse(local_path)
+    return await document_response(request, db, diagnosis, "diagnosis")
 
 @router.get("/images/receipt/{receipt_id}", summary="영수증 이미지 반환")
-async def get_receipt_image(receipt_id: int, db: Session = Depends(get_db)):
+async def get_receipt_image(receipt_id: int, request: Request, db: Session = Depends(get_db)):
     receipt = db.query(MedicalReceipt).filter(MedicalReceipt.id == receipt_id).first()
     if not receipt or not receipt.image_url:
         raise HTTPException(status_code=404, detail="영수증 이미지가 없습니다.")
-    if receipt.image_url.startswith("http"):
-        # GCS에서 직접 이미지 받아서 바이너리로 응답 (리다이렉트 방지)
-        r = requests.get(receipt.image_url, allow_redirects=False)
-        if r.status_code != 200:
-            raise HTTPException(status_code=404, detail="GCS 이미지가 없습니다.")
-        headers = {
-            "Content-Type": r.headers.get("Content-Type", "image/jpeg"),
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Methods": "GET, OPTIONS",
-            "Access-Control-Allow-Headers": "*",
-            "Cache-Control": "public, max-age=31536000"
-        }
-        return Response(content=r.content, headers=headers)
-    local_path = receipt.image_url
-    if not os.path.isabs(local_path):
-        local_path = os.path.join("uploads", "receipts", os.path.basename(local_path))
-    if not os.path.exists(local_path):
-        raise HTTPException(status_code=404, detail="로컬 이미지 파일이 없습니다.")
-    return FileResponse(local_path) 
\ No newline at end of file
+    return await document_response(request, db, receipt, "receipts")
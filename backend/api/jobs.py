@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from models.database import get_db
+from models.models import DocumentJob
+from services.document_pipeline import describe_job
+
+router = APIRouter()
+
+@router.get(
+    "/jobs/{job_id}",
+    summary="문서 처리 작업 상태 조회",
+    description="업로드 파이프라인(pipeline=true) 작업의 전체 상태와 OCR/위조분석 단계별 상태, 소요 시간, 오류를 조회합니다.",
+    response_description="작업 상태"
+)
+def get_job(job_id: int, db: Session = Depends(get_db)):
+    job = db.query(DocumentJob).filter(DocumentJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    return describe_job(job)
+
+@router.get(
+    "/jobs",
+    summary="문서별 처리 작업 조회",
+    description="진단서/영수증 하나에 대한 처리 작업 목록을 최신순으로 조회합니다.",
+    response_description="작업 상태 목록"
+)
+def list_jobs(document_type: str, document_id: int, db: Session = Depends(get_db)):
+    jobs = db.query(DocumentJob).filter(
+        DocumentJob.document_type == document_type,
+        DocumentJob.document_id == document_id
+    ).order_by(DocumentJob.id.desc()).all()
+    return [describe_job(job) for job in jobs]
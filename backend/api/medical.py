@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from models.database import get_db
 from models.models import MedicalDiagnosis, MedicalReceipt
+from services.document_store import delete_unreferenced, release
 from typing import Optional
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime, date
@@ -240,6 +241,50 @@ async def get_receipt(receipt_id: int, db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"영수증 정보 조회 실패: {str(e)}")
 
+@router.delete("/diagnoses/{diagnosis_id}",
+    summary="진단서 삭제",
+    description="진단서를 삭제(soft delete)하고 원본 문서 참조를 해제합니다. 같은 파일을 참조하는 진단서/영수증이 더 없으면 저장된 파일도 삭제합니다.",
+    response_description="삭제 완료 메시지")
+def delete_diagnosis(diagnosis_id: int, db: Session = Depends(get_db)):
+    diagnosis = db.query(MedicalDiagnosis).filter(
+        MedicalDiagnosis.id == diagnosis_id,
+        MedicalDiagnosis.is_deleted == False
+    ).first()
+    if not diagnosis:
+        raise HTTPException(status_code=404, detail="진단서를 찾을 수 없습니다.")
+    try:
+        diagnosis.is_deleted = True
+        orphan_id = release(db, diagnosis)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"진단서 삭제 실패: {str(e)}")
+    # 저장된 파일은 삭제가 커밋된 뒤에 지움 (마지막 참조였던 경우)
+    file_deleted = delete_unreferenced(db, orphan_id) if orphan_id else False
+    return {"message": "진단서 삭제 완료", "diagnosis_id": diagnosis_id, "file_deleted": file_deleted}
+
+@router.delete("/receipts/{receipt_id}",
+    summary="영수증 삭제",
+    description="영수증을 삭제(soft delete)하고 원본 문서 참조를 해제합니다. 같은 파일을 참조하는 진단서/영수증이 더 없으면 저장된 파일도 삭제합니다.",
+    response_description="삭제 완료 메시지")
+def delete_receipt(receipt_id: int, db: Session = Depends(get_db)):
+    receipt = db.query(MedicalReceipt).filter(
+        MedicalReceipt.id == receipt_id,
+        MedicalReceipt.is_deleted == False
+    ).first()
+    if not receipt:
+        raise HTTPException(status_code=404, detail="영수증을 찾을 수 없습니다.")
+    try:
+        receipt.is_deleted = True
+        orphan_id = release(db, receipt)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"영수증 삭제 실패: {str(e)}")
+    # 저장된 파일은 삭제가 커밋된 뒤에 지움 (마지막 참조였던 경우)
+    file_deleted = delete_unreferenced(db, orphan_id) if orphan_id else False
+    return {"message": "영수증 삭제 완료", "receipt_id": receipt_id, "file_deleted": file_deleted}
+
 @router.post("/dummy-data", summary="더미데이터 생성", description="DB에 더미데이터를 삽입합니다.")
 def create_dummy_data():
     try:
@@ -2,35 +2,34 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from models.database import get_db
 from models.models import MedicalDiagnosis, MedicalReceipt
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 from pydantic import BaseModel, ConfigDict
 from datetime import date, datetime
 import os
-import base64
-import json
 import re
-from openai import OpenAI
-import requests
+import asyncio
+import logging
 from services.storage_service import storage_service
+from services.ocr_client import ocr_client, OcrError
+from services import ocr_cache
+from services.claim_calculator import ClaimCalculator
+from utils.pdf_pages import PdfPages, is_pdf
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 # Upstage API 키 환경변수에서 불러오기
 UPSTAGE_OCR_API_KEY = os.getenv("UPSTAGE_OCR_API_KEY")
 if not UPSTAGE_OCR_API_KEY:
     raise ValueError("UPSTAGE_OCR_API_KEY 환경변수가 설정되지 않았습니다.")
 
-# Upstage Information Extraction API URL
-UPSTAGE_OCR_API_URL = "https://api.upstage.ai/v1/information-extraction"
+# OCR 클라이언트(AsyncOpenAI + 공유 연결 풀)는 services/ocr_client.py 에서 관리합니다. (앱 시작 시 생성)
 
-# OpenAI 클라이언트 설정
-client = OpenAI(
-    api_key=UPSTAGE_OCR_API_KEY,
-    base_url=UPSTAGE_OCR_API_URL
-)
-
-# 환경변수에서 업로드 디렉토리 설정
-UPLOAD_DIR = os.getenv("UPLOAD_DIR", "/app/uploads")
+# 일괄 OCR 설정 (동시 OCR 호출 수, 한 번에 처리할 최대 건수)
+OCR_BATCH_CONCURRENCY = int(os.getenv("OCR_BATCH_CONCURRENCY", "8"))
+OCR_BATCH_MAX_ITEMS = int(os.getenv("OCR_BATCH_MAX_ITEMS", "100"))
+# PDF 문서 한 건에서 동시에 OCR 할 페이지 수
+OCR_PDF_CONCURRENCY = int(os.getenv("OCR_PDF_CONCURRENCY", "4"))
 
 # Pydantic 모델들 (기존 기능 유지)
 class DiagnosisUpdate(BaseModel):
@@ -60,6 +59,21 @@ class DiagnosisUpdate(BaseModel):
         }
     )
 
+class BatchOcrRequest(BaseModel):
+    diagnosis_ids: List[int] = []
+    receipt_ids: List[int] = []
+    force: bool = False
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "diagnosis_ids": [1, 2, 3],
+                "receipt_ids": [4, 5],
+                "force": False
+            }
+        }
+    )
+
 class ReceiptUpdate(BaseModel):
     patient_name: Optional[str] = None
     receipt_date: Optional[date] = None
@@ -115,11 +129,154 @@ receipt_schema = {
     }
 }
 
+def postprocess_diagnosis(parsed: Dict) -> Dict:
+    """진단서 추출 결과 후처리 (날짜 형식 오류는 ValueError)"""
+    # 날짜 및 admission_days 처리
+    if parsed.get("diagnosis_date"):
+        try:
+            parsed["diagnosis_date"] = datetime.strptime(parsed["diagnosis_date"], "%Y-%m-%d").date()
+        except ValueError:
+            raise ValueError("날짜 형식이 올바르지 않습니다 (YYYY-MM-DD)")
+    if "admission_days" in parsed:
+        try:
+            parsed["admission_days"] = int(parsed["admission_days"])
+        except (ValueError, TypeError):
+            parsed["admission_days"] = 0
+            
+    # diagnosis_text 정리 (줄바꿈 제거 및 깔끔하게 정리)
+    if "diagnosis_text" in parsed:
+        diagnosis_text = parsed["diagnosis_text"]
+        # 줄바꿈 제거
+        diagnosis_text = diagnosis_text.replace('\n', ' ')
+        # 여러 공백을 하나로
+        diagnosis_text = re.sub(r'\s+', ' ', diagnosis_text)
+        # 앞뒤 공백 제거
+        diagnosis_text = diagnosis_text.strip()
+        
+        parsed["diagnosis_text"] = diagnosis_text
+    return parsed
+
+def postprocess_receipt(parsed: Dict) -> Dict:
+    """영수증 추출 결과 후처리 (날짜 형식 오류는 ValueError)"""
+    # 날짜 및 total_amount 처리
+    if parsed.get("receipt_date"):
+        try:
+            parsed["receipt_date"] = datetime.strptime(parsed["receipt_date"], "%Y-%m-%d").date()
+        except ValueError:
+            raise ValueError("날짜 형식이 올바르지 않습니다 (YYYY-MM-DD)")
+    if "total_amount" in parsed:
+        try:
+            parsed["total_amount"] = float(parsed["total_amount"])
+        except (ValueError, TypeError):
+            parsed["total_amount"] = 0.0
+            
+    # treatment_details 정리 (줄바꿈 제거 및 깔끔하게 정리)
+    if "treatment_details" in parsed:
+        treatment_text = parsed["treatment_details"]
+        # 줄바꿈 제거
+        treatment_text = treatment_text.replace('\n', ' ')
+        # 여러 공백을 하나로
+        treatment_text = re.sub(r'\s+', ' ', treatment_text)
+        # 금액 정보 제거 (숫자+콤마 패턴)
+        treatment_text = re.sub(r'\d{1,3}(?:,\d{3})*', '', treatment_text)
+        # 불필요한 특수문자 제거
+        treatment_text = re.sub(r'[^\w\s가-힣,]', '', treatment_text)
+        # 여러 쉼표를 하나로
+        treatment_text = re.sub(r',+', ',', treatment_text)
+        # 앞뒤 공백 제거
+        treatment_text = treatment_text.strip()
+        # 앞뒤 쉼표 제거
+        treatment_text = treatment_text.strip(',')
+        
+        parsed["treatment_details"] = treatment_text
+    return parsed
+
+# PDF 페이지별 추출 결과 병합 규칙
+# 여기 지정한 필드는 페이지 값을 구분자로 이어 붙이고, 나머지는 스키마 타입에 따라
+# 문자열 = 앞 페이지부터 처음 나온 값, 숫자 = 가장 큰 값(합계가 적힌 페이지)을 사용합니다.
+OCR_PDF_JOIN_FIELDS = {
+    "diagnosis_schema": {"diagnosis_text": " "},
+    "receipt_schema": {"treatment_details": ", "},
+}
+
+def merge_page_fields(pages: List[Dict], schema: Dict) -> Dict:
+    """페이지별 추출 결과를 스키마 규칙에 따라 하나로 병합"""
+    join_fields = OCR_PDF_JOIN_FIELDS.get(schema["name"], {})
+    merged = {}
+    for field, spec in schema["schema"]["properties"].items():
+        values = [page[field] for page in pages if page.get(field) not in (None, "")]
+        if not values:
+            continue
+        if field in join_fields:
+            merged[field] = join_fields[field].join(dict.fromkeys(str(value).strip() for value in values))
+        elif spec.get("type") in ("number", "integer"):
+            numbers = [value for value in values if isinstance(value, (int, float))]
+            merged[field] = max(numbers) if numbers else values[0]
+        else:
+            merged[field] = values[0]
+    return merged
+
+async def extract_document(image_data: bytes, schema: Dict, extract_page) -> Tuple[Dict, bool]:
+    """
+    이미지는 그대로, PDF 는 페이지를 한 장씩 렌더링해서 동시에 OCR 한 뒤 병합
+    :param extract_page: async (이미지 바이트) -> (추출 결과, 캐시 사용 여부)
+    :return: (추출 결과, 모든 페이지가 캐시를 사용했는지 여부)
+    """
+    if not is_pdf(image_data):
+        return await extract_page(image_data)
+
+    with await asyncio.to_thread(PdfPages, image_data) as pages:
+        if not len(pages):
+            raise OcrError("PDF 에 페이지가 없습니다.")
+        semaphore = asyncio.Semaphore(OCR_PDF_CONCURRENCY)
+
+        async def page_fields(index: int) -> Tuple[Dict, bool]:
+            async with semaphore:
+                # 렌더링(캐시된 페이지는 생략)도 OCR 대기 순서대로 필요할 때만 실행
+                page_data = await asyncio.to_thread(pages.render, index)
+                return await extract_page(page_data)
+
+        # 한 페이지가 실패해도 렌더링 중인 다른 페이지가 끝난 뒤 문서를 닫음
+        results = await asyncio.gather(*[page_fields(index) for index in range(len(pages))],
+                                       return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    merged = merge_page_fields([parsed for parsed, _ in results], schema)
+    return merged, all(cached for _, cached in results)
+
+async def extract_fields(db: Session, image_data: bytes, schema: Dict, force: bool = False) -> Tuple[Dict, bool]:
+    """
+    OCR 결과 캐시를 사용하는 추출 (PDF 는 페이지별로 추출 후 병합)
+    :return: (추출 결과, 캐시 사용 여부)
+    """
+    return await extract_document(
+        image_data, schema, lambda page_data: extract_image_fields(db, page_data, schema, force)
+    )
+
+async def extract_image_fields(db: Session, image_data: bytes, schema: Dict, force: bool = False) -> Tuple[Dict, bool]:
+    """
+    OCR 결과 캐시(이미지 SHA-256 + 스키마 이름)를 먼저 확인하고, 없으면 Upstage 추출
+    :return: (추출 결과, 캐시 사용 여부)
+    """
+    digest = ocr_cache.image_digest(image_data)
+    schema_name = schema["name"]
+    if force:
+        ocr_cache.record_bypass(schema_name)
+    else:
+        cached = ocr_cache.get_cached(db, digest, schema_name)
+        if cached is not None:
+            return cached, True
+
+    parsed = await ocr_client.extract(image_data, schema)
+    ocr_cache.store(db, digest, schema_name, parsed)
+    return parsed, False
+
 @router.patch("/diagnoses/ocr/{diagnosis_id}",
     summary="진단서 OCR 처리",
-    description="AI를 사용하여 진단서 이미지에서 텍스트를 추출하고 진단 정보를 자동으로 인식하여 데이터베이스에 저장합니다.",
+    description="AI를 사용하여 진단서 이미지에서 텍스트를 추출하고 진단 정보를 자동으로 인식하여 데이터베이스에 저장합니다. PDF 는 페이지별로 추출한 뒤 병합합니다. 같은 이미지의 이전 추출 결과가 있으면 재사용합니다. (force=true 면 다시 추출)",
     response_description="OCR 처리 완료 메시지")
-async def ocr_diagnosis(diagnosis_id: int, db: Session = Depends(get_db)):
+async def ocr_diagnosis(diagnosis_id: int, force: bool = False, db: Session = Depends(get_db)):
     try:
         diagnosis = db.query(MedicalDiagnosis).filter(
             MedicalDiagnosis.id == diagnosis_id,
@@ -132,77 +289,23 @@ async def ocr_diagnosis(diagnosis_id: int, db: Session = Depends(get_db)):
 
         # 스토리지 서비스를 사용하여 파일 읽기
         try:
-            if diagnosis.image_url.startswith('http'):
-                # S3 URL인 경우
-                response = requests.get(diagnosis.image_url)
-                response.raise_for_status()
-                image_data = response.content
-            else:
-                # 로컬 파일인 경우
-                file_path = os.path.join(UPLOAD_DIR, "diagnosis", os.path.basename(diagnosis.image_url))
-                if not os.path.exists(file_path):
-                    raise HTTPException(status_code=404, detail="이미지 파일이 존재하지 않습니다.")
-                with open(file_path, 'rb') as f:
-                    image_data = f.read()
+            # GCS 면 로컬 디스크 캐시를 거쳐 읽고, 아니면 로컬 파일
+            image_data = await storage_service.open_bytes(diagnosis.image_url, "diagnosis")
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="이미지 파일이 존재하지 않습니다.")
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"이미지 파일 읽기 실패: {str(e)}")
 
-        image_b64 = base64.b64encode(image_data).decode("utf-8")
-        
         try:
-            extraction_response = client.chat.completions.create(
-                model="information-extract",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "image_url",
-                                "image_url": {"url": f"data:application/octet-stream;base64,{image_b64}"}
-                            }
-                        ]
-                    }
-                ],
-                response_format={
-                    "type": "json_schema",
-                    "json_schema": diagnosis_schema
-                }
-            )
-            
-            if not extraction_response.choices or not extraction_response.choices[0].message.content:
-                raise HTTPException(status_code=500, detail="API 응답이 비어있습니다.")
-                
-            fields = extraction_response.choices[0].message.content
-            parsed = json.loads(fields)
-            
-        except json.JSONDecodeError as e:
-            raise HTTPException(status_code=500, detail=f"API 응답 JSON 파싱 실패: {str(e)}")
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Upstage API 호출 실패: {str(e)}")
-
-        # 날짜 및 admission_days 처리
-        if parsed.get("diagnosis_date"):
-            try:
-                parsed["diagnosis_date"] = datetime.strptime(parsed["diagnosis_date"], "%Y-%m-%d").date()
-            except ValueError:
-                raise HTTPException(status_code=400, detail="날짜 형식이 올바르지 않습니다 (YYYY-MM-DD)")
-        if "admission_days" in parsed:
-            try:
-                parsed["admission_days"] = int(parsed["admission_days"])
-            except (ValueError, TypeError):
-                parsed["admission_days"] = 0
-                
-        # diagnosis_text 정리 (줄바꿈 제거 및 깔끔하게 정리)
-        if "diagnosis_text" in parsed:
-            diagnosis_text = parsed["diagnosis_text"]
-            # 줄바꿈 제거
-            diagnosis_text = diagnosis_text.replace('\n', ' ')
-            # 여러 공백을 하나로
-            diagnosis_text = re.sub(r'\s+', ' ', diagnosis_text)
-            # 앞뒤 공백 제거
-            diagnosis_text = diagnosis_text.strip()
-            
-            parsed["diagnosis_text"] = diagnosis_text
+            parsed, cached = await extract_fields(db, image_data, diagnosis_schema, force=force)
+        except OcrError as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+        try:
+            postprocess_diagnosis(parsed)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
         for key, value in parsed.items():
             if hasattr(diagnosis, key):
                 setattr(diagnosis, key, value)
@@ -211,6 +314,7 @@ async def ocr_diagnosis(diagnosis_id: int, db: Session = Depends(get_db)):
         return {
             "message": "진단서 OCR 처리 완료",
             "diagnosis_id": diagnosis_id,
+            "cached": cached,
             "data": parsed
         }
     except Exception as e:
@@ -218,9 +322,9 @@ async def ocr_diagnosis(diagnosis_id: int, db: Session = Depends(get_db)):
 
 @router.patch("/receipts/ocr/{receipt_id}",
     summary="영수증 OCR 처리",
-    description="AI를 사용하여 영수증 이미지에서 텍스트를 추출하고 의료비 정보를 자동으로 인식하여 데이터베이스에 저장합니다.",
+    description="AI를 사용하여 영수증 이미지에서 텍스트를 추출하고 의료비 정보를 자동으로 인식하여 데이터베이스에 저장합니다. 같은 이미지의 이전 추출 결과가 있으면 재사용합니다. (force=true 면 다시 추출)",
     response_description="OCR 처리 완료 메시지")
-async def ocr_receipt(receipt_id: int, db: Session = Depends(get_db)):
+async def ocr_receipt(receipt_id: int, force: bool = False, db: Session = Depends(get_db)):
     try:
         receipt = db.query(MedicalReceipt).filter(
             MedicalReceipt.id == receipt_id,
@@ -232,84 +336,22 @@ async def ocr_receipt(receipt_id: int, db: Session = Depends(get_db)):
             raise HTTPException(status_code=400, detail="영수증 이미지가 업로드되지 않았습니다.")
         # 스토리지 서비스를 사용하여 파일 읽기
         try:
-            if receipt.image_url.startswith('http'):
-                # S3 URL인 경우
-                response = requests.get(receipt.image_url)
-                response.raise_for_status()
-                image_data = response.content
-            else:
-                # 로컬 파일인 경우
-                file_path = os.path.join(UPLOAD_DIR, "receipts", os.path.basename(receipt.image_url))
-                if not os.path.exists(file_path):
-                    raise HTTPException(status_code=404, detail="이미지 파일이 존재하지 않습니다.")
-                with open(file_path, 'rb') as f:
-                    image_data = f.read()
+            # GCS 면 로컬 디스크 캐시를 거쳐 읽고, 아니면 로컬 파일
+            image_data = await storage_service.open_bytes(receipt.image_url, "receipts")
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="이미지 파일이 존재하지 않습니다.")
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"이미지 파일 읽기 실패: {str(e)}")
-        image_b64 = base64.b64encode(image_data).decode("utf-8")
+        try:
+            parsed, cached = await extract_fields(db, image_data, receipt_schema, force=force)
+        except OcrError as e:
+            raise HTTPException(status_code=500, detail=str(e))
 
         try:
-            extraction_response = client.chat.completions.create(
-                model="information-extract",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "image_url",
-                                "image_url": {"url": f"data:application/octet-stream;base64,{image_b64}"}
-                            }
-                        ]
-                    }
-                ],
-                response_format={
-                    "type": "json_schema",
-                    "json_schema": receipt_schema
-                }
-            )
-            
-            if not extraction_response.choices or not extraction_response.choices[0].message.content:
-                raise HTTPException(status_code=500, detail="API 응답이 비어있습니다.")
-                
-            fields = extraction_response.choices[0].message.content
-            parsed = json.loads(fields)
-            
-        except json.JSONDecodeError as e:
-            raise HTTPException(status_code=500, detail=f"API 응답 JSON 파싱 실패: {str(e)}")
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Upstage API 호출 실패: {str(e)}")
-
-        # 날짜 및 total_amount 처리
-        if parsed.get("receipt_date"):
-            try:
-                parsed["receipt_date"] = datetime.strptime(parsed["receipt_date"], "%Y-%m-%d").date()
-            except ValueError:
-                raise HTTPException(status_code=400, detail="날짜 형식이 올바르지 않습니다 (YYYY-MM-DD)")
-        if "total_amount" in parsed:
-            try:
-                parsed["total_amount"] = float(parsed["total_amount"])
-            except (ValueError, TypeError):
-                parsed["total_amount"] = 0.0
-                
-        # treatment_details 정리 (줄바꿈 제거 및 깔끔하게 정리)
-        if "treatment_details" in parsed:
-            treatment_text = parsed["treatment_details"]
-            # 줄바꿈 제거
-            treatment_text = treatment_text.replace('\n', ' ')
-            # 여러 공백을 하나로
-            treatment_text = re.sub(r'\s+', ' ', treatment_text)
-            # 금액 정보 제거 (숫자+콤마 패턴)
-            treatment_text = re.sub(r'\d{1,3}(?:,\d{3})*', '', treatment_text)
-            # 불필요한 특수문자 제거
-            treatment_text = re.sub(r'[^\w\s가-힣,]', '', treatment_text)
-            # 여러 쉼표를 하나로
-            treatment_text = re.sub(r',+', ',', treatment_text)
-            # 앞뒤 공백 제거
-            treatment_text = treatment_text.strip()
-            # 앞뒤 쉼표 제거
-            treatment_text = treatment_text.strip(',')
-            
-            parsed["treatment_details"] = treatment_text
+            postprocess_receipt(parsed)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
         for key, value in parsed.items():
             if hasattr(receipt, key):
                 setattr(receipt, key, value)
@@ -318,11 +360,116 @@ async def ocr_receipt(receipt_id: int, db: Session = Depends(get_db)):
         return {
             "message": "영수증 OCR 처리 완료",
             "receipt_id": receipt_id,
+            "cached": cached,
             "data": parsed
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"OCR 처리 실패: {str(e)}")
 
+# 일괄 OCR: (모델, 스키마, 업로드 폴더, 후처리, 이름)
+OCR_TARGETS = {
+    "diagnosis": (MedicalDiagnosis, diagnosis_schema, "diagnosis", postprocess_diagnosis, "진단서"),
+    "receipt": (MedicalReceipt, receipt_schema, "receipts", postprocess_receipt, "영수증"),
+}
+
+@router.post("/ocr/batch",
+    summary="일괄 OCR 처리",
+    description="여러 진단서/영수증의 OCR 을 동시에 처리합니다. 이미지 읽기와 추출 API 호출은 OCR_BATCH_CONCURRENCY 개까지 동시에 실행되고, 같은 이미지는 한 번만 추출합니다. 성공한 항목은 한 트랜잭션으로 저장되며 항목별 결과를 반환합니다.",
+    response_description="항목별 OCR 처리 결과")
+async def ocr_batch(request: BatchOcrRequest, db: Session = Depends(get_db)):
+    items = [("diagnosis", record_id) for record_id in dict.fromkeys(request.diagnosis_ids)]
+    items += [("receipt", record_id) for record_id in dict.fromkeys(request.receipt_ids)]
+    if not items:
+        raise HTTPException(status_code=400, detail="OCR 할 진단서/영수증 ID 가 없습니다.")
+    if len(items) > OCR_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"한 번에 최대 {OCR_BATCH_MAX_ITEMS}건까지 처리할 수 있습니다.")
+
+    # 대상 레코드는 종류별로 한 번에 조회
+    records = {}
+    for kind in ("diagnosis", "receipt"):
+        model = OCR_TARGETS[kind][0]
+        ids = [record_id for item_kind, record_id in items if item_kind == kind]
+        if ids:
+            for record in db.query(model).filter(model.id.in_(ids), model.is_deleted == False).all():
+                records[(kind, record.id)] = record
+
+    semaphore = asyncio.Semaphore(OCR_BATCH_CONCURRENCY)
+    extractions: Dict[Tuple[str, str], asyncio.Future] = {}
+    fresh: Dict[Tuple[str, str], Dict] = {}
+
+    async def lookup_or_extract(digest: str, image_data: bytes, schema: Dict) -> Tuple[Dict, bool]:
+        key = (digest, schema["name"])
+        if request.force:
+            ocr_cache.record_bypass(schema["name"])
+        else:
+            cached = ocr_cache.get_cached(db, digest, schema["name"])
+            if cached is not None:
+                return cached, True
+        async with semaphore:
+            parsed = await ocr_client.extract(image_data, schema)
+        fresh[key] = parsed
+        return parsed, False
+
+    async def process(kind: str, record_id: int) -> Dict:
+        model, schema, folder, postprocess, label = OCR_TARGETS[kind]
+        result = {"type": kind, "id": record_id}
+        record = records.get((kind, record_id))
+        if record is None:
+            return {**result, "status": "error", "detail": f"{label}를 찾을 수 없습니다."}
+        if not record.image_url:
+            return {**result, "status": "error", "detail": f"{label} 이미지가 업로드되지 않았습니다."}
+        try:
+            async with semaphore:
+                image_data = await storage_service.open_bytes(record.image_url, folder)
+        except FileNotFoundError:
+            return {**result, "status": "error", "detail": "이미지 파일이 존재하지 않습니다."}
+        except Exception as e:
+            return {**result, "status": "error", "detail": f"이미지 파일 읽기 실패: {str(e)}"}
+
+        # 같은 이미지/PDF 페이지(중복 업로드)는 추출을 한 번만 실행하고 결과를 공유
+        async def extract_page(page_data: bytes) -> Tuple[Dict, bool]:
+            key = (ocr_cache.image_digest(page_data), schema["name"])
+            if key not in extractions:
+                extractions[key] = asyncio.ensure_future(lookup_or_extract(key[0], page_data, schema))
+            return await extractions[key]
+
+        try:
+            parsed, cached = await extract_document(image_data, schema, extract_page)
+            parsed = postprocess(dict(parsed))
+        except OcrError as e:
+            return {**result, "status": "error", "detail": str(e)}
+        except ValueError as e:
+            return {**result, "status": "error", "detail": str(e)}
+        except Exception as e:
+            return {**result, "status": "error", "detail": f"OCR 처리 실패: {str(e)}"}
+
+        for field, value in parsed.items():
+            if hasattr(record, field):
+                setattr(record, field, value)
+        return {**result, "status": "success", "cached": cached, "data": parsed}
+
+    results = await asyncio.gather(*[process(kind, record_id) for kind, record_id in items])
+
+    # 성공 항목과 새 추출 결과를 한 트랜잭션으로 저장
+    try:
+        for (digest, schema_name), parsed in fresh.items():
+            ocr_cache.store(db, digest, schema_name, parsed, commit=False)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"일괄 OCR 저장 실패: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"일괄 OCR 저장 실패: {str(e)}")
+    ocr_cache.evict_if_due(db)
+
+    succeeded = sum(1 for result in results if result["status"] == "success")
+    return {
+        "message": f"일괄 OCR 완료: {succeeded}개 성공, {len(results) - succeeded}개 실패",
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results
+    }
+
 # 기존 수동 수정 기능 유지
 @router.patch("/diagnoses/{diagnosis_id}",
     summary="진단서 정보 수정",
@@ -350,7 +497,11 @@ async def update_diagnosis(diagnosis_id: int, diagnosis_data: DiagnosisUpdate, d
         db.commit()
         db.refresh(diagnosis)
 
-        return {"message": "진단서 정보 수정 완료", "diagnosis_id": diagnosis_id}
+        # 연결된 청구 재계산 (계산에 쓰이는 값이 그대로면 fingerprint 비교로 생략됨)
+        results = ClaimCalculator(db).recalculate_claims_for(diagnosis_id=diagnosis_id)
+        recalculated_claims = [r["claim_id"] for r in results if r["recalculated"]]
+
+        return {"message": "진단서 정보 수정 완료", "diagnosis_id": diagnosis_id, "recalculated_claims": recalculated_claims}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"진단서 정보 수정 실패: {str(e)}")
 
@@ -379,6 +530,10 @@ async def update_receipt(receipt_id: int, receipt_data: ReceiptUpdate, db: Sessi
         db.commit()
         db.refresh(receipt)
 
-        return {"message": "영수증 정보 수정 완료", "receipt_id": receipt_id}
+        # 연결된 청구 재계산 (계산에 쓰이는 값이 그대로면 fingerprint 비교로 생략됨)
+        results = ClaimCalculator(db).recalculate_claims_for(receipt_id=receipt_id)
+        recalculated_claims = [r["claim_id"] for r in results if r["recalculated"]]
+
+        return {"message": "영수증 정보 수정 완료", "receipt_id": receipt_id, "recalculated_claims": recalculated_claims}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"영수증 정보 수정 실패: {str(e)}")
\ No newline at end of file
@@ -6,7 +6,9 @@ from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from models.database import get_db
 from models.models import MedicalDiagnosis, MedicalReceipt
-from services.storage_service import storage_service
+from services.storage_service import UploadTooLarge
+from services.document_store import store_upload
+from services.document_pipeline import document_pipeline
 
 router = APIRouter()
 
@@ -22,11 +24,12 @@ os.makedirs(RECEIPT_DIR, exist_ok=True)
 @router.post(
     "/diagnoses/images",
     summary="진단서 이미지 업로드",
-    description="진단서 이미지 파일을 업로드하고 기본 진단서 레코드를 생성합니다. 나머지 필드는 추후 업데이트될 수 있습니다.",
+    description="진단서 이미지 파일을 업로드하고 기본 진단서 레코드를 생성합니다. 파일은 내용 해시(SHA-256)로 저장되며 같은 파일은 한 번만 저장됩니다. 나머지 필드는 추후 업데이트될 수 있습니다. pipeline=true 면 OCR/위조분석 작업을 백그라운드로 시작하고 job_id 를 반환합니다.",
     response_description="업로드 성공 시 생성된 진단서 ID 반환"
 )
 async def upload_diagnosis(
     file: UploadFile = File(..., description="진단서 이미지 파일"),
+    pipeline: bool = False,
     db: Session = Depends(get_db)
 ):
     try:
@@ -37,11 +40,9 @@ async def upload_diagnosis(
         if ext not in ALLOWED_EXTENSIONS:
             raise HTTPException(status_code=400, detail="허용되지 않는 파일 형식입니다.")
 
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        filename = f"diagnosis_{timestamp}.{ext}"
-        
-        # 스토리지 서비스를 사용하여 파일 업로드
-        file_url = await storage_service.upload_file(file, "diagnosis", filename)
+        # 내용 해시로 저장 (같은 파일이 이미 있으면 다시 저장하지 않고 참조만 추가)
+        document, deduplicated = await store_upload(db, file, ext)
+        file_url = document.storage_url
 
         diagnosis = MedicalDiagnosis(
             user_id=1,
@@ -54,14 +55,24 @@ async def upload_diagnosis(
             doctor_name="",
             icd_code="",
             admission_days=0,
-            image_url = file_url  # 스토리지 서비스에서 반환된 URL 사용
+            image_url = file_url,  # 스토리지 서비스에서 반환된 URL 사용
+            document_id = document.id
         )
         db.add(diagnosis)
-        db.commit()
+        db.commit()  # 문서 참조 증가와 같은 트랜잭션
         db.refresh(diagnosis)
 
-        return {"message": "진단서 업로드 성공", "diagnosis_id": diagnosis.id, "file_url": file_url}
+        response = {"message": "진단서 업로드 성공", "diagnosis_id": diagnosis.id, "file_url": file_url,
+                    "sha256": document.sha256, "deduplicated": deduplicated}
+        if pipeline:
+            # OCR/위조분석은 백그라운드에서 실행 (진행 상황은 /jobs/{job_id} 로 조회)
+            response["job_id"] = document_pipeline.submit(db, "diagnosis", diagnosis.id).id
+        return response
 
+    except HTTPException:
+        raise
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except SQLAlchemyError as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"DB 오류: {str(e)}")
@@ -71,11 +82,12 @@ async def upload_diagnosis(
 @router.post(
     "/receipts/images",
     summary="영수증 이미지 업로드",
-    description="영수증 이미지 파일을 업로드하고 기본 영수증 레코드를 생성합니다. 나머지 필드는 추후 업데이트될 수 있습니다.",
+    description="영수증 이미지 파일을 업로드하고 기본 영수증 레코드를 생성합니다. 파일은 내용 해시(SHA-256)로 저장되며 같은 파일은 한 번만 저장됩니다. 나머지 필드는 추후 업데이트될 수 있습니다. pipeline=true 면 OCR/위조분석 작업을 백그라운드로 시작하고 job_id 를 반환합니다.",
     response_description="업로드 성공 시 생성된 영수증 ID 반환"
 )
 async def upload_receipt(
     file: UploadFile = File(..., description="영수증 이미지 파일"),
+    pipeline: bool = False,
     db: Session = Depends(get_db)
 ):
     try:
@@ -86,11 +98,9 @@ async def upload_receipt(
         if ext not in ALLOWED_EXTENSIONS:
             raise HTTPException(status_code=400, detail="허용되지 않는 파일 형식입니다.")
 
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        filename = f"receipt_{timestamp}.{ext}"
-        
-        # 스토리지 서비스를 사용하여 파일 업로드
-        file_url = await storage_service.upload_file(file, "receipts", filename)
+        # 내용 해시로 저장 (같은 파일이 이미 있으면 다시 저장하지 않고 참조만 추가)
+        document, deduplicated = await store_upload(db, file, ext)
+        file_url = document.storage_url
 
         receipt = MedicalReceipt(
             user_id=1,
@@ -99,15 +109,25 @@ async def upload_receipt(
             total_amount=0,
             hospital_name="",
             treatment_details="",
-            image_url = file_url  # 스토리지 서비스에서 반환된 URL 사용
+            image_url = file_url,  # 스토리지 서비스에서 반환된 URL 사용
+            document_id = document.id
         )
 
         db.add(receipt)
-        db.commit()
+        db.commit()  # 문서 참조 증가와 같은 트랜잭션
         db.refresh(receipt)
 
-        return {"message": "영수증 업로드 성공", "receipt_id": receipt.id, "file_url": file_url}
+        response = {"message": "영수증 업로드 성공", "receipt_id": receipt.id, "file_url": file_url,
+                    "sha256": document.sha256, "deduplicated": deduplicated}
+        if pipeline:
+            # OCR/위조분석은 백그라운드에서 실행 (진행 상황은 /jobs/{job_id} 로 조회)
+            response["job_id"] = document_pipeline.submit(db, "receipt", receipt.id).id
+        return response
 
+    except HTTPException:
+        raise
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except SQLAlchemyError as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"DB 오류: {str(e)}")
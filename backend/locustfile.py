@@ -1,4 +1,7 @@
-from locust import HttpUser, task, between
+import os
+import random
+
+from locust import HttpUser, task, between, constant
 
 class APIUser(HttpUser):
     wait_time = between(1, 5)
@@ -9,4 +12,32 @@ class APIUser(HttpUser):
 
     @task
     def get_root(self):
-        self.client.get("/") 
\ No newline at end of file
+        self.client.get("/")
+
+
+def _ids(name: str):
+    return [int(value) for value in os.getenv(name, "").split(",") if value.strip()]
+
+
+class OcrUser(HttpUser):
+    """
+    OCR 처리량 측정 (utils/scripts/benchmark_ocr_throughput.py 에서 실행)
+    OCR 대역 서버(utils/scripts/ocr_stub_server.py)를 UPSTAGE_OCR_API_URL 로 지정한 백엔드에 사용합니다.
+    LOCUST_DIAGNOSIS_IDS / LOCUST_RECEIPT_IDS: 이미지가 업로드된 진단서/영수증 ID (쉼표 구분)
+    """
+    wait_time = constant(0)
+    diagnosis_ids = _ids("LOCUST_DIAGNOSIS_IDS")
+    receipt_ids = _ids("LOCUST_RECEIPT_IDS")
+
+    @task(3)
+    def ocr_diagnosis(self):
+        if self.diagnosis_ids:
+            # force=true: 결과 캐시를 건너뛰고 매번 추출 API 호출
+            self.client.patch(f"/api/v1/diagnoses/ocr/{random.choice(self.diagnosis_ids)}?force=true",
+                              name="/api/v1/diagnoses/ocr/[id]")
+
+    @task(2)
+    def ocr_receipt(self):
+        if self.receipt_ids:
+            self.client.patch(f"/api/v1/receipts/ocr/{random.choice(self.receipt_ids)}?force=true",
+                              name="/api/v1/receipts/ocr/[id]")
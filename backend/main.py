@@ -2,11 +2,19 @@ from fastapi import FastAPI, HTTPException, Depends, APIRouter
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from typing import Optional
+import asyncio
+import logging
 import os
+import sys
+from fastapi.responses import JSONResponse
 from models.database import get_db, engine
 from models.models import Base
 from prometheus_fastapi_instrumentator import Instrumentator
-from api import upload, ocr, medical, forgeries, claims, pdf, auth, image
+from api import upload, ocr, medical, forgeries, claims, pdf, auth, image, jobs
+from services.clause_rules import get_rule_engine
+from services.ocr_client import ocr_client
+from services.document_pipeline import document_pipeline
+from services.storage_service import storage_service
 from opentelemetry import trace
 from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
@@ -124,6 +132,7 @@ v1_router.include_router(forgeries.router, tags=["🔍 위조분석"])
 v1_router.include_router(claims.router, tags=["💰 청구"])
 v1_router.include_router(pdf.router, tags=["📄 PDF 처리"])
 v1_router.include_router(image.router, tags=["🖼️ 이미지"])
+v1_router.include_router(jobs.router, tags=["⚙️ 처리 작업"])
 
 # 메인 앱에 v1 라우터 등록
 app.include_router(v1_router)
@@ -136,6 +145,65 @@ SQLAlchemyInstrumentor().instrument(engine=engine)
 Psycopg2Instrumentor().instrument()
 
 
+@app.on_event("startup")
+async def load_claim_rules():
+    """특약 규칙 테이블/ICD-10 분류 인덱스를 첫 청구 전에 미리 로드"""
+    get_rule_engine()
+
+
+@app.on_event("startup")
+async def start_ocr_client():
+    """OCR 호출용 공유 HTTP 연결 풀 생성"""
+    ocr_client.start()
+
+
+@app.on_event("startup")
+async def start_storage_client():
+    """GCS 다운로드용 HTTP 연결 풀 생성"""
+    storage_service.start()
+
+
+@app.on_event("startup")
+async def start_document_pipeline():
+    """업로드 파이프라인 워커 풀 생성 및 미완료 작업 재실행"""
+    document_pipeline.start()
+
+
+# 위조분석 모델: true 면 시작 시 백그라운드 로드, false 면 첫 위조분석 요청 때 로드
+FORGERY_MODEL_PRELOAD = os.getenv("FORGERY_MODEL_PRELOAD", "true").lower() == "true"
+
+
+def _load_forgery_model():
+    # torch 임포트와 가중치 로드 모두 이 스레드에서 실행
+    from services import forgery_detector
+    try:
+        forgery_detector.load_model()
+    except Exception:
+        logging.getLogger(__name__).exception("위조분석 모델 사전 로드 실패")
+
+
+@app.on_event("startup")
+async def preload_forgery_model():
+    """위조분석 모델을 이벤트 루프 밖에서 로드 (기다리지 않고 바로 요청 처리 시작, 상태는 /ready)"""
+    if FORGERY_MODEL_PRELOAD:
+        app.state.forgery_model_loading = asyncio.get_running_loop().run_in_executor(None, _load_forgery_model)
+
+
+@app.on_event("shutdown")
+async def close_document_pipeline():
+    await document_pipeline.close()
+
+
+@app.on_event("shutdown")
+async def close_ocr_client():
+    await ocr_client.close()
+
+
+@app.on_event("shutdown")
+async def close_storage_client():
+    await storage_service.close()
+
+
 # 기본 라우트들
 @app.get("/")
 async def root():
@@ -144,7 +212,18 @@ async def root():
 @app.get("/health")
 async def health_check():
     from datetime import datetime
-    return {"status": "healthy", "timestamp": datetime.utcnow()}
+    return {"status": "healthy", "timestamp": datetime.utcnow(), "storage_cache": storage_service.cache.stats()}
+
+@app.get("/ready")
+async def readiness_check():
+    """모델 준비 상태 (위조분석 모델 사전 로드가 끝나기 전에는 503)"""
+    detector = sys.modules.get("services.forgery_detector")
+    forgery_model = dict(detector.model_status) if detector else {"state": "not_loaded"}
+    ready = forgery_model["state"] == "ready" or not FORGERY_MODEL_PRELOAD
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not_ready", "models": {"forgery": forgery_model}},
+    )
 
 
 # 아래 두 줄을 FastAPI 인스턴스 생성 후에 추가
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, ForeignKey, Date
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, ForeignKey, Date, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from models.database import Base
@@ -72,6 +72,18 @@ class InsuranceClause(Base):
     product = relationship("InsuranceProduct", back_populates="clauses")
     calculations = relationship("ClaimCalculation", back_populates="clause")
 
+class Document(Base):
+    """업로드 문서 원본 (내용 SHA-256 으로 저장, 같은 파일은 한 번만 저장하고 참조 수로 관리)"""
+    __tablename__ = "documents"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), nullable=False, unique=True)  # 파일 바이트 SHA-256
+    storage_url = Column(String(500), nullable=False)  # 저장 경로 (uploads/documents/{sha256}.{ext} 또는 GCS URL)
+    size = Column(Integer, nullable=False)
+    content_type = Column(String(100))
+    ref_count = Column(Integer, nullable=False, default=0)  # 참조하는 진단서/영수증 수 (0 이 되면 삭제)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
 class MedicalDiagnosis(Base):
     __tablename__ = "medical_diagnoses"
     
@@ -88,6 +100,7 @@ class MedicalDiagnosis(Base):
     admission_days = Column(Integer, default=0)  # 입원일수
     # 이미지 URL
     image_url = Column(String)
+    document_id = Column(Integer, ForeignKey("documents.id"))  # 원본 문서 (중복 제거 저장)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     is_deleted = Column(Boolean, default=False)
@@ -109,6 +122,7 @@ class MedicalReceipt(Base):
     treatment_details = Column(Text)
     # 이미지 URL
     image_url = Column(String)
+    document_id = Column(Integer, ForeignKey("documents.id"))  # 원본 문서 (중복 제거 저장)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     is_deleted = Column(Boolean, default=False)
@@ -129,6 +143,7 @@ class Claim(Base):
     claim_amount = Column(Float, nullable=False)
     claim_reason = Column(Text, nullable=False)
     status = Column(String, default="pending")  # pending, approved, rejected, paid
+    calc_fingerprint = Column(String(64))  # 보험금 계산 입력값 해시 (같으면 재계산 생략)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     is_deleted = Column(Boolean, default=False)
     
@@ -146,6 +161,7 @@ class ClaimCalculation(Base):
     clause_id = Column(Integer, ForeignKey("insurance_clauses.id"), nullable=False)
     calculated_amount = Column(Float, nullable=False)
     calculation_logic = Column(Text)
+    limit_period = Column(String(20))  # 누적 한도 기간 키 ("2025", "lifetime"), 누적 한도 없으면 NULL
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     is_deleted = Column(Boolean, default=False)
     
@@ -153,6 +169,23 @@ class ClaimCalculation(Base):
     claim = relationship("Claim", back_populates="calculations")
     clause = relationship("InsuranceClause", back_populates="calculations")
 
+class BenefitAccumulator(Base):
+    __tablename__ = "benefit_accumulators"
+    __table_args__ = (
+        UniqueConstraint("patient_ssn", "clause_id", "period", name="uq_benefit_accumulators_patient_clause_period"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    patient_ssn = Column(String, nullable=False)  # 피보험자 주민등록번호
+    clause_id = Column(Integer, ForeignKey("insurance_clauses.id"), nullable=False)
+    period = Column(String(20), nullable=False)  # 연도("2025") 또는 "lifetime"
+    paid_amount = Column(Float, nullable=False, default=0)  # 누적 지급액
+    claim_count = Column(Integer, nullable=False, default=0)  # 누적 지급 건수
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    # Relationships
+    clause = relationship("InsuranceClause")
+
 class UserContract(Base):
     __tablename__ = "user_contracts"
     
@@ -208,4 +241,58 @@ class ForgeryAnalysis(Base):
     
     # Relationships
     diagnosis = relationship("MedicalDiagnosis")
-    receipt = relationship("MedicalReceipt") 
\ No newline at end of file
+    receipt = relationship("MedicalReceipt")
+
+
+class OcrResultCache(Base):
+    __tablename__ = "ocr_result_cache"
+    __table_args__ = (
+        UniqueConstraint("image_sha256", "schema_name", name="uq_ocr_result_cache_image_schema"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    image_sha256 = Column(String(64), nullable=False)  # 이미지 바이트 SHA-256
+    schema_name = Column(String(50), nullable=False)  # diagnosis_schema / receipt_schema
+    result = Column(Text, nullable=False)  # Upstage 추출 결과 JSON (후처리 전)
+    hit_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)  # 오래된 항목부터 정리
+
+class ForgeryResultCache(Base):
+    """위조분석 결과 캐시 (이미지 SHA-256 + 모델 버전). 모델이 바뀌면 버전이 달라져 자동으로 다시 분석됩니다."""
+    __tablename__ = "forgery_result_cache"
+    __table_args__ = (
+        UniqueConstraint("image_sha256", "model_version", name="uq_forgery_result_cache_image_model"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    image_sha256 = Column(String(64), nullable=False)  # 이미지(PDF) 바이트 SHA-256
+    model_version = Column(String(100), nullable=False)  # forgery_detector.model_version()
+    predicted_class = Column(String(20), nullable=False)  # forged / authentic
+    confidence = Column(Float, nullable=False)
+    pages = Column(Text)  # PDF 페이지별 결과 JSON (이미지는 NULL)
+    hit_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)  # 오래된 항목부터 정리
+
+class DocumentJob(Base):
+    """업로드 파이프라인 작업 (OCR/위조분석 단계별 상태와 소요 시간)"""
+    __tablename__ = "document_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    document_type = Column(String(20), nullable=False)  # diagnosis / receipt
+    document_id = Column(Integer, nullable=False)
+    status = Column(String(20), nullable=False, default="queued")  # queued / running / completed / failed
+    ocr_status = Column(String(20), nullable=False, default="queued")  # queued / running / completed / failed
+    ocr_started_at = Column(DateTime(timezone=True))
+    ocr_finished_at = Column(DateTime(timezone=True))
+    ocr_error = Column(Text)
+    forgery_status = Column(String(20), nullable=False, default="queued")
+    forgery_started_at = Column(DateTime(timezone=True))
+    forgery_finished_at = Column(DateTime(timezone=True))
+    forgery_error = Column(Text)
+    forgery_analysis_id = Column(Integer, ForeignKey("forgery_analysis.id"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True))
+    owner = Column(String(100))  # 작업을 가져간 워커 (호스트:pid:임의값)
+    heartbeat_at = Column(DateTime(timezone=True))  # 실행 중 주기적으로 갱신, 오래되면 다른 워커가 다시 실행
@@ -0,0 +1,152 @@
+# backend/services/benefit_ledger.py
+"""
+환자 × 특약 × 기간별 누적 지급액 관리
+
+청구 계산 시 과거 ClaimCalculation 을 모두 합산하지 않고, benefit_accumulators 의
+해당 행만 잠가서(SELECT ... FOR UPDATE) 읽고 갱신하므로 청구당 비용이 일정합니다.
+"""
+
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models.models import BenefitAccumulator, Claim, ClaimCalculation
+
+LIFETIME = "lifetime"
+
+AccumulatorKey = Tuple[int, str]  # (clause_id, period)
+
+
+def period_key(period_type: Optional[str], receipt, diagnosis) -> Optional[str]:
+    """누적 한도 기간 키. annual 은 진료일(영수증) 기준 연도를 사용합니다."""
+    if period_type == "lifetime":
+        return LIFETIME
+    if period_type == "annual":
+        treatment_date = (getattr(receipt, "receipt_date", None)
+                          or getattr(diagnosis, "diagnosis_date", None)
+                          or date.today())
+        return str(treatment_date.year)
+    return None
+
+
+def period_label(period: str) -> str:
+    return "평생" if period == LIFETIME else f"{period}년"
+
+
+class BenefitLedger:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def lock(self, patient_ssn: str, keys: Iterable[AccumulatorKey]) -> Dict[AccumulatorKey, BenefitAccumulator]:
+        """
+        누적액 행을 잠가서 반환 (없으면 생성)
+        - 같은 환자의 청구가 동시에 계산돼도 한도를 넘겨 지급하지 않도록 트랜잭션 끝까지 잠금 유지
+        - 교착 상태를 피하려고 항상 (clause_id, period) 순서로 잠급니다.
+        """
+        keys = sorted(set(keys))
+        if not keys:
+            return {}
+
+        rows = self._select_for_update(patient_ssn, keys)
+        missing = [key for key in keys if key not in rows]
+        if missing:
+            for clause_id, period in missing:
+                try:
+                    with self.db.begin_nested():
+                        self.db.add(BenefitAccumulator(
+                            patient_ssn=patient_ssn, clause_id=clause_id, period=period,
+                            paid_amount=0, claim_count=0
+                        ))
+                except IntegrityError:
+                    # 다른 트랜잭션이 먼저 생성함 → 아래에서 다시 잠금
+                    pass
+            rows = self._select_for_update(patient_ssn, keys)
+        return rows
+
+    def _select_for_update(self, patient_ssn: str, keys: List[AccumulatorKey]) -> Dict[AccumulatorKey, BenefitAccumulator]:
+        clause_ids = sorted({clause_id for clause_id, _ in keys})
+        periods = sorted({period for _, period in keys})
+        rows = self.db.query(BenefitAccumulator).filter(
+            BenefitAccumulator.patient_ssn == patient_ssn,
+            BenefitAccumulator.clause_id.in_(clause_ids),
+            BenefitAccumulator.period.in_(periods)
+        ).order_by(BenefitAccumulator.clause_id, BenefitAccumulator.period).with_for_update().all()
+        wanted = set(keys)
+        return {
+            (row.clause_id, row.period): row
+            for row in rows if (row.clause_id, row.period) in wanted
+        }
+
+    @staticmethod
+    def remaining(accumulator: BenefitAccumulator, limit: float) -> float:
+        """남은 누적 한도"""
+        return max(0.0, (limit or 0) - (accumulator.paid_amount or 0))
+
+    @staticmethod
+    def record(accumulator: BenefitAccumulator, amount: float) -> None:
+        accumulator.paid_amount = (accumulator.paid_amount or 0) + amount
+        accumulator.claim_count = (accumulator.claim_count or 0) + 1
+
+    @staticmethod
+    def reverse(accumulator: BenefitAccumulator, amount: float) -> None:
+        accumulator.paid_amount = max(0.0, (accumulator.paid_amount or 0) - amount)
+        accumulator.claim_count = max(0, (accumulator.claim_count or 0) - 1)
+
+    def previous_entries(self, claim_id: int) -> List[Tuple[int, str, float]]:
+        """청구의 기존 계산 중 누적액에 반영된 항목 (clause_id, period, amount)"""
+        return self.previous_entries_for([claim_id]).get(claim_id, [])
+
+    def previous_entries_for(self, claim_ids: List[int]) -> Dict[int, List[Tuple[int, str, float]]]:
+        """여러 청구의 previous_entries 를 한 번에 조회"""
+        rows = self.db.query(
+            ClaimCalculation.claim_id, ClaimCalculation.clause_id,
+            ClaimCalculation.limit_period, ClaimCalculation.calculated_amount
+        ).filter(
+            ClaimCalculation.claim_id.in_(claim_ids),
+            ClaimCalculation.limit_period.isnot(None),
+            ClaimCalculation.is_deleted == False
+        ).all()
+        entries: Dict[int, List[Tuple[int, str, float]]] = {}
+        for claim_id, clause_id, period, amount in rows:
+            entries.setdefault(claim_id, []).append((clause_id, period, amount))
+        return entries
+
+    def release_claim(self, claim: Claim) -> None:
+        """청구 삭제 전 누적액에서 해당 청구 지급분을 차감"""
+        entries = self.previous_entries(claim.id)
+        accumulators = self.lock(claim.patient_ssn, [(clause_id, period) for clause_id, period, _ in entries])
+        for clause_id, period, amount in entries:
+            self.reverse(accumulators[(clause_id, period)], amount)
+
+    def rebuild(self) -> int:
+        """
+        claim_calculations 기준으로 누적액 테이블 전체 재구성 (불일치 복구용 작업)
+        :return: 생성된 누적액 행 수
+        """
+        self.db.query(BenefitAccumulator).delete(synchronize_session=False)
+        rows = self.db.query(
+            Claim.patient_ssn,
+            ClaimCalculation.clause_id,
+            ClaimCalculation.limit_period,
+            func.sum(ClaimCalculation.calculated_amount),
+            func.count(func.distinct(ClaimCalculation.claim_id))
+        ).join(Claim, Claim.id == ClaimCalculation.claim_id).filter(
+            ClaimCalculation.limit_period.isnot(None),
+            ClaimCalculation.is_deleted == False,
+            Claim.is_deleted == False
+        ).group_by(
+            Claim.patient_ssn, ClaimCalculation.clause_id, ClaimCalculation.limit_period
+        ).all()
+
+        self.db.bulk_save_objects([
+            BenefitAccumulator(
+                patient_ssn=patient_ssn, clause_id=clause_id, period=period,
+                paid_amount=paid_amount or 0, claim_count=claim_count or 0
+            )
+            for patient_ssn, clause_id, period, paid_amount, claim_count in rows
+        ])
+        self.db.commit()
+        return len(rows)
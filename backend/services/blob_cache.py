@@ -0,0 +1,201 @@
+# backend/services/blob_cache.py
+"""
+원격(GCS) 문서 바이트 로컬 디스크 캐시 (read-through, 용량 기준 LRU)
+
+OCR, 위조분석, 이미지 조회가 같은 GCS 객체를 각각 다운로드하지 않도록
+처음 읽을 때 로컬 디스크에 저장하고 이후에는 디스크에서 읽습니다. (StorageService.open_* 에서 사용)
+- 임시 파일에 쓴 뒤 이름을 바꾸므로 반쯤 쓴 파일을 읽지 않습니다.
+- 같은 객체를 동시에 요청하면 한 번만 다운로드하고 나머지는 그 결과를 기다립니다.
+  (같은 프로세스는 asyncio.Lock, 다른 워커 프로세스와는 잠금 파일(fcntl.flock)로 조율)
+- 메모리 목록 대신 디렉터리 자체를 기준으로 하므로 여러 워커(uvicorn --workers)가 같은 디렉터리를 공유해도 됩니다.
+  전체 크기가 최대 용량을 넘으면 디렉터리를 훑어 마지막 사용 시각이 오래된 파일부터 삭제합니다.
+  (utils/pdf_pages.trim_page_cache 와 같은 방식, 열려 있는 파일은 삭제돼도 끝까지 읽을 수 있음)
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+from contextlib import asynccontextmanager
+from typing import Awaitable, BinaryIO, Callable, Dict, List, Optional, Tuple
+
+from prometheus_client import Counter
+
+try:
+    import fcntl
+except ImportError:  # Windows 개발 환경: 프로세스 간 잠금 없이 동작 (중복 다운로드만 발생할 수 있음)
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+STORAGE_CACHE_REQUESTS = Counter(
+    "storage_cache_requests_total",
+    "원격 문서 디스크 캐시 조회 수",
+    ["result"],  # result: hit / miss
+)
+STORAGE_CACHE_BYTES = Counter(
+    "storage_cache_bytes_total",
+    "원격 문서 디스크 캐시 바이트",
+    ["kind"],  # kind: saved (캐시에서 읽어 다운로드를 생략) / downloaded
+)
+
+# 다른 워커가 같은 객체를 다운로드하는 동안 잠금 파일 확인 간격
+FILL_LOCK_POLL_SECONDS = 0.05
+
+
+class BlobCache:
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._fills: Dict[str, asyncio.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.bytes_downloaded = 0
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha256(url.encode()).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    async def fetch(self, url: str, download: Callable[[BinaryIO], Awaitable[None]]) -> BinaryIO:
+        """
+        캐시된 파일을 열어 반환하고, 없으면 download(파일) 로 채운 뒤 반환 (호출한 쪽에서 닫음)
+        """
+        key = self.key(url)
+        cached = await asyncio.to_thread(self._open, key)
+        if cached is not None:
+            return cached
+
+        fill_lock = self._fills.setdefault(key, asyncio.Lock())
+        async with fill_lock:
+            try:
+                async with self._process_lock(key):
+                    # 먼저 기다리던 요청(또는 다른 워커)이 채웠으면 그대로 사용
+                    cached = await asyncio.to_thread(self._open, key)
+                    if cached is not None:
+                        return cached
+                    return await self._fill(key, download)
+            finally:
+                self._fills.pop(key, None)
+
+    def discard(self, url: str) -> None:
+        """원본이 삭제된 경우 캐시에서도 제거"""
+        self._remove(self.key(url))
+
+    def stats(self) -> Dict:
+        requests = self.hits + self.misses
+        entries = self._scan()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / requests, 4) if requests else None,
+            "bytes_saved": self.bytes_saved,
+            "bytes_downloaded": self.bytes_downloaded,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+        }
+
+    def _open(self, key: str) -> Optional[BinaryIO]:
+        # 다른 워커가 채운 파일도 디스크에 있으면 그대로 사용
+        path = self.path(key)
+        try:
+            f = open(path, "rb")
+        except OSError:
+            return None
+        try:
+            os.utime(path)  # 마지막 사용 시각 (정리 순서, 재시작 후에도 유지)
+        except OSError:
+            pass  # 그 사이 다른 워커가 정리한 경우에도 열린 파일은 끝까지 읽을 수 있음
+        size = os.fstat(f.fileno()).st_size
+        self.hits += 1
+        self.bytes_saved += size
+        STORAGE_CACHE_REQUESTS.labels(result="hit").inc()
+        STORAGE_CACHE_BYTES.labels(kind="saved").inc(size)
+        return f
+
+    @asynccontextmanager
+    async def _process_lock(self, key: str):
+        """다른 워커 프로세스가 같은 객체를 채우는 동안 대기 (이벤트 루프를 막지 않도록 비차단 잠금을 재시도)"""
+        if fcntl is None:
+            yield
+            return
+        await asyncio.to_thread(os.makedirs, self.cache_dir, exist_ok=True)
+        lock_file = open(f"{self.path(key)}.lock", "wb")
+        try:
+            while True:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    await asyncio.sleep(FILL_LOCK_POLL_SECONDS)
+            yield
+        finally:
+            lock_file.close()  # 닫으면 잠금도 해제
+
+    async def _fill(self, key: str, download: Callable[[BinaryIO], Awaitable[None]]) -> BinaryIO:
+        path = self.path(key)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        await asyncio.to_thread(os.makedirs, self.cache_dir, exist_ok=True)
+        try:
+            with open(temp_path, "wb") as out:
+                await download(out)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+        f = open(path, "rb")  # 정리 전에 열어 두어 용량보다 큰 파일도 읽을 수 있게 함
+        size = os.fstat(f.fileno()).st_size
+        self.misses += 1
+        self.bytes_downloaded += size
+        STORAGE_CACHE_REQUESTS.labels(result="miss").inc()
+        STORAGE_CACHE_BYTES.labels(kind="downloaded").inc(size)
+        await asyncio.to_thread(self._evict)
+        return f
+
+    def _scan(self) -> List[Tuple[float, int, str]]:
+        """디스크의 캐시 파일 (마지막 사용 시각, 크기, 키), 쓰는 중인 임시 파일과 잠금 파일은 제외"""
+        entries = []
+        try:
+            for entry in os.scandir(self.cache_dir):
+                if entry.is_file() and not entry.name.endswith((".tmp", ".lock")):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.name))
+        except OSError:
+            pass
+        return entries
+
+    def _remove(self, key: str) -> bool:
+        path = self.path(key)
+        try:
+            os.remove(path)
+        except OSError:
+            return False
+        try:
+            os.remove(f"{path}.lock")
+        except OSError:
+            pass
+        return True
+
+    def _evict(self) -> int:
+        """전체 크기가 최대 용량을 넘으면 마지막 사용 시각이 오래된 파일부터 삭제 (모든 워커의 파일 기준)"""
+        entries = self._scan()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, key in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            # 다른 워커가 먼저 삭제했어도 용량에서는 빠짐
+            removed += self._remove(key)
+            total -= size
+        if removed:
+            logger.info(f"문서 디스크 캐시 정리: {removed}개 삭제")
+        return removed
@@ -1,529 +1,494 @@
 from models.models import (
-    InsuranceClause, MedicalReceipt, MedicalDiagnosis, 
-    Claim, ClaimCalculation
+    InsuranceClause, MedicalReceipt, MedicalDiagnosis,
+    Claim, ClaimCalculation, UserContract
 )
-from typing import List, Dict, Tuple
-import re
+from services.clause_rules import get_rule_engine, CompiledRuleSet
+from services.benefit_ledger import BenefitLedger, period_key, period_label
+from services.claim_snapshots import (
+    ClauseSnapshot, DiagnosisSnapshot, ReceiptSnapshot, Payout, RatingJob, snapshot_clauses
+)
+from sqlalchemy import or_
+from sqlalchemy.orm import joinedload
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Dict, Tuple, Optional
+import multiprocessing
+import hashlib
+import json
+import os
+
+# 카테고리 기반 계산(calculate_claim_amount)에서 조회하는 특약 카테고리
+CATEGORY_RULESET_CATEGORIES = ["진단", "의료비", "실손", "외래진료", "입원", "통원"]
+
+# 대량 재계산(recalculate_stale_claims) 설정
+# - 재계산 대상이 RECALC_PARALLEL_MIN 건 이상이면 규칙 평가를 프로세스 풀로 나눠서 실행
+# - 결과는 RECALC_BATCH_SIZE 건 단위로 한 트랜잭션에 bulk insert
+RECALC_WORKERS = int(os.getenv("CLAIM_RECALC_WORKERS", "0")) or (os.cpu_count() or 1)
+RECALC_PARALLEL_MIN = int(os.getenv("CLAIM_RECALC_PARALLEL_MIN", "2000"))
+RECALC_BATCH_SIZE = int(os.getenv("CLAIM_RECALC_BATCH_SIZE", "500"))
+
+# 보험금 계산에 실제로 쓰이는 진단서/영수증 필드
+# (patient_name 은 특약 개수 제한 규칙에, 날짜는 누적 한도 기간(period_key)에 사용)
+FINGERPRINT_DIAGNOSIS_FIELDS = ("patient_name", "diagnosis_name", "diagnosis_text", "icd_code", "admission_days",
+                                "diagnosis_date")
+FINGERPRINT_RECEIPT_FIELDS = ("total_amount", "receipt_date")
+
+
+def clause_set_version(clauses) -> str:
+    """특약 목록의 버전 해시 (특약 추가/삭제/금액 변경 시 바뀜)"""
+    payload = [
+        (clause.id, clause.clause_name, clause.category, clause.per_unit, clause.max_total)
+        for clause in clauses
+    ]
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def calculation_fingerprint(diagnosis, receipt, clauses, rules_digest: str) -> str:
+    """보험금 계산 입력값 fingerprint. 같으면 다시 계산해도 결과가 같습니다."""
+    payload = {
+        "diagnosis": [getattr(diagnosis, field) for field in FINGERPRINT_DIAGNOSIS_FIELDS],
+        "receipt": [getattr(receipt, field) for field in FINGERPRINT_RECEIPT_FIELDS],
+        "clauses": clause_set_version(clauses),
+        "rules": rules_digest,
+    }
+    return hashlib.sha256(
+        json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+def rate_clauses(clauses: Iterable[ClauseSnapshot], diagnosis: DiagnosisSnapshot,
+                 receipt: ReceiptSnapshot, ruleset: CompiledRuleSet, checked: bool = False) -> List[Payout]:
+    """
+    컴파일된 규칙으로 특약별 보험금 계산 (누적/의료비 한도 적용 전)
+    checked=True 이면 적용 가능 여부는 이미 확인된 것으로 보고 지급액만 계산합니다.
+    """
+    payouts = []
+    for clause in clauses:
+        if not checked and not ruleset.is_applicable(clause, diagnosis, receipt):
+            continue
+        amount, logic = ruleset.payout(clause, diagnosis, receipt)
+        if amount > 0:
+            payouts.append(Payout(clause, amount, logic))
+    return payouts
+
+
+def rate_with_clauses(clauses: Iterable[ClauseSnapshot], diagnosis: DiagnosisSnapshot,
+                      receipt: ReceiptSnapshot, ruleset: CompiledRuleSet) -> List[Payout]:
+    """가입 특약 중 적용 가능한 것만 골라서 계산 (calculate_claim_with_clauses 의 규칙 평가 부분)"""
+    applicable_clauses = [
+        clause for clause in clauses
+        if ruleset.is_applicable(clause, diagnosis, receipt)
+    ]
+    # 최일우만 특약 4개로 제한
+    if diagnosis.patient_name == "최일우":
+        applicable_clauses = applicable_clauses[:4]
+    return rate_clauses(applicable_clauses, diagnosis, receipt, ruleset, checked=True)
+
+
+def _rate_job(job: RatingJob) -> Tuple[int, List[Payout]]:
+    """프로세스 풀 워커: 스냅샷만으로 규칙 평가 (DB 접근 없음)"""
+    ruleset = get_rule_engine()["clause"]
+    return job.claim_id, rate_with_clauses(job.clauses, job.diagnosis, job.receipt, ruleset)
+
 
 class ClaimCalculator:
     def __init__(self, db_session):
         self.db = db_session
-    
+
     def calculate_claim_amount(self, claim_id: int) -> Dict:
         """
         보험금 청구 금액을 계산합니다.
         """
-        claim = self.db.query(Claim).filter(Claim.id == claim_id).first()
-        if not claim:
-            raise ValueError("청구 정보를 찾을 수 없습니다.")
-        
-        diagnosis = claim.diagnosis
-        receipt = claim.receipt
-        
-        # 기존 계산 결과 삭제
-        self.db.query(ClaimCalculation).filter(
-            ClaimCalculation.claim_id == claim_id
-        ).delete()
-        
-        calculations = []
-        total_amount = 0
-        
-        # 1. 진단 관련 특약 계산
-        diagnosis_amount, diagnosis_calcs = self._calculate_diagnosis_benefits(
-            claim, diagnosis
-        )
-        calculations.extend(diagnosis_calcs)
-        total_amount += diagnosis_amount
-        
-        # 2. 의료비 관련 특약 계산
-        medical_amount, medical_calcs = self._calculate_medical_benefits(
-            claim, receipt, diagnosis
-        )
-        calculations.extend(medical_calcs)
-        total_amount += medical_amount
-        
-        # 3. 입원/통원 관련 특약 계산
-        treatment_amount, treatment_calcs = self._calculate_treatment_benefits(
-            claim, receipt, diagnosis
-        )
-        calculations.extend(treatment_calcs)
-        total_amount += treatment_amount
-        
-        # 4. 총 보험금이 실제 의료비를 초과하지 않도록 제한
-        actual_medical_cost = receipt.total_amount
-        if total_amount > actual_medical_cost:
-            print(f"⚠️ 총 보험금({total_amount:,.0f}원)이 실제 의료비({actual_medical_cost:,.0f}원)를 초과합니다.")
-            
-            # 비례 축소 적용
-            reduction_ratio = actual_medical_cost / total_amount
-            print(f"   축소 비율: {reduction_ratio:.2%}")
-            
-            for calc in calculations:
-                original_amount = calc.calculated_amount
-                calc.calculated_amount = original_amount * reduction_ratio
-                calc.calculation_logic += f" → 의료비 한도 적용: {original_amount:,.0f} × {reduction_ratio:.2%} = {calc.calculated_amount:,.0f}원"
-            
-            total_amount = actual_medical_cost
-        
-        # 5. 계산 결과 저장
-        for calc in calculations:
-            self.db.add(calc)
-        
-        # 6. 청구 금액 업데이트
-        claim.claim_amount = total_amount
-        self.db.commit()
-        
-        return {
-            "claim_id": claim_id,
-            "total_amount": total_amount,
-            "calculations": [
-                {
-                    "clause_name": calc.clause.clause_name,
-                    "category": calc.clause.category,
-                    "calculated_amount": calc.calculated_amount,
-                    "calculation_logic": calc.calculation_logic
-                }
-                for calc in calculations
-            ]
-        }
-    
-    def _calculate_diagnosis_benefits(self, claim: Claim, diagnosis: MedicalDiagnosis) -> Tuple[float, List[ClaimCalculation]]:
-        """진단 관련 특약 계산"""
-        calculations = []
-        total_amount = 0
-        
-        # 진단명에서 키워드 추출
-        diagnosis_keywords = self._extract_diagnosis_keywords(diagnosis.diagnosis_name)
-        
-        # 관련 진단 특약 찾기
-        diagnosis_clauses = self.db.query(InsuranceClause).filter(
-            InsuranceClause.category == "진단"
-        ).all()
-        
-        for clause in diagnosis_clauses:
-            if self._is_clause_applicable(clause, diagnosis_keywords):
-                # 진단 특약은 보통 정액 지급
-                amount = clause.per_unit
-                
-                calculation = ClaimCalculation(
-                    claim_id=claim.id,
-                    clause_id=clause.id,
-                    calculated_amount=amount,
-                    calculation_logic=f"진단 특약 '{clause.clause_name}': {diagnosis.diagnosis_name} 진단으로 {amount:,.0f}원 지급"
-                )
-                calculations.append(calculation)
-                total_amount += amount
-        
-        return total_amount, calculations
-    
-    def _calculate_medical_benefits(self, claim: Claim, receipt: MedicalReceipt, diagnosis: MedicalDiagnosis) -> Tuple[float, List[ClaimCalculation]]:
-        """의료비 관련 특약 계산"""
-        calculations = []
-        total_amount = 0
-        
-        # 의료비 관련 특약 찾기
-        medical_clauses = self.db.query(InsuranceClause).filter(
-            InsuranceClause.category.in_(["의료비", "실손"])
-        ).all()
-        
-        for clause in medical_clauses:
-            # 실손 의료비는 실제 지출 금액의 일정 비율
-            if "실손" in clause.clause_name:
-                # 보통 80-90% 보장
-                coverage_rate = 0.8
-                deductible = 20000  # 공제금액 2만원
-                
-                # 공제금액을 제외한 실제 보장 금액
-                covered_amount = max(0, receipt.total_amount - deductible)
-                amount = min(covered_amount * coverage_rate, clause.per_unit)
-                
-                if amount > 0:
-                    calculation = ClaimCalculation(
-                        claim_id=claim.id,
-                        clause_id=clause.id,
-                        calculated_amount=amount,
-                        calculation_logic=f"실손 의료비 '{clause.clause_name}': ({receipt.total_amount:,.0f} - {deductible:,.0f}) × {coverage_rate:.0%} = {amount:,.0f}원"
-                    )
-                    calculations.append(calculation)
-                    total_amount += amount
-        
-        return total_amount, calculations
-    
-    def _calculate_treatment_benefits(self, claim: Claim, receipt: MedicalReceipt, diagnosis: MedicalDiagnosis) -> Tuple[float, List[ClaimCalculation]]:
-        """치료/통원 관련 특약 계산"""
-        calculations = []
-        total_amount = 0
-        
-        # 입원/통원 구분
-        is_inpatient = diagnosis.admission_days > 0
-        treatment_type = "입원" if is_inpatient else "외래"
-        
-        # 관련 특약 찾기
-        treatment_clauses = self.db.query(InsuranceClause).filter(
-            InsuranceClause.category.in_(["외래진료", "입원", "통원"])
+        claim, diagnosis, receipt, previous = self._load_claim(claim_id)
+        ruleset = get_rule_engine()["category"]
+
+        clauses = self.db.query(InsuranceClause).filter(
+            InsuranceClause.category.in_(CATEGORY_RULESET_CATEGORIES)
         ).all()
-        
-        for clause in treatment_clauses:
-            applicable = False
-            
-            # 외래 진료 특약
-            if "외래" in clause.clause_name and not is_inpatient:
-                applicable = True
-            # 입원 특약
-            elif "입원" in clause.clause_name and is_inpatient:
-                applicable = True
-            # 통원 특약 (외래와 유사)
-            elif "통원" in clause.clause_name and not is_inpatient:
-                applicable = True
-            
-            if applicable:
-                if is_inpatient:
-                    # 입원일수 × 일당
-                    amount = min(diagnosis.admission_days * clause.per_unit, clause.max_total)
-                    logic = f"{treatment_type} 특약 '{clause.clause_name}': {diagnosis.admission_days}일 × {clause.per_unit:,.0f}원 = {amount:,.0f}원"
-                else:
-                    # 외래는 실제 의료비와 특약 한도 중 작은 값
-                    amount = min(receipt.total_amount, clause.per_unit)
-                    logic = f"{treatment_type} 특약 '{clause.clause_name}': min({receipt.total_amount:,.0f}, {clause.per_unit:,.0f}) = {amount:,.0f}원"
-                
-                calculation = ClaimCalculation(
-                    claim_id=claim.id,
-                    clause_id=clause.id,
-                    calculated_amount=amount,
-                    calculation_logic=logic
-                )
-                calculations.append(calculation)
-                total_amount += amount
-        
-        return total_amount, calculations
-    
-    def _extract_diagnosis_keywords(self, diagnosis_name: str) -> List[str]:
-        """진단명에서 키워드 추출"""
-        keywords = []
-        
-        # 골절 관련
-        if "골절" in diagnosis_name:
-            keywords.append("골절")
-        
-        # 암 관련
-        if any(word in diagnosis_name for word in ["암", "종양", "cancer"]):
-            keywords.append("암")
-        
-        # 심장 관련
-        if any(word in diagnosis_name for word in ["심장", "심근", "협심증"]):
-            keywords.append("심장")
-        
-        # 뇌 관련
-        if any(word in diagnosis_name for word in ["뇌", "중풍", "뇌졸중"]):
-            keywords.append("뇌")
-        
-        return keywords
-    
-    def _is_clause_applicable(self, clause: InsuranceClause, keywords: List[str]) -> bool:
-        """특약이 해당 진단에 적용 가능한지 확인"""
-        clause_name = clause.clause_name.lower()
-        
-        for keyword in keywords:
-            if keyword in clause_name:
-                return True
-        
-        return False
-    
+
+        # 진단 → 의료비 → 입원/통원 순서로 정렬 (규칙 테이블 순서)
+        order = {category: i for i, category in enumerate(CATEGORY_RULESET_CATEGORIES)}
+        clauses.sort(key=lambda clause: order.get(clause.category, len(order)))
+
+        payouts = rate_clauses(snapshot_clauses(clauses), diagnosis, receipt, ruleset)
+        return self._finalize(claim, diagnosis, receipt, payouts, previous, verbose=True)
+
     def calculate_claim_with_subscriptions(self, claim_id: int, subscriptions: List) -> Dict:
         """
         사용자의 특약 구독 정보를 기반으로 보험금을 계산합니다.
         """
-        from models.models import UserSubscription  # 순환 import 방지
-        
+        claim, diagnosis, receipt, previous = self._load_claim(claim_id)
+        ruleset = get_rule_engine()["clause"]
+
+        # 사용자가 구독한 특약들만 계산
+        clauses = snapshot_clauses(subscription.clause for subscription in subscriptions)
+        payouts = rate_clauses(clauses, diagnosis, receipt, ruleset)
+        return self._finalize(claim, diagnosis, receipt, payouts, previous)
+
+    def calculate_claim_with_clauses(self, claim_id: int, clauses: List[InsuranceClause],
+                                     force: bool = False) -> Dict:
+        """
+        특정 특약들만을 사용하여 보험금을 계산합니다.
+        계산 입력값 fingerprint 가 저장된 값과 같으면 다시 계산하지 않고 기존 결과를 반환합니다. (force=True 면 항상 계산)
+        """
+        engine = get_rule_engine()
         claim = self.db.query(Claim).filter(Claim.id == claim_id).first()
         if not claim:
             raise ValueError("청구 정보를 찾을 수 없습니다.")
-        
-        diagnosis = claim.diagnosis
-        receipt = claim.receipt
-        
-        # 기존 계산 결과 삭제
+
+        clauses = snapshot_clauses(clauses)
+        fingerprint = calculation_fingerprint(claim.diagnosis, claim.receipt, clauses, engine.digest)
+        if not force and claim.calc_fingerprint == fingerprint:
+            return self._existing_result(claim)
+
+        claim, diagnosis, receipt, previous = self._load_claim(claim_id)
+        claim.calc_fingerprint = fingerprint
+
+        payouts = rate_with_clauses(clauses, diagnosis, receipt, engine["clause"])
+        return self._finalize(claim, diagnosis, receipt, payouts, previous)
+
+    def _load_claim(self, claim_id: int) -> Tuple[Claim, DiagnosisSnapshot, ReceiptSnapshot, List[Tuple[int, str, float]]]:
+        """
+        청구 조회(행 잠금) 및 기존 계산 결과 삭제
+        진단서/영수증은 계산용 스냅샷으로, 삭제한 계산 중 누적 한도에 반영됐던 항목
+        (clause_id, period, amount) 을 함께 반환합니다. (_finalize 에서 차감)
+        청구 행을 먼저 잠가서, 같은 청구를 동시에 재계산할 때 두 요청이 같은 기존 지급분을 읽고
+        둘 다 차감하지 않도록 합니다. (잠금은 _finalize 의 커밋까지 유지)
+        """
+        claim = self.db.query(Claim).filter(Claim.id == claim_id).with_for_update().first()
+        if not claim:
+            raise ValueError("청구 정보를 찾을 수 없습니다.")
+
+        previous = BenefitLedger(self.db).previous_entries(claim_id)
+
+        # 기존 계산 결과 삭제 (fingerprint 는 calculate_claim_with_clauses 에서만 다시 기록,
+        # 다른 방식으로 계산한 결과를 fingerprint 가 같다고 재사용하지 않도록 지움)
         self.db.query(ClaimCalculation).filter(
             ClaimCalculation.claim_id == claim_id
         ).delete()
-        
-        calculations = []
-        total_amount = 0
-        
-        # 사용자가 구독한 특약들만 계산
-        for subscription in subscriptions:
-            clause = subscription.clause
-            
-            # 진단명에서 키워드 추출
-            diagnosis_keywords = self._extract_diagnosis_keywords(diagnosis.diagnosis_name)
-            
-            # 특약 적용 가능 여부 확인
-            if self._is_subscription_applicable(clause, diagnosis, receipt):
-                amount = self._calculate_subscription_amount(clause, diagnosis, receipt)
-                
-                if amount > 0:
-                    calculation = ClaimCalculation(
-                        claim_id=claim_id,
-                        clause_id=clause.id,
-                        calculated_amount=amount,
-                        calculation_logic=self._get_calculation_logic(clause, diagnosis, receipt, amount)
-                    )
-                    calculations.append(calculation)
-                    total_amount += amount
-        
+        claim.calc_fingerprint = None
+
+        return (claim, DiagnosisSnapshot.from_orm(claim.diagnosis),
+                ReceiptSnapshot.from_orm(claim.receipt), previous)
+
+    @staticmethod
+    def _calculations(claim_id: int, diagnosis: DiagnosisSnapshot, receipt: ReceiptSnapshot,
+                      payouts: List[Payout]) -> List[Tuple[ClauseSnapshot, ClaimCalculation]]:
+        """규칙 평가 결과 → (특약, 저장할 계산 행) 목록. 누적 한도 기간 키도 함께 정합니다."""
+        engine = get_rule_engine()
+        return [
+            (payout.clause, ClaimCalculation(
+                claim_id=claim_id,
+                clause_id=payout.clause.id,
+                calculated_amount=payout.amount,
+                calculation_logic=payout.logic,
+                limit_period=period_key(engine.limit_period(payout.clause), receipt, diagnosis)
+            ))
+            for payout in payouts
+        ]
+
+    @staticmethod
+    def _limit_keys(calculations: List[Tuple[ClauseSnapshot, ClaimCalculation]],
+                    previous: List[Tuple[int, str, float]]) -> List[Tuple[int, str]]:
+        """잠가야 할 누적액 키 (기존 계산분 + 이번 계산분)"""
+        return [(clause_id, period) for clause_id, period, _ in previous] + [
+            (calc.clause_id, calc.limit_period) for _, calc in calculations if calc.limit_period
+        ]
+
+    @staticmethod
+    def _apply_limits(accumulators: Dict, receipt: ReceiptSnapshot,
+                      calculations: List[Tuple[ClauseSnapshot, ClaimCalculation]],
+                      previous: List[Tuple[int, str, float]],
+                      verbose: bool = False) -> Tuple[float, List[Tuple[ClauseSnapshot, ClaimCalculation]]]:
+        """누적/의료비 한도 적용 후 누적액 반영 (accumulators 는 잠긴 상태여야 함)"""
+        # 재계산이면 이전 지급분을 먼저 되돌림
+        for clause_id, period, amount in previous:
+            BenefitLedger.reverse(accumulators[(clause_id, period)], amount)
+
+        # 환자별 누적 지급 한도 적용 (특약 max_total 기준)
+        for clause, calc in calculations:
+            if not calc.limit_period or not clause.max_total:
+                continue
+            accumulator = accumulators[(calc.clause_id, calc.limit_period)]
+            remaining = BenefitLedger.remaining(accumulator, clause.max_total)
+            if calc.calculated_amount > remaining:
+                calc.calculation_logic += (
+                    f" → 누적 한도 적용({period_label(calc.limit_period)}): "
+                    f"한도 {clause.max_total:,.0f} - 기지급 {accumulator.paid_amount:,.0f} = {remaining:,.0f}원"
+                )
+                calc.calculated_amount = remaining
+        calculations = [(clause, calc) for clause, calc in calculations if calc.calculated_amount > 0]
+
+        total_amount = sum(calc.calculated_amount for _, calc in calculations)
+
         # 총 보험금이 실제 의료비를 초과하지 않도록 제한
         actual_medical_cost = receipt.total_amount
         if total_amount > actual_medical_cost:
             reduction_ratio = actual_medical_cost / total_amount
-            
-            for calc in calculations:
+            if verbose:
+                print(f"⚠️ 총 보험금({total_amount:,.0f}원)이 실제 의료비({actual_medical_cost:,.0f}원)를 초과합니다.")
+                print(f"   축소 비율: {reduction_ratio:.2%}")
+
+            for _, calc in calculations:
                 original_amount = calc.calculated_amount
                 calc.calculated_amount = original_amount * reduction_ratio
                 calc.calculation_logic += f" → 의료비 한도 적용: {original_amount:,.0f} × {reduction_ratio:.2%} = {calc.calculated_amount:,.0f}원"
-            
+
             total_amount = actual_medical_cost
-        
+
+        # 누적액 반영
+        for _, calc in calculations:
+            if calc.limit_period:
+                BenefitLedger.record(accumulators[(calc.clause_id, calc.limit_period)], calc.calculated_amount)
+
+        return total_amount, calculations
+
+    def _finalize(self, claim: Claim, diagnosis: DiagnosisSnapshot, receipt: ReceiptSnapshot,
+                  payouts: List[Payout], previous: List[Tuple[int, str, float]],
+                  verbose: bool = False) -> Dict:
+        """누적/의료비 한도 적용, 계산 결과 저장, 청구 금액 업데이트"""
+        calculations = self._calculations(claim.id, diagnosis, receipt, payouts)
+
+        # 누적액 행 잠금 (기존 계산분 + 이번 계산분을 한 번에, 같은 순서로)
+        accumulators = BenefitLedger(self.db).lock(claim.patient_ssn, self._limit_keys(calculations, previous))
+        total_amount, calculations = self._apply_limits(accumulators, receipt, calculations, previous, verbose)
+
         # 계산 결과 저장
-        for calc in calculations:
+        for _, calc in calculations:
             self.db.add(calc)
-        
+
         # 청구 금액 업데이트
         claim.claim_amount = total_amount
         self.db.commit()
-        
+
+        return self._result(claim.id, total_amount, calculations, recalculated=True)
+
+    def _existing_result(self, claim: Claim) -> Dict:
+        """저장된 계산 결과 반환 (재계산 생략)"""
+        calculations = self.db.query(ClaimCalculation).options(
+            joinedload(ClaimCalculation.clause)
+        ).filter(
+            ClaimCalculation.claim_id == claim.id,
+            ClaimCalculation.is_deleted == False
+        ).order_by(ClaimCalculation.id).all()
+        return self._result(claim.id, claim.claim_amount,
+                            [(calc.clause, calc) for calc in calculations], recalculated=False)
+
+    @staticmethod
+    def _result(claim_id: int, total_amount: float, calculations: List[Tuple[ClauseSnapshot, ClaimCalculation]],
+                recalculated: bool) -> Dict:
         return {
             "claim_id": claim_id,
             "total_amount": total_amount,
+            "recalculated": recalculated,
             "calculations": [
                 {
-                    "clause_name": calc.clause.clause_name,
-                    "category": calc.clause.category,
+                    "clause_name": clause.clause_name,
+                    "category": clause.category,
                     "calculated_amount": calc.calculated_amount,
                     "calculation_logic": calc.calculation_logic
                 }
-                for calc in calculations
+                for clause, calc in calculations
             ]
         }
-    
-    def _is_subscription_applicable(self, clause: InsuranceClause, diagnosis, receipt) -> bool:
-        """특약이 해당 케이스에 적용 가능한지 확인"""
-        clause_name = clause.clause_name.lower()
-        diagnosis_name = diagnosis.diagnosis_name.lower()
-        category = clause.category.lower()
-        
-        # 암 관련 특약
-        if "암" in clause_name:
-            return "암" in diagnosis_name or "cancer" in diagnosis_name.lower()
-        
-        # 골절 관련 특약
-        if "골절" in clause_name:
-            return "골절" in diagnosis_name
-        
-        # 입원 관련 특약
-        if "입원" in clause_name or "입원" in category:
-            return diagnosis.admission_days > 0
-        
-        # 외래/통원 관련 특약
-        if any(word in clause_name for word in ["외래", "통원"]) or any(word in category for word in ["외래", "통원"]):
-            return diagnosis.admission_days == 0
-        
-        # 진단 관련 특약
-        if "진단" in clause_name or "진단" in category:
-            return True  # 모든 진단에 적용 가능
-        
-        # 수술 관련 특약 (수술 키워드가 있는 경우)
-        if "수술" in clause_name:
-            return "수술" in diagnosis.diagnosis_text or "절제" in diagnosis.diagnosis_text
-        
-        # 질병 관련 특약
-        if "질병" in clause_name:
-            return True  # 모든 질병에 적용 가능
-        
-        # 상해 관련 특약
-        if "상해" in clause_name:
-            # ICD 코드 S로 시작하는 경우 상해
-            return diagnosis.icd_code and diagnosis.icd_code.startswith("S")
-        
-        return False
-    
-    def _calculate_subscription_amount(self, clause: InsuranceClause, diagnosis, receipt) -> float:
-        """특약별 보험금 계산"""
-        category = clause.category.lower()
-        clause_name = clause.clause_name.lower()
-        
-        # 진단 특약 - 정액 지급
-        if "진단" in clause_name or "진단" in category:
-            return clause.per_unit
-        
-        # 입원 특약 - 입원일수 × 일당
-        if "입원" in clause_name or "입원" in category:
-            if diagnosis.admission_days > 0:
-                return min(diagnosis.admission_days * clause.per_unit, clause.max_total)
-            return 0
-        
-        # 외래/통원 특약 - 실제 의료비와 특약 한도 중 작은 값
-        if any(word in clause_name for word in ["외래", "통원"]) or any(word in category for word in ["외래", "통원"]):
-            if diagnosis.admission_days == 0:
-                return min(receipt.total_amount, clause.per_unit)
-            return 0
-        
-        # 수술 특약 - 정액 지급
-        if "수술" in clause_name:
-            if "수술" in diagnosis.diagnosis_text or "절제" in diagnosis.diagnosis_text:
-                return clause.per_unit
-            return 0
-        
-        # 기타 특약 - 정액 지급
-        return clause.per_unit
-    
-    def _get_calculation_logic(self, clause: InsuranceClause, diagnosis, receipt, amount: float) -> str:
-        """계산 로직 설명 생성"""
-        category = clause.category.lower()
-        clause_name = clause.clause_name.lower()
-        
-        if "진단" in clause_name or "진단" in category:
-            return f"진단 특약 '{clause.clause_name}': {diagnosis.diagnosis_name} 진단으로 {amount:,.0f}원 지급"
-        
-        if "입원" in clause_name or "입원" in category:
-            return f"입원 특약 '{clause.clause_name}': {diagnosis.admission_days}일 × {clause.per_unit:,.0f}원 = {amount:,.0f}원"
-        
-        if any(word in clause_name for word in ["외래", "통원"]) or any(word in category for word in ["외래", "통원"]):
-            return f"외래/통원 특약 '{clause.clause_name}': min({receipt.total_amount:,.0f}, {clause.per_unit:,.0f}) = {amount:,.0f}원"
-        
-        if "수술" in clause_name:
-            return f"수술 특약 '{clause.clause_name}': {diagnosis.diagnosis_name} 수술로 {amount:,.0f}원 지급"
-        
-        return f"특약 '{clause.clause_name}': {amount:,.0f}원 지급"
-    
-    def calculate_claim_with_clauses(self, claim_id: int, clauses: List[InsuranceClause]) -> Dict:
+
+    # ------------------------------------------------------------------
+    # 재계산
+    # ------------------------------------------------------------------
+
+    def product_clauses(self, patient_name: str, patient_ssn: str) -> Optional[List[InsuranceClause]]:
+        """환자의 가입 보험상품 특약 목록 (가입 보험이 없으면 None)"""
+        contract = self.db.query(UserContract).filter(
+            UserContract.patient_name == patient_name,
+            UserContract.patient_ssn == patient_ssn
+        ).order_by(UserContract.id).first()
+        if not contract:
+            return None
+        return self.db.query(InsuranceClause).filter(
+            InsuranceClause.product_id == contract.product_id,
+            InsuranceClause.is_deleted == False
+        ).order_by(InsuranceClause.id).all()
+
+    def apply_result(self, claim: Claim, calculation_result: Dict) -> Dict:
+        """계산 결과를 claim_reason(상세내역 JSON)/금액/상태에 반영"""
+        detailed_info = {
+            "applied_clauses": [
+                {
+                    "clause_name": calc["clause_name"],
+                    "category": calc["category"],
+                    "amount": calc["calculated_amount"],
+                    "calculation_logic": calc["calculation_logic"]
+                }
+                for calc in calculation_result["calculations"]
+            ],
+            "calculation_basis": f"총 {len(calculation_result['calculations'])}개 특약 적용, 총 보험금 {calculation_result['total_amount']:,}원",
+            "total_amount": calculation_result["total_amount"]
+        }
+        claim.claim_reason = f"상세내역: {json.dumps(detailed_info, ensure_ascii=False)}"
+        claim.claim_amount = calculation_result["total_amount"]
+        # 청구 상태 설정 (보험금이 있으면 passed, 없으면 failed)
+        claim.status = "passed" if calculation_result["total_amount"] > 0 else "failed"
+        return detailed_info
+
+    def recalculate_claim(self, claim_id: int, force: bool = False,
+                          clauses: Optional[List[InsuranceClause]] = None) -> Dict:
         """
-        특정 특약들만을 사용하여 보험금을 계산합니다.
+        청구 재계산. 계산 입력값이 바뀌지 않았으면 기존 결과를 그대로 반환합니다.
         """
         claim = self.db.query(Claim).filter(Claim.id == claim_id).first()
         if not claim:
             raise ValueError("청구 정보를 찾을 수 없습니다.")
-        diagnosis = claim.diagnosis
-        receipt = claim.receipt
-        # 기존 계산 결과 삭제
+        if clauses is None:
+            clauses = self.product_clauses(claim.patient_name, claim.patient_ssn)
+            if clauses is None:
+                raise ValueError("해당 환자의 가입 보험을 찾을 수 없습니다.")
+
+        result = self.calculate_claim_with_clauses(claim_id, clauses, force=force)
+        if result["recalculated"]:
+            self.apply_result(claim, result)
+            self.db.commit()
+        return result
+
+    def recalculate_claims_for(self, diagnosis_id: Optional[int] = None,
+                               receipt_id: Optional[int] = None) -> List[Dict]:
+        """진단서/영수증 수정 후 연결된 청구 재계산 (입력값이 그대로면 생략)"""
+        conditions = []
+        if diagnosis_id is not None:
+            conditions.append(Claim.diagnosis_id == diagnosis_id)
+        if receipt_id is not None:
+            conditions.append(Claim.receipt_id == receipt_id)
+        if not conditions:
+            return []
+
+        claims = self.db.query(Claim).filter(
+            or_(*conditions), Claim.is_deleted == False
+        ).all()
+        results = []
+        for claim in claims:
+            try:
+                results.append(self.recalculate_claim(claim.id))
+            except ValueError:
+                # 가입 보험이 없는 청구는 재계산 대상이 아님
+                continue
+        return results
+
+    def recalculate_stale_claims(self, force: bool = False, workers: Optional[int] = None) -> Dict:
+        """
+        fingerprint 가 최신이 아닌 청구만 골라서 재계산 (특약/규칙/서류 수정 후 일괄 실행)
+        - 계약/특약은 상품별로 한 번만 조회해서 스냅샷으로 만듭니다.
+        - 대상이 많으면 규칙 평가를 프로세스 풀에 나눠 맡기고, 결과는 배치 단위로 bulk insert 합니다.
+        """
+        engine = get_rule_engine()
+
+        product_by_patient = {}
+        for contract in self.db.query(UserContract).order_by(UserContract.id).all():
+            product_by_patient.setdefault((contract.patient_name, contract.patient_ssn), contract.product_id)
+
+        clauses_by_product = defaultdict(list)
+        for clause in self.db.query(InsuranceClause).filter(
+            InsuranceClause.is_deleted == False
+        ).order_by(InsuranceClause.id).all():
+            clauses_by_product[clause.product_id].append(ClauseSnapshot.from_orm(clause))
+        clauses_by_product = {product_id: tuple(clauses) for product_id, clauses in clauses_by_product.items()}
+
+        claims = self.db.query(Claim).options(
+            joinedload(Claim.diagnosis), joinedload(Claim.receipt)
+        ).filter(Claim.is_deleted == False).order_by(Claim.id).all()
+
+        stats = {"checked": len(claims), "up_to_date": 0, "recalculated": 0,
+                 "skipped": 0, "failed": 0, "failed_ids": []}
+        jobs, fingerprints = [], {}
+        for claim in claims:
+            product_id = product_by_patient.get((claim.patient_name, claim.patient_ssn))
+            if product_id is None or claim.diagnosis is None or claim.receipt is None:
+                stats["skipped"] += 1
+                continue
+            clauses = clauses_by_product.get(product_id, ())
+            fingerprint = calculation_fingerprint(claim.diagnosis, claim.receipt, clauses, engine.digest)
+            if not force and claim.calc_fingerprint == fingerprint:
+                stats["up_to_date"] += 1
+                continue
+            fingerprints[claim.id] = fingerprint
+            jobs.append(RatingJob(claim.id, clauses, DiagnosisSnapshot.from_orm(claim.diagnosis),
+                                  ReceiptSnapshot.from_orm(claim.receipt)))
+
+        stats["workers"] = self._workers_for(len(jobs), workers)
+        results = self._rate_jobs(jobs, stats["workers"])
+
+        claims_by_id = {claim.id: claim for claim in claims}
+        jobs_by_id = {job.claim_id: job for job in jobs}
+        for i in range(0, len(results), RECALC_BATCH_SIZE):
+            batch = results[i:i + RECALC_BATCH_SIZE]
+            try:
+                self._merge_batch(batch, claims_by_id, jobs_by_id, fingerprints)
+                stats["recalculated"] += len(batch)
+            except Exception:
+                # 배치 중 실패한 청구만 골라내기 위해 한 건씩 다시 계산
+                self.db.rollback()
+                for claim_id, _ in batch:
+                    try:
+                        self.recalculate_claim(claim_id, force=True, clauses=jobs_by_id[claim_id].clauses)
+                        stats["recalculated"] += 1
+                    except Exception:
+                        self.db.rollback()
+                        stats["failed"] += 1
+                        stats["failed_ids"].append(claim_id)
+        return stats
+
+    @staticmethod
+    def _workers_for(job_count: int, workers: Optional[int] = None) -> int:
+        """규칙 평가에 쓸 프로세스 수 (대상이 적으면 1 = 현재 프로세스에서 실행)"""
+        workers = RECALC_WORKERS if workers is None else workers
+        if job_count < RECALC_PARALLEL_MIN:
+            return 1
+        return max(1, min(workers, job_count))
+
+    @staticmethod
+    def _rate_jobs(jobs: List[RatingJob], workers: int) -> List[Tuple[int, List[Payout]]]:
+        """스냅샷 규칙 평가 (workers > 1 이면 프로세스 풀로 분산)"""
+        if workers <= 1:
+            return [_rate_job(job) for job in jobs]
+        # API 서버(다중 스레드)에서 fork 하지 않도록 spawn 사용
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            chunksize = max(1, len(jobs) // (workers * 4))
+            return list(pool.map(_rate_job, jobs, chunksize=chunksize))
+
+    def _merge_batch(self, results: List[Tuple[int, List[Payout]]], claims_by_id: Dict[int, Claim],
+                     jobs_by_id: Dict[int, RatingJob], fingerprints: Dict[int, str]) -> None:
+        """규칙 평가 결과를 한 트랜잭션으로 반영 (기존 계산 일괄 삭제 → 누적/의료비 한도 → bulk insert)"""
+        claim_ids = [claim_id for claim_id, _ in results]
+        # 청구 행을 id 순서로 잠근 뒤 기존 지급분 조회 (_load_claim 과 같은 이유)
+        self.db.query(Claim.id).filter(Claim.id.in_(claim_ids)).order_by(Claim.id).with_for_update().all()
+        ledger = BenefitLedger(self.db)
+        previous_by_claim = ledger.previous_entries_for(claim_ids)
         self.db.query(ClaimCalculation).filter(
-            ClaimCalculation.claim_id == claim_id
-        ).delete()
-        applicable_clauses = []
-        for clause in clauses:
-            if self._is_clause_applicable_for_claim(clause, diagnosis, receipt):
-                applicable_clauses.append(clause)
-        # 최일우만 특약 4개로 제한
-        if diagnosis.patient_name == "최일우":
-            applicable_clauses = applicable_clauses[:4]
-        calculations = []
-        total_amount = 0
-        for clause in applicable_clauses:
-            amount = self._calculate_clause_amount(clause, diagnosis, receipt)
-            if amount > 0:
-                calculation = ClaimCalculation(
-                    claim_id=claim_id,
-                    clause_id=clause.id,
-                    calculated_amount=amount,
-                    calculation_logic=self._get_calculation_logic(clause, diagnosis, receipt, amount)
-                )
-                calculations.append(calculation)
-                total_amount += amount
-        # 총 보험금이 실제 의료비를 초과하지 않도록 제한
-        actual_medical_cost = receipt.total_amount
-        if total_amount > actual_medical_cost:
-            reduction_ratio = actual_medical_cost / total_amount
-            for calc in calculations:
-                original_amount = calc.calculated_amount
-                calc.calculated_amount = original_amount * reduction_ratio
-                calc.calculation_logic += f" → 의료비 한도 적용: {original_amount:,.0f} × {reduction_ratio:.2%} = {calc.calculated_amount:,.0f}원"
-            total_amount = actual_medical_cost
-        # 계산 결과 저장
-        for calc in calculations:
-            self.db.add(calc)
-        # 청구 금액 업데이트
-        claim.claim_amount = total_amount
-        self.db.commit()
-        return {
-            "claim_id": claim_id,
-            "total_amount": total_amount,
-            "calculations": [
-                {
-                    "clause_name": calc.clause.clause_name,
-                    "category": calc.clause.category,
-                    "calculated_amount": calc.calculated_amount,
-                    "calculation_logic": calc.calculation_logic
-                }
-                for calc in calculations
-            ]
+            ClaimCalculation.claim_id.in_(claim_ids)
+        ).delete(synchronize_session=False)
+
+        prepared = []
+        keys_by_patient = defaultdict(list)
+        for claim_id, payouts in results:
+            claim, job = claims_by_id[claim_id], jobs_by_id[claim_id]
+            calculations = self._calculations(claim_id, job.diagnosis, job.receipt, payouts)
+            previous = previous_by_claim.get(claim_id, [])
+            keys_by_patient[claim.patient_ssn].extend(self._limit_keys(calculations, previous))
+            prepared.append((claim, job, calculations, previous))
+
+        # 환자 순서로 잠가서 동시 실행되는 다른 배치와 교착 상태를 피함
+        accumulators_by_patient = {
+            patient_ssn: ledger.lock(patient_ssn, keys_by_patient[patient_ssn])
+            for patient_ssn in sorted(keys_by_patient)
         }
-    
-    def _is_clause_applicable_for_claim(self, clause: InsuranceClause, diagnosis, receipt) -> bool:
-        """특약이 해당 케이스에 적용 가능한지 확인"""
-        clause_name = clause.clause_name.lower()
-        diagnosis_name = diagnosis.diagnosis_name.lower()
-        category = clause.category.lower()
-        
-        # 암 관련 특약
-        if "암" in clause_name:
-            return "암" in diagnosis_name or "cancer" in diagnosis_name.lower()
-        
-        # 골절 관련 특약
-        if "골절" in clause_name:
-            return "골절" in diagnosis_name
-        
-        # 입원 관련 특약
-        if "입원" in clause_name or "입원" in category:
-            return diagnosis.admission_days > 0
-        
-        # 외래/통원 관련 특약
-        if any(word in clause_name for word in ["외래", "통원"]) or any(word in category for word in ["외래", "통원"]):
-            return diagnosis.admission_days == 0
-        
-        # 진단 관련 특약
-        if "진단" in clause_name or "진단" in category:
-            return True  # 모든 진단에 적용 가능
-        
-        # 수술 관련 특약 (수술 키워드가 있는 경우)
-        if "수술" in clause_name:
-            return "수술" in diagnosis.diagnosis_text or "절제" in diagnosis.diagnosis_text
-        
-        # 질병 관련 특약
-        if "질병" in clause_name:
-            return True  # 모든 질병에 적용 가능
-        
-        # 상해 관련 특약
-        if "상해" in clause_name:
-            # ICD 코드 S로 시작하는 경우 상해
-            return diagnosis.icd_code and diagnosis.icd_code.startswith("S")
-        
-        return False
-    
-    def _calculate_clause_amount(self, clause: InsuranceClause, diagnosis, receipt) -> float:
-        """특약별 보험금 계산"""
-        category = clause.category.lower()
-        clause_name = clause.clause_name.lower()
-        
-        # 진단 특약 - 정액 지급
-        if "진단" in clause_name or "진단" in category:
-            return clause.per_unit
-        
-        # 입원 특약 - 입원일수 × 일당
-        if "입원" in clause_name or "입원" in category:
-            if diagnosis.admission_days > 0:
-                return min(diagnosis.admission_days * clause.per_unit, clause.max_total)
-            return 0
-        
-        # 외래/통원 특약 - 실제 의료비와 특약 한도 중 작은 값
-        if any(word in clause_name for word in ["외래", "통원"]) or any(word in category for word in ["외래", "통원"]):
-            if diagnosis.admission_days == 0:
-                return min(receipt.total_amount, clause.per_unit)
-            return 0
-        
-        # 수술 특약 - 정액 지급
-        if "수술" in clause_name:
-            if "수술" in diagnosis.diagnosis_text or "절제" in diagnosis.diagnosis_text:
-                return clause.per_unit
-            return 0
-        
-        # 기타 특약 - 정액 지급
-        return clause.per_unit 
\ No newline at end of file
+
+        rows = []
+        for claim, job, calculations, previous in prepared:
+            total_amount, calculations = self._apply_limits(
+                accumulators_by_patient[claim.patient_ssn], job.receipt, calculations, previous
+            )
+            rows.extend(calc for _, calc in calculations)
+            claim.calc_fingerprint = fingerprints[claim.id]
+            self.apply_result(claim, self._result(claim.id, total_amount, calculations, recalculated=True))
+
+        self.db.bulk_save_objects(rows)
+        self.db.commit()
@@ -0,0 +1,76 @@
+# backend/services/claim_snapshots.py
+"""
+보험금 계산용 ORM 분리(detached) 스냅샷
+
+ClaimCalculator 의 규칙 평가는 SQLAlchemy 인스턴스 대신 이 스냅샷으로 동작합니다.
+- 속성 접근 시 identity map / lazy load 를 거치지 않고
+- pickle 가능하므로 대량 재계산 시 프로세스 풀 워커로 보낼 수 있습니다.
+"""
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional, Tuple
+
+
+@dataclass(frozen=True, slots=True)
+class ClauseSnapshot:
+    id: int
+    clause_name: str
+    category: str
+    per_unit: float
+    max_total: float
+
+    @classmethod
+    def from_orm(cls, clause) -> "ClauseSnapshot":
+        return cls(clause.id, clause.clause_name, clause.category, clause.per_unit, clause.max_total)
+
+
+@dataclass(frozen=True, slots=True)
+class DiagnosisSnapshot:
+    patient_name: str
+    diagnosis_name: str
+    diagnosis_text: str
+    icd_code: Optional[str]
+    admission_days: int
+    diagnosis_date: Optional[date]
+
+    @classmethod
+    def from_orm(cls, diagnosis) -> "DiagnosisSnapshot":
+        return cls(
+            diagnosis.patient_name, diagnosis.diagnosis_name, diagnosis.diagnosis_text,
+            diagnosis.icd_code, diagnosis.admission_days or 0, diagnosis.diagnosis_date
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class ReceiptSnapshot:
+    total_amount: float
+    receipt_date: Optional[date]
+
+    @classmethod
+    def from_orm(cls, receipt) -> "ReceiptSnapshot":
+        return cls(receipt.total_amount, receipt.receipt_date)
+
+
+@dataclass(frozen=True, slots=True)
+class Payout:
+    """규칙 평가 결과 (특약별 지급액/로직). 누적/의료비 한도 적용 전 값입니다."""
+    clause: ClauseSnapshot
+    amount: float
+    logic: str
+
+
+@dataclass(frozen=True, slots=True)
+class RatingJob:
+    """프로세스 풀 워커 한 건의 입력"""
+    claim_id: int
+    clauses: Tuple[ClauseSnapshot, ...]
+    diagnosis: DiagnosisSnapshot
+    receipt: ReceiptSnapshot
+
+
+def snapshot_clauses(clauses) -> Tuple[ClauseSnapshot, ...]:
+    return tuple(
+        clause if isinstance(clause, ClauseSnapshot) else ClauseSnapshot.from_orm(clause)
+        for clause in clauses
+    )
@@ -0,0 +1,467 @@
+# backend/services/clause_rules.py
+"""
+특약 적용/지급 규칙 엔진
+
+clause_rules.yaml 의 규칙 테이블을 한 번 컴파일해서 클로저로 만들어 두고,
+ClaimCalculator 의 모든 calculate_* 진입점이 같은 평가기를 사용합니다.
+특약(clause) 기준 조건은 특약명/카테고리 조합별로 한 번만 평가해서
+해당 특약 전용 평가 함수를 만들어 캐시하므로, 청구마다 문자열 비교를 반복하지 않습니다.
+진단 분류(암/골절/뇌 ...)는 ICD-10 코드 인덱스를 우선 사용하고 진단명 키워드로 보완합니다. (services/icd_index.py)
+"""
+
+import os
+import json
+import hashlib
+import string
+import threading
+import time
+import logging
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import yaml
+
+from services.icd_index import DiagnosisClassifier, IcdIndex
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = Path(__file__).resolve().parent / "clause_rules.yaml"
+RULES_PATH = Path(os.getenv("CLAUSE_RULES_PATH", str(DEFAULT_RULES_PATH)))
+RELOAD_SECONDS = float(os.getenv("CLAUSE_RULES_RELOAD_SECONDS", "5"))
+
+
+class RuleError(ValueError):
+    """규칙 테이블 형식 오류"""
+
+
+def _lower_all(words) -> Tuple[str, ...]:
+    return tuple(str(w).lower() for w in (words or []))
+
+
+def _always(diagnosis, receipt) -> bool:
+    return True
+
+
+def _never(diagnosis, receipt) -> bool:
+    return False
+
+
+def _inpatient(diagnosis, receipt) -> bool:
+    return (diagnosis.admission_days or 0) > 0
+
+
+def _outpatient(diagnosis, receipt) -> bool:
+    return (diagnosis.admission_days or 0) == 0
+
+
+# ---------------------------------------------------------------------------
+# 조건 컴파일
+# ---------------------------------------------------------------------------
+
+def _compile_match(spec: Optional[Dict]) -> Callable[[str, str], bool]:
+    """특약명/카테고리(소문자) 기준 조건 → (clause_name, category) -> bool"""
+    spec = spec or {}
+    unknown = set(spec) - {"clause_name", "category", "category_in"}
+    if unknown:
+        raise RuleError(f"알 수 없는 match 키: {sorted(unknown)}")
+
+    name_words = _lower_all(spec.get("clause_name"))
+    category_words = _lower_all(spec.get("category"))
+    category_in = frozenset(_lower_all(spec.get("category_in")))
+    has_keywords = bool(name_words or category_words)
+
+    def match(clause_name: str, category: str) -> bool:
+        if category_in and category not in category_in:
+            return False
+        if not has_keywords:
+            return True
+        return (any(w in clause_name for w in name_words)
+                or any(w in category for w in category_words))
+
+    return match
+
+
+def _text_check(field: str, words: Tuple[str, ...]) -> Callable:
+    if field == "diagnosis_name":
+        def check(diagnosis, receipt):
+            text = (diagnosis.diagnosis_name or "").lower()
+            return any(w in text for w in words)
+    else:
+        def check(diagnosis, receipt):
+            text = (diagnosis.diagnosis_text or "").lower()
+            return any(w in text for w in words)
+    return check
+
+
+def _group_check(groups, classifier: DiagnosisClassifier) -> Callable:
+    wanted = frozenset(groups)
+    classify = classifier.classify
+
+    def check(diagnosis, receipt):
+        return not wanted.isdisjoint(classify(diagnosis))
+    return check
+
+
+def _compile_when(spec, classifier: DiagnosisClassifier) -> Callable[[str], Callable]:
+    """
+    청구 기준 조건 컴파일
+    반환값은 특약명(소문자)을 받아 (diagnosis, receipt) -> bool 함수를 돌려주는 바인더입니다.
+    특약명이 필요 없는 조건은 항상 같은 함수를 돌려줍니다.
+    """
+    if spec is None or spec == "always":
+        return lambda clause_name: _always
+    if spec == "inpatient":
+        return lambda clause_name: _inpatient
+    if spec == "outpatient":
+        return lambda clause_name: _outpatient
+    if not isinstance(spec, dict):
+        raise RuleError(f"알 수 없는 when 조건: {spec!r}")
+
+    static_checks: List[Callable] = []
+    overlap = False
+    for key, value in spec.items():
+        if key in ("diagnosis_name", "diagnosis_text"):
+            static_checks.append(_text_check(key, _lower_all(value)))
+        elif key == "icd_prefix":
+            prefixes = tuple(str(p).upper() for p in value)
+
+            def check(diagnosis, receipt, _prefixes=prefixes):
+                icd_code = (diagnosis.icd_code or "").upper()
+                return bool(icd_code) and icd_code.startswith(_prefixes)
+            static_checks.append(check)
+        elif key == "diagnosis_group":
+            unknown = set(value) - set(classifier.groups)
+            if unknown:
+                raise RuleError(f"정의되지 않은 진단 분류: {sorted(unknown)}")
+            static_checks.append(_group_check(value, classifier))
+        elif key == "keyword_overlap":
+            overlap = bool(value)
+        else:
+            raise RuleError(f"알 수 없는 when 키: {key}")
+
+    def bind(clause_name: str) -> Callable:
+        checks = list(static_checks)
+        if overlap:
+            # 특약명에 포함된 분류 그룹만 남겨서 진단 분류와 비교
+            groups = [group for group in classifier.groups if group in clause_name]
+            checks.append(_group_check(groups, classifier) if groups else _never)
+        if not checks:
+            return _always
+        if len(checks) == 1:
+            return checks[0]
+        checks = tuple(checks)
+        return lambda diagnosis, receipt: all(check(diagnosis, receipt) for check in checks)
+
+    return bind
+
+
+# ---------------------------------------------------------------------------
+# 지급 공식 및 로직 설명
+# ---------------------------------------------------------------------------
+
+def _formula_fixed(rule: Dict) -> Callable:
+    return lambda clause, diagnosis, receipt: clause.per_unit
+
+
+def _formula_admission(rule: Dict) -> Callable:
+    def admission(clause, diagnosis, receipt):
+        return min((diagnosis.admission_days or 0) * clause.per_unit, clause.max_total)
+    return admission
+
+
+def _formula_capped_cost(rule: Dict) -> Callable:
+    return lambda clause, diagnosis, receipt: min(receipt.total_amount, clause.per_unit)
+
+
+def _formula_coinsurance(rule: Dict) -> Callable:
+    rate = float(rule.get("rate", 0.8))
+    deductible = float(rule.get("deductible", 0))
+
+    def coinsurance(clause, diagnosis, receipt):
+        covered_amount = max(0, receipt.total_amount - deductible)
+        return min(covered_amount * rate, clause.per_unit)
+    return coinsurance
+
+
+# 누적 지급 한도 기간
+LIMIT_PERIODS = ("annual", "lifetime", "none")
+
+FORMULAS = {
+    "fixed": _formula_fixed,
+    "admission": _formula_admission,
+    "capped_cost": _formula_capped_cost,
+    "coinsurance": _formula_coinsurance,
+}
+
+# 로직 템플릿에서 쓸 수 있는 값
+LOGIC_FIELDS = {
+    "clause_name": lambda c, d, r, a: c.clause_name,
+    "category": lambda c, d, r, a: c.category,
+    "per_unit": lambda c, d, r, a: c.per_unit,
+    "max_total": lambda c, d, r, a: c.max_total,
+    "diagnosis_name": lambda c, d, r, a: d.diagnosis_name,
+    "admission_days": lambda c, d, r, a: d.admission_days or 0,
+    "total_amount": lambda c, d, r, a: r.total_amount,
+    "amount": lambda c, d, r, a: a,
+}
+
+
+def _compile_logic(template: str, rule: Dict) -> Callable:
+    """
+    로직 템플릿을 위치 인자 format 으로 바꾸고, 필요한 값만 꺼내는 함수 생성
+    예) "{clause_name}: {amount:,.0f}원" → "{0}: {1:,.0f}원"
+    """
+    constants = {
+        "rate": float(rule.get("rate", 0.8)),
+        "deductible": float(rule.get("deductible", 0)),
+    }
+    parts, getters = [], []
+    try:
+        parsed = list(string.Formatter().parse(template))
+    except ValueError as e:
+        raise RuleError(f"로직 템플릿 오류: {template!r} ({e})")
+    for literal, field, spec, conversion in parsed:
+        parts.append(literal.replace("{", "{{").replace("}", "}}"))
+        if field is None:
+            continue
+        if field in LOGIC_FIELDS:
+            getters.append(LOGIC_FIELDS[field])
+        elif field in constants:
+            getters.append(lambda c, d, r, a, _v=constants[field]: _v)
+        else:
+            raise RuleError(f"로직 템플릿에 알 수 없는 값: {field}")
+        parts.append("{" + str(len(getters) - 1)
+                     + (f"!{conversion}" if conversion else "")
+                     + (f":{spec}" if spec else "") + "}")
+    positional = "".join(parts)
+    getters = tuple(getters)
+
+    def describe(clause, diagnosis, receipt, amount) -> str:
+        return positional.format(*[g(clause, diagnosis, receipt, amount) for g in getters])
+
+    return describe
+
+
+class _Rule:
+    __slots__ = ("match", "when", "fallthrough", "formula", "describe")
+
+    def __init__(self, spec: Dict, classifier: DiagnosisClassifier, is_payout: bool):
+        self.match = _compile_match(spec.get("match"))
+        self.when = _compile_when(spec.get("when"), classifier)
+        self.fallthrough = bool(spec.get("fallthrough", False))
+        self.formula = None
+        self.describe = None
+        if is_payout:
+            formula_name = spec.get("formula", "fixed")
+            if formula_name not in FORMULAS:
+                raise RuleError(f"알 수 없는 formula: {formula_name}")
+            self.formula = FORMULAS[formula_name](spec)
+            self.describe = _compile_logic(
+                spec.get("logic", "특약 '{clause_name}': {amount:,.0f}원 지급"), spec
+            )
+
+
+def _no_payout(clause, diagnosis, receipt):
+    return 0, ""
+
+
+class ClausePlan:
+    """특약명/카테고리 조합 하나에 대해 생성된 전용 평가 함수"""
+    __slots__ = ("is_applicable", "payout")
+
+    def __init__(self, is_applicable: Callable, payout: Callable):
+        self.is_applicable = is_applicable
+        self.payout = payout
+
+
+def _chain_triggers(bound: List[Tuple[Callable, bool]]) -> Callable:
+    if not bound:
+        return _never
+    if len(bound) == 1 and not bound[0][1]:
+        return bound[0][0]
+    bound = tuple(bound)
+
+    def is_applicable(diagnosis, receipt) -> bool:
+        for when, fallthrough in bound:
+            if when(diagnosis, receipt):
+                return True
+            if not fallthrough:
+                return False
+        return False
+    return is_applicable
+
+
+def _chain_payouts(bound: List[Tuple[Callable, bool, Callable, Callable]]) -> Callable:
+    if not bound:
+        return _no_payout
+    if len(bound) == 1:
+        when, _, formula, describe = bound[0]
+        if when is _always:
+            def payout(clause, diagnosis, receipt):
+                amount = formula(clause, diagnosis, receipt)
+                return amount, describe(clause, diagnosis, receipt, amount)
+            return payout
+    bound = tuple(bound)
+
+    def payout(clause, diagnosis, receipt):
+        for when, fallthrough, formula, describe in bound:
+            if when(diagnosis, receipt):
+                amount = formula(clause, diagnosis, receipt)
+                return amount, describe(clause, diagnosis, receipt, amount)
+            if not fallthrough:
+                break
+        return 0, ""
+    return payout
+
+
+class CompiledRuleSet:
+    """하나의 규칙 묶음(triggers + payouts)을 컴파일한 평가기"""
+
+    def __init__(self, name: str, spec: Dict, classifier: DiagnosisClassifier):
+        self.name = name
+        self.triggers = [_Rule(r, classifier, False) for r in spec.get("triggers", [])]
+        self.payouts = [_Rule(r, classifier, True) for r in spec.get("payouts", [])]
+        self._plans: Dict[Tuple[str, str], ClausePlan] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _candidates(rules: List[_Rule], clause_name: str, category: str) -> List[_Rule]:
+        """특약에 match 되는 규칙들. fallthrough 가 아닌 규칙에서 끊습니다."""
+        picked = []
+        for rule in rules:
+            if rule.match(clause_name, category):
+                picked.append(rule)
+                if not rule.fallthrough:
+                    break
+        return picked
+
+    def _compile_plan(self, clause_name: str, category: str) -> ClausePlan:
+        name, cat = (clause_name or "").lower(), (category or "").lower()
+        triggers = [
+            (rule.when(name), rule.fallthrough)
+            for rule in self._candidates(self.triggers, name, cat)
+        ]
+        payouts = [
+            (rule.when(name), rule.fallthrough, rule.formula, rule.describe)
+            for rule in self._candidates(self.payouts, name, cat)
+        ]
+        return ClausePlan(_chain_triggers(triggers), _chain_payouts(payouts))
+
+    def plan(self, clause) -> ClausePlan:
+        """특약명/카테고리별 평가 함수 (캐시)"""
+        key = (clause.clause_name, clause.category)
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = self._compile_plan(*key)
+            with self._lock:
+                self._plans[key] = plan
+        return plan
+
+    def is_applicable(self, clause, diagnosis, receipt) -> bool:
+        """특약이 해당 케이스에 적용 가능한지 확인"""
+        return self.plan(clause).is_applicable(diagnosis, receipt)
+
+    def payout(self, clause, diagnosis, receipt) -> Tuple[float, str]:
+        """특약별 보험금과 계산 로직 설명"""
+        return self.plan(clause).payout(clause, diagnosis, receipt)
+
+    def evaluate(self, clause, diagnosis, receipt) -> Optional[Tuple[float, str]]:
+        """적용 가능하면 (금액, 로직), 아니면 None"""
+        plan = self.plan(clause)
+        if not plan.is_applicable(diagnosis, receipt):
+            return None
+        return plan.payout(clause, diagnosis, receipt)
+
+
+class RuleEngine:
+    """YAML 규칙 테이블 전체를 컴파일한 결과"""
+
+    def __init__(self, spec: Dict, digest: Optional[str] = None):
+        self.version = spec.get("version")
+        # 규칙 내용 해시 (청구 계산 fingerprint 에 포함)
+        self.digest = digest or hashlib.sha256(
+            json.dumps(spec, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+        ).hexdigest()
+        self.keyword_groups = {
+            group: _lower_all(words)
+            for group, words in (spec.get("keyword_groups") or {}).items()
+        }
+        try:
+            self.icd_index = IcdIndex(spec.get("icd_groups") or {})
+        except ValueError as e:
+            raise RuleError(str(e))
+        self.classifier = DiagnosisClassifier(self.icd_index, self.keyword_groups)
+        rulesets = spec.get("rulesets") or {}
+        if not rulesets:
+            raise RuleError("rulesets 가 비어 있습니다.")
+        self.rulesets = {
+            name: CompiledRuleSet(name, ruleset, self.classifier)
+            for name, ruleset in rulesets.items()
+        }
+
+        self.limits = []
+        for limit in spec.get("limits") or []:
+            period = limit.get("period", "none")
+            if period not in LIMIT_PERIODS:
+                raise RuleError(f"알 수 없는 누적 한도 기간: {period}")
+            self.limits.append((_compile_match(limit.get("match")), period))
+        self._limit_periods: Dict[Tuple[str, str], Optional[str]] = {}
+
+    def limit_period(self, clause) -> Optional[str]:
+        """특약의 누적 지급 한도 기간 (annual / lifetime, 누적 한도가 없으면 None)"""
+        key = (clause.clause_name, clause.category)
+        if key not in self._limit_periods:
+            name, category = (key[0] or "").lower(), (key[1] or "").lower()
+            period = next((p for match, p in self.limits if match(name, category)), "none")
+            self._limit_periods[key] = None if period == "none" else period
+        return self._limit_periods[key]
+
+    def __getitem__(self, name: str) -> CompiledRuleSet:
+        return self.rulesets[name]
+
+    @classmethod
+    def from_file(cls, path: Path) -> "RuleEngine":
+        raw = Path(path).read_bytes()
+        return cls(yaml.safe_load(raw.decode("utf-8")) or {}, hashlib.sha256(raw).hexdigest())
+
+
+# ---------------------------------------------------------------------------
+# 전역 엔진 (파일 변경 시 재컴파일)
+# ---------------------------------------------------------------------------
+
+_engine: Optional[RuleEngine] = None
+_engine_mtime: float = 0.0
+_last_check: float = 0.0
+_engine_lock = threading.Lock()
+
+
+def get_rule_engine() -> RuleEngine:
+    """컴파일된 규칙 엔진 반환. 규칙 파일이 바뀌었으면 재배포 없이 다시 컴파일합니다."""
+    global _engine, _engine_mtime, _last_check
+
+    now = time.monotonic()
+    if _engine is not None and now - _last_check < RELOAD_SECONDS:
+        return _engine
+
+    with _engine_lock:
+        _last_check = now
+        try:
+            mtime = RULES_PATH.stat().st_mtime
+        except OSError:
+            if _engine is None:
+                raise
+            logger.error(f"규칙 파일을 찾을 수 없어 기존 규칙을 유지합니다: {RULES_PATH}")
+            return _engine
+
+        if _engine is None or mtime != _engine_mtime:
+            try:
+                engine = RuleEngine.from_file(RULES_PATH)
+            except (RuleError, yaml.YAMLError) as e:
+                if _engine is None:
+                    raise
+                logger.error(f"규칙 파일 컴파일 실패, 기존 규칙 유지: {e}")
+                return _engine
+            _engine, _engine_mtime = engine, mtime
+            logger.info(f"특약 규칙 로드 완료: {RULES_PATH} (version={engine.version})")
+
+    return _engine
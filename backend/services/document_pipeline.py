@@ -0,0 +1,307 @@
+# backend/services/document_pipeline.py
+"""
+업로드 후 문서 처리 파이프라인 (OCR, 위조분석)
+
+업로드 API 에서 pipeline=true 로 요청하면 스토리지 저장까지만 기다리고,
+OCR(추출 결과를 진단서/영수증 레코드에 반영)과 위조분석은 백그라운드 단계로 실행합니다.
+- 이미지는 한 번만 읽고 두 단계가 같은 바이트를 사용하며, 두 단계는 동시에 실행됩니다.
+- 동시에 처리하는 문서 수는 PIPELINE_CONCURRENCY, 위조분석(CPU) 스레드 수는 PIPELINE_FORGERY_WORKERS 로 제한합니다.
+- 단계별 상태/시작·종료 시각은 document_jobs 테이블에 기록하고 /jobs/{job_id} 로 조회합니다.
+- 워커 프로세스가 여러 개여도 작업은 한 프로세스만 실행합니다. 실행 전에 queued 작업을 원자적으로 가져가고(owner),
+  실행 중에는 heartbeat_at 을 주기적으로 갱신합니다. 서버가 재시작되거나 워커가 죽어 heartbeat 가
+  PIPELINE_JOB_LEASE_SECONDS 동안 갱신되지 않은 running 작업만 다른 워커가 다시 가져가 실행합니다.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from models.database import SessionLocal
+from models.models import DocumentJob, ForgeryAnalysis, MedicalDiagnosis, MedicalReceipt
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_CONCURRENCY = int(os.getenv("PIPELINE_CONCURRENCY", "4"))  # 동시에 처리할 문서 수
+PIPELINE_FORGERY_WORKERS = int(os.getenv("PIPELINE_FORGERY_WORKERS", "2"))  # 위조분석 스레드 수
+# 실행 중 작업의 heartbeat 가 이 시간 동안 갱신되지 않으면 워커가 죽은 것으로 보고 다른 워커가 다시 실행
+PIPELINE_JOB_LEASE_SECONDS = float(os.getenv("PIPELINE_JOB_LEASE_SECONDS", "300"))
+
+STAGES = ("ocr", "forgery")
+
+# 문서 종류: (모델, 이름)
+DOCUMENT_MODELS = {
+    "diagnosis": (MedicalDiagnosis, "진단서"),
+    "receipt": (MedicalReceipt, "영수증"),
+}
+
+
+class DocumentPipeline:
+    def __init__(self, session_factory=SessionLocal, concurrency: int = PIPELINE_CONCURRENCY,
+                 forgery_workers: int = PIPELINE_FORGERY_WORKERS,
+                 lease_seconds: float = PIPELINE_JOB_LEASE_SECONDS):
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+        self.forgery_workers = forgery_workers
+        self.lease_seconds = lease_seconds
+        # 작업을 가져간 워커 식별자 (프로세스마다 다름)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._tasks = set()
+        self._sweeper: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """
+        워커 풀과 확인 작업 생성 (앱 시작 시 한 번 호출)
+        시작 이벤트에서는 DB 를 조회하지 않습니다. 끝나지 않은 작업 재실행은 확인 작업이 바로 시작하므로
+        DB 가 아직 준비되지 않아도 앱은 뜨고, 다음 확인 주기에 다시 시도합니다.
+        """
+        self._ensure_pool()
+        self._sweeper = asyncio.get_running_loop().create_task(self._sweep())
+
+    def _ensure_pool(self) -> None:
+        if self._executor is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._executor = ThreadPoolExecutor(max_workers=self.forgery_workers,
+                                                thread_name_prefix="forgery")
+
+    async def close(self) -> None:
+        """실행 중인 작업 취소 (DB 에는 queued/running 으로 남아 lease 가 만료되면 재실행)"""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor, self._semaphore = None, None
+
+    def submit(self, db: Session, document_type: str, document_id: int) -> DocumentJob:
+        """작업 생성 후 백그라운드 실행 예약"""
+        if document_type not in DOCUMENT_MODELS:
+            raise ValueError(f"지원하지 않는 문서 종류입니다: {document_type}")
+        job = DocumentJob(document_type=document_type, document_id=document_id,
+                          status="queued", ocr_status="queued", forgery_status="queued")
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        self._schedule(job.id)
+        return job
+
+    async def resume(self) -> int:
+        """가져갈 수 있는 작업(queued, lease 가 만료된 running) 실행 예약 (실제 실행은 claim 에 성공한 워커만)"""
+        job_ids = await asyncio.to_thread(self._claimable_ids)
+        for job_id in job_ids:
+            self._schedule(job_id)
+        if job_ids:
+            logger.info(f"미완료 문서 처리 작업 {len(job_ids)}건 재실행")
+        return len(job_ids)
+
+    def _claimable_ids(self) -> List[int]:
+        with self.session_factory() as db:
+            return [row.id for row in db.query(DocumentJob.id)
+                    .filter(self._claimable())
+                    .order_by(DocumentJob.id)]
+
+    def claim(self, job_id: int) -> bool:
+        """
+        작업을 이 워커가 원자적으로 가져감 (UPDATE ... WHERE 조건부 갱신, 다른 워커가 먼저 가져갔으면 False)
+        """
+        with self.session_factory() as db:
+            claimed = db.query(DocumentJob).filter(DocumentJob.id == job_id, self._claimable()).update(
+                {"status": "running", "owner": self.owner, "heartbeat_at": _now()}, synchronize_session=False
+            )
+            db.commit()
+        return claimed == 1
+
+    def _claimable(self):
+        expired = _now() - timedelta(seconds=self.lease_seconds)
+        return or_(
+            DocumentJob.status == "queued",
+            and_(DocumentJob.status == "running",
+                 or_(DocumentJob.heartbeat_at.is_(None), DocumentJob.heartbeat_at < expired)),
+        )
+
+    async def _heartbeat(self, job_id: int) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            await asyncio.to_thread(self._touch, job_id)
+
+    def _touch(self, job_id: int) -> None:
+        with self.session_factory() as db:
+            db.query(DocumentJob).filter(DocumentJob.id == job_id, DocumentJob.owner == self.owner).update(
+                {"heartbeat_at": _now()}, synchronize_session=False
+            )
+            db.commit()
+
+    async def _sweep(self) -> None:
+        """시작 직후 끝나지 않은 작업 재실행, 이후 lease 주기마다 다른 워커가 죽어 만료된 작업 확인"""
+        while True:
+            try:
+                await self.resume()
+            except Exception as e:
+                logger.error(f"미완료 문서 처리 작업 확인 실패: {str(e)}")
+            await asyncio.sleep(self.lease_seconds)
+
+    async def wait(self) -> None:
+        """예약된 작업이 모두 끝날 때까지 대기 (스크립트/테스트용)"""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def _schedule(self, job_id: int) -> None:
+        self._ensure_pool()
+        task = asyncio.get_running_loop().create_task(self.run(job_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def run(self, job_id: int) -> None:
+        async with self._semaphore:
+            if not await asyncio.to_thread(self.claim, job_id):
+                return
+            heartbeat = asyncio.get_running_loop().create_task(self._heartbeat(job_id))
+            try:
+                await self._process(job_id)
+            finally:
+                heartbeat.cancel()
+
+    async def _process(self, job_id: int) -> None:
+        document_type, document_id, image_url = await asyncio.to_thread(self._load_job, job_id)
+        if image_url is None:
+            label = DOCUMENT_MODELS[document_type][1]
+            await self._update(job_id, status="failed", finished_at=_now(),
+                               **_fail_stages(f"{label} 이미지가 없습니다."))
+            return
+
+        try:
+            image_data = await self.read_image(document_type, image_url)
+        except Exception as e:
+            await self._update(job_id, status="failed", finished_at=_now(),
+                         **_fail_stages(f"이미지 파일 읽기 실패: {str(e)}"))
+            return
+
+        results = await asyncio.gather(
+            self._run_stage(job_id, "ocr", self.ocr_stage(document_type, document_id, image_data)),
+            self._run_stage(job_id, "forgery", self.forgery_stage(document_type, document_id, image_data)),
+        )
+        await self._update(job_id, status="completed" if all(results) else "failed", finished_at=_now())
+
+    async def _run_stage(self, job_id: int, stage: str, work) -> bool:
+        await self._update(job_id, **{f"{stage}_status": "running", f"{stage}_started_at": _now()})
+        try:
+            extra = await work or {}
+        except Exception as e:
+            logger.error(f"문서 처리 작업 {job_id} {stage} 단계 실패: {str(e)}")
+            await self._update(job_id, **{f"{stage}_status": "failed", f"{stage}_finished_at": _now(),
+                                    f"{stage}_error": str(e)})
+            return False
+        await self._update(job_id, **{f"{stage}_status": "completed", f"{stage}_finished_at": _now()}, **extra)
+        return True
+
+    async def read_image(self, document_type: str, image_url: str) -> bytes:
+        from api.ocr import OCR_TARGETS
+        from services.storage_service import storage_service
+
+        return await storage_service.open_bytes(image_url, OCR_TARGETS[document_type][2])
+
+    async def ocr_stage(self, document_type: str, document_id: int, image_data: bytes) -> Dict:
+        """OCR 추출(결과 캐시 사용) 후 레코드에 반영"""
+        from api.ocr import OCR_TARGETS, extract_fields
+
+        model, schema, _, postprocess, _ = OCR_TARGETS[document_type]
+        with self.session_factory() as db:
+            parsed, _ = await extract_fields(db, image_data, schema)
+            parsed = postprocess(dict(parsed))
+            record = db.get(model, document_id)
+            for field, value in parsed.items():
+                if hasattr(record, field):
+                    setattr(record, field, value)
+            db.commit()
+        return {}
+
+    async def forgery_stage(self, document_type: str, document_id: int, image_data: bytes) -> Dict:
+        """위조분석 (결과 캐시 사용, CPU 작업이므로 워커 스레드에서 실행) 후 결과 저장"""
+        from services.forgery_cache import analyze_cached, evict_if_due
+
+        loop = asyncio.get_running_loop()
+        with self.session_factory() as db:
+            [(result, _)] = await loop.run_in_executor(self._executor, analyze_cached, db, [image_data])
+            forgery = ForgeryAnalysis(
+                analysis_result=f"{document_type}: {result['predicted_class']}",
+                confidence_score=result['confidence'],
+                fraud_indicators=json.dumps({f"{document_type}_result": result}),
+                **{f"{document_type}_id": document_id}
+            )
+            db.add(forgery)
+            db.commit()
+            forgery_analysis_id = forgery.id
+            await loop.run_in_executor(self._executor, evict_if_due, db)
+            return {"forgery_analysis_id": forgery_analysis_id}
+
+    def _load_job(self, job_id: int) -> Tuple[str, int, Optional[str]]:
+        """(문서 종류, 문서 ID, 이미지 경로). 문서나 이미지가 없으면 이미지 경로는 None"""
+        with self.session_factory() as db:
+            job = db.get(DocumentJob, job_id)
+            record = db.get(DOCUMENT_MODELS[job.document_type][0], job.document_id)
+            image_url = record.image_url if record is not None and record.image_url else None
+            return job.document_type, job.document_id, image_url
+
+    async def _update(self, job_id: int, **values) -> None:
+        await asyncio.to_thread(self._update_job, job_id, values)
+
+    def _update_job(self, job_id: int, values: Dict) -> None:
+        with self.session_factory() as db:
+            db.query(DocumentJob).filter(DocumentJob.id == job_id).update(values, synchronize_session=False)
+            db.commit()
+
+
+def describe_job(job: DocumentJob) -> Dict:
+    """작업 상태 응답 (단계별 상태/소요 시간)"""
+    stages = {}
+    for stage in STAGES:
+        started_at = getattr(job, f"{stage}_started_at")
+        finished_at = getattr(job, f"{stage}_finished_at")
+        stages[stage] = {
+            "status": getattr(job, f"{stage}_status"),
+            "started_at": started_at,
+            "finished_at": finished_at,
+            "duration_ms": round((finished_at - started_at).total_seconds() * 1000)
+            if started_at and finished_at else None,
+            "error": getattr(job, f"{stage}_error"),
+        }
+    return {
+        "job_id": job.id,
+        "document_type": job.document_type,
+        "document_id": job.document_id,
+        "status": job.status,
+        "stages": stages,
+        "forgery_analysis_id": job.forgery_analysis_id,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+    }
+
+
+def _fail_stages(error: str) -> Dict:
+    values = {}
+    for stage in STAGES:
+        values[f"{stage}_status"] = "failed"
+        values[f"{stage}_error"] = error
+    return values
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# 전역 파이프라인 (main.py 시작/종료 이벤트에서 워커 풀 관리)
+document_pipeline = DocumentPipeline()
@@ -0,0 +1,115 @@
+# backend/services/document_store.py
+"""
+내용 주소 기반(content-addressed) 문서 저장
+
+업로드 파일은 SHA-256 으로 저장(documents/{sha256}.{ext})하고 documents 테이블에 참조 수와 함께 기록합니다.
+같은 파일을 다시 올리면 저장하지 않고 기존 문서의 참조 수만 늘리며,
+진단서/영수증을 삭제해 참조 수가 0 이 되면 저장된 파일도 지웁니다.
+OCR/위조분석 결과 캐시도 같은 SHA-256 을 키로 쓰므로 중복 업로드는 다시 분석하지 않습니다.
+"""
+
+import logging
+from typing import Optional, Tuple
+
+from fastapi import UploadFile
+from prometheus_client import Counter
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models.models import Document
+from services.storage_service import storage_service
+
+logger = logging.getLogger(__name__)
+
+# 저장 폴더 (로컬: uploads/documents, GCS: documents/)
+DOCUMENT_FOLDER = "documents"
+
+DOCUMENT_UPLOADS = Counter(
+    "document_uploads_total",
+    "문서 업로드 수",
+    ["result"],  # result: stored / deduplicated
+)
+
+
+async def store_upload(db: Session, file: UploadFile, ext: str) -> Tuple[Document, bool]:
+    """
+    업로드 파일을 저장하고 문서 참조를 하나 늘립니다.
+    커밋하지 않으므로 호출한 쪽에서 진단서/영수증 행과 함께 커밋합니다. (행 저장이 실패하면 참조도 되돌려짐)
+    반환: (문서, 중복 여부). 중복이면 파일을 다시 저장하지 않습니다.
+    """
+    sha256, _ = await storage_service.hash_file(file)
+    document = _acquire(db, sha256)
+    if document is not None:
+        DOCUMENT_UPLOADS.labels(result="deduplicated").inc()
+        return document, True
+
+    stored = await storage_service.upload_file(file, DOCUMENT_FOLDER, f"{sha256}.{ext}")
+    if stored.sha256 != sha256:
+        raise ValueError("업로드 중 파일 내용이 바뀌었습니다.")
+    document = Document(sha256=sha256, storage_url=stored.url, size=stored.size,
+                        content_type=file.content_type, ref_count=1)
+    try:
+        with db.begin_nested():
+            db.add(document)
+    except IntegrityError:
+        # 같은 파일이 동시에 업로드된 경우 (같은 키로 같은 내용을 썼으므로 먼저 저장된 문서를 참조)
+        document = _acquire(db, sha256)
+        if document is None:
+            raise
+        DOCUMENT_UPLOADS.labels(result="deduplicated").inc()
+        return document, True
+    DOCUMENT_UPLOADS.labels(result="stored").inc()
+    return document, False
+
+
+def release(db: Session, record) -> Optional[int]:
+    """
+    진단서/영수증의 문서 참조를 하나 줄입니다.
+    커밋하지 않으므로 호출한 쪽에서 진단서/영수증 변경과 함께 커밋합니다. (삭제가 실패하면 참조도 되돌려짐)
+    반환: 참조 수가 0 이 된 문서 ID. 커밋한 뒤 delete_unreferenced 로 저장된 파일과 문서 행을 지웁니다.
+    """
+    document_id: Optional[int] = record.document_id
+    if document_id is None:
+        return None
+    record.document_id = None
+    updated = db.query(Document).filter(Document.id == document_id).update(
+        {Document.ref_count: Document.ref_count - 1}, synchronize_session=False
+    )
+    if not updated:
+        return None
+    document = db.query(Document).filter(Document.id == document_id).populate_existing().first()
+    return document_id if document.ref_count <= 0 else None
+
+
+def delete_unreferenced(db: Session, document_id: int) -> bool:
+    """
+    참조 수가 0 인 문서의 저장된 파일과 행을 삭제합니다. (release 결과를 커밋한 뒤 호출, 파일이 삭제되면 True)
+    커밋 전에 파일을 지우면 삭제가 롤백될 때 남은 참조가 없는 파일을 가리키게 되므로 커밋 후에 따로 처리하고,
+    실패해도 요청은 계속합니다. (파일과 참조 수 0 인 행이 남으면 같은 파일을 다시 올릴 때 재사용)
+    """
+    try:
+        # 행 잠금: 그 사이 같은 파일이 다시 업로드되어 참조가 늘었으면 유지하고,
+        # 삭제 중에 업로드되면 그 업로드는 삭제가 끝난 뒤 새로 저장됨
+        document = db.query(Document).filter(Document.id == document_id).with_for_update().first()
+        if document is None or document.ref_count > 0:
+            db.commit()
+            return False
+        if not storage_service.delete_file(document.storage_url):
+            logger.warning(f"문서 파일 삭제 실패 (행은 삭제): {document.storage_url}")
+        db.delete(document)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"문서 삭제 실패 (document_id={document_id}): {str(e)}")
+        return False
+    logger.info(f"문서 삭제: {document.sha256}")
+    return True
+
+
+def _acquire(db: Session, sha256: str) -> Optional[Document]:
+    updated = db.query(Document).filter(Document.sha256 == sha256).update(
+        {Document.ref_count: Document.ref_count + 1}, synchronize_session=False
+    )
+    if not updated:
+        return None
+    return db.query(Document).filter(Document.sha256 == sha256).populate_existing().first()
@@ -0,0 +1,117 @@
+# backend/services/forgery_batcher.py
+"""
+위조분석 ResNet 마이크로 배치 추론
+
+동시에 들어온 판별 요청을 짧은 시간(FORGERY_BATCH_MAX_WAIT_MS) 동안 모아
+최대 FORGERY_BATCH_MAX_SIZE 장을 한 번의 forward 로 처리하고, 요청마다 Future 로 결과를 돌려줍니다.
+- 전처리(ELA, 텐서 변환)는 호출한 스레드에서 병렬로 하고, 배치 스레드는 forward 만 실행합니다.
+- 요청이 하나뿐이면 기다리지 않고 바로 처리되도록 첫 요청 이후에만 대기합니다.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Optional
+
+from prometheus_client import Histogram
+
+logger = logging.getLogger(__name__)
+
+FORGERY_BATCHING = os.getenv("FORGERY_BATCHING", "true").lower() == "true"
+FORGERY_BATCH_MAX_SIZE = int(os.getenv("FORGERY_BATCH_MAX_SIZE", "16"))
+FORGERY_BATCH_MAX_WAIT_MS = float(os.getenv("FORGERY_BATCH_MAX_WAIT_MS", "5"))
+
+FORGERY_BATCH_SIZE = Histogram(
+    "forgery_inference_batch_size",
+    "위조분석 forward 한 번에 처리한 이미지 수",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+
+_STOP = object()
+
+
+class ForgeryBatcher:
+    def __init__(self, run_batch: Optional[Callable] = None, max_batch_size: int = FORGERY_BATCH_MAX_SIZE,
+                 max_wait_ms: float = FORGERY_BATCH_MAX_WAIT_MS):
+        """
+        :param run_batch: (N, 3, 224, 224) 텐서 → 결과 dict 리스트. 없으면 forgery_detector.predict_batch
+        """
+        self._run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, tensor) -> Future:
+        """(3, 224, 224) 입력 텐서 하나를 큐에 넣고 Future 반환"""
+        future: Future = Future()
+        self._ensure_worker()
+        self._queue.put((tensor, future))
+        return future
+
+    def predict(self, tensor) -> dict:
+        return self.submit(tensor).result()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                return
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def _ensure_worker(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, name="forgery-batcher", daemon=True)
+                self._thread.start()
+
+    def _worker(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            stop = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._run(batch)
+            if stop:
+                return
+
+    def _run(self, batch: List) -> None:
+        import torch
+
+        futures = [future for _, future in batch]
+        try:
+            run_batch = self._run_batch
+            if run_batch is None:
+                from services.forgery_detector import predict_batch as run_batch
+            results = run_batch(torch.stack([tensor for tensor, _ in batch]))
+        except Exception as e:
+            logger.error(f"위조분석 배치 추론 실패 ({len(batch)}건): {str(e)}")
+            for future in futures:
+                future.set_exception(e)
+            return
+        FORGERY_BATCH_SIZE.observe(len(batch))
+        for future, result in zip(futures, results):
+            future.set_result(result)
+
+
+# 전역 배치 추론기 (첫 요청 시 배치 스레드 시작)
+forgery_batcher = ForgeryBatcher()
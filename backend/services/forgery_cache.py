@@ -0,0 +1,201 @@
+# backend/services/forgery_cache.py
+"""
+위조분석 결과 캐시 (이미지 SHA-256 + 모델 버전 → 판별 결과)
+
+같은 이미지를 다시 분석하면 ELA 변환과 모델 추론을 생략합니다.
+키에 모델 버전(forgery_detector.model_version: 백엔드 + 모델 파일 해시)이 들어가므로
+모델 파일이나 백엔드가 바뀌면 이전 결과는 조회되지 않고, 정리 때 삭제됩니다.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from prometheus_client import Counter
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models.models import ForgeryResultCache
+
+logger = logging.getLogger(__name__)
+
+# 캐시 크기/보관 기간 (초과분은 마지막 사용 시각이 오래된 것부터 삭제)
+FORGERY_CACHE_MAX_ENTRIES = int(os.getenv("FORGERY_CACHE_MAX_ENTRIES", "50000"))
+FORGERY_CACHE_TTL_DAYS = int(os.getenv("FORGERY_CACHE_TTL_DAYS", "90"))
+# 저장 N 회마다 한 번 정리
+FORGERY_CACHE_EVICT_EVERY = int(os.getenv("FORGERY_CACHE_EVICT_EVERY", "100"))
+
+FORGERY_CACHE_REQUESTS = Counter(
+    "forgery_cache_requests_total",
+    "위조분석 결과 캐시 조회 수",
+    ["result"],  # result: hit / miss / bypass
+)
+
+_stores_since_evict = 0
+
+
+def image_digest(image_data: bytes) -> str:
+    return hashlib.sha256(image_data).hexdigest()
+
+
+def current_version() -> str:
+    from services.forgery_detector import model_version
+    return model_version()
+
+
+def get_cached(db: Session, digest: str, version: str) -> Optional[Dict]:
+    """캐시된 판별 결과 (없으면 None). 조회되면 사용 시각/횟수를 갱신합니다."""
+    entry = _find(db, digest, version)
+    if entry is None or _expired(entry):
+        FORGERY_CACHE_REQUESTS.labels(result="miss").inc()
+        return None
+
+    FORGERY_CACHE_REQUESTS.labels(result="hit").inc()
+    entry.hit_count = (entry.hit_count or 0) + 1
+    entry.last_used_at = datetime.now(timezone.utc)
+    return _to_result(entry)
+
+
+def store(db: Session, digest: str, version: str, result: Dict, commit: bool = True) -> None:
+    """
+    판별 결과 저장. commit=False 면 호출한 쪽 트랜잭션에 포함되고, 커밋한 뒤 evict_if_due 를 호출해야 합니다.
+    같은 이미지가 동시에 처리되면 나중 결과로 덮어씁니다.
+    """
+    global _stores_since_evict
+
+    now = datetime.now(timezone.utc)
+    values = {
+        "predicted_class": result["predicted_class"],
+        "confidence": result["confidence"],
+        "pages": json.dumps(result["pages"], ensure_ascii=False) if result.get("pages") else None,
+        "created_at": now,
+        "last_used_at": now,
+    }
+    entry = _find(db, digest, version)
+    if entry is None:
+        try:
+            # 세이브포인트: 다른 요청이 같은 이미지를 먼저 저장했으면(유니크 제약 위반)
+            # 이 INSERT 만 되돌리고 호출한 쪽 트랜잭션은 그대로 둔 채 그 행을 덮어씀
+            with db.begin_nested():
+                db.add(ForgeryResultCache(image_sha256=digest, model_version=version, hit_count=0, **values))
+        except IntegrityError:
+            entry = _find(db, digest, version)
+    if entry is not None:
+        for field, value in values.items():
+            setattr(entry, field, value)
+    _stores_since_evict += 1
+    if commit:
+        db.commit()
+        evict_if_due(db, version)
+
+
+def analyze_cached(db: Session, images: List[bytes], force: bool = False,
+                   timings: Optional[Dict[str, float]] = None) -> List[Tuple[Dict, bool]]:
+    """
+    여러 이미지를 위조분석하되, 캐시에 있는 이미지는 재사용하고 나머지만 한 번의 배치 추론으로 판별합니다.
+    반환: 이미지 순서대로 (결과, 캐시 사용 여부). 새 결과는 커밋하지 않으므로 호출한 쪽에서 커밋한 뒤
+    evict_if_due 를 호출합니다.
+    timings 는 forgery_service.analyze_forgery_from_bytes_list 로 전달됩니다.
+    """
+    from services.forgery_service import analyze_forgery_from_bytes_list
+
+    version = current_version()
+    digests = [image_digest(image_data) for image_data in images]
+    results: List[Optional[Tuple[Dict, bool]]] = [None] * len(images)
+    misses: Dict[str, List[int]] = {}  # 같은 요청 안의 중복 이미지는 한 번만 추론
+    for index, digest in enumerate(digests):
+        if force:
+            FORGERY_CACHE_REQUESTS.labels(result="bypass").inc()
+        elif digest not in misses:
+            cached = get_cached(db, digest, version)
+            if cached is not None:
+                results[index] = (cached, True)
+                continue
+        misses.setdefault(digest, []).append(index)
+
+    if misses:
+        fresh = analyze_forgery_from_bytes_list([images[indexes[0]] for indexes in misses.values()], timings)
+        for (digest, indexes), result in zip(misses.items(), fresh):
+            store(db, digest, version, result, commit=False)
+            for index in indexes:
+                results[index] = (result, False)
+    return results
+
+
+def evict_if_due(db: Session, version: Optional[str] = None) -> int:
+    """저장 FORGERY_CACHE_EVICT_EVERY 회마다 한 번 정리 (캐시 결과를 커밋한 뒤 호출, 실패해도 요청은 계속)"""
+    global _stores_since_evict
+
+    if _stores_since_evict < FORGERY_CACHE_EVICT_EVERY:
+        return 0
+    _stores_since_evict = 0
+    try:
+        return evict(db, version or current_version())
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"위조분석 캐시 정리 실패: {str(e)}")
+        return 0
+
+
+def evict(db: Session, version: Optional[str] = None) -> int:
+    """다른 모델 버전의 결과, 보관 기간이 지난 항목, 최대 개수를 넘는 오래된 항목 삭제"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=FORGERY_CACHE_TTL_DAYS)
+    removed = db.query(ForgeryResultCache).filter(
+        ForgeryResultCache.created_at < cutoff
+    ).delete(synchronize_session=False)
+    if version:
+        removed += db.query(ForgeryResultCache).filter(
+            ForgeryResultCache.model_version != version
+        ).delete(synchronize_session=False)
+
+    overflow = db.query(ForgeryResultCache).count() - FORGERY_CACHE_MAX_ENTRIES
+    if overflow > 0:
+        stale_ids = [
+            row.id for row in db.query(ForgeryResultCache.id)
+            .order_by(ForgeryResultCache.last_used_at, ForgeryResultCache.id)
+            .limit(overflow)
+        ]
+        removed += db.query(ForgeryResultCache).filter(
+            ForgeryResultCache.id.in_(stale_ids)
+        ).delete(synchronize_session=False)
+
+    db.commit()
+    if removed:
+        logger.info(f"위조분석 캐시 정리: {removed}개 삭제")
+    return removed
+
+
+def _find(db: Session, digest: str, version: str) -> Optional[ForgeryResultCache]:
+    return db.query(ForgeryResultCache).filter(
+        ForgeryResultCache.image_sha256 == digest,
+        ForgeryResultCache.model_version == version
+    ).first()
+
+
+def _to_result(entry: ForgeryResultCache) -> Dict:
+    result = {
+        "is_forged": entry.predicted_class == "forged",
+        "confidence": entry.confidence,
+        "predicted_class": entry.predicted_class,
+    }
+    if entry.pages:
+        pages = json.loads(entry.pages)
+        representative = next((page for page in pages
+                               if page["predicted_class"] == entry.predicted_class
+                               and page["confidence"] == entry.confidence), None)
+        if representative is not None:
+            result["page"] = representative["page"]
+        result["pages"] = pages
+    return result
+
+
+def _expired(entry: ForgeryResultCache) -> bool:
+    created_at = entry.created_at
+    if created_at is None:
+        return False
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at < datetime.now(timezone.utc) - timedelta(days=FORGERY_CACHE_TTL_DAYS)
@@ -1,18 +1,168 @@
 # backend/services/forgery_detector.py
+"""
+ELA + ResNet18 위조 판별 모델
 
+추론 백엔드는 FORGERY_BACKEND(torch / torchscript / onnx)로 선택합니다.
+모델은 임포트 시점이 아니라 처음 필요할 때(또는 main.py 시작 태스크에서 이벤트 루프 밖 스레드로) 로드하고,
+로드 직후 워밍업 추론을 한 번 실행합니다. 상태는 model_status 로 확인합니다. (/ready)
+"""
+
+import hashlib
+import logging
+import threading
+import time
 import torch
 import torchvision.transforms as transforms
 from torchvision import models
 from PIL import Image
+from typing import List, Optional
 import os
 
-# 1. 모델 로딩
-resnet_model = models.resnet18()
-resnet_model.fc = torch.nn.Linear(resnet_model.fc.in_features, 2)
+logger = logging.getLogger(__name__)
+
+# 추론 백엔드: torch (fp32 eager) / torchscript / onnx (onnxruntime, int8 양자화 모델 사용 가능)
+# TorchScript/ONNX 파일은 utils/scripts/export_forgery_model.py 로 만듭니다.
+FORGERY_BACKEND = os.getenv("FORGERY_BACKEND", "torch").lower()
+# 학습된 가중치 경로
+FORGERY_MODEL_PATH = os.getenv("FORGERY_MODEL_PATH", "resnet18_ela.pth")
+FORGERY_TORCHSCRIPT_PATH = os.getenv("FORGERY_TORCHSCRIPT_PATH", "resnet18_ela.torchscript.pt")
+FORGERY_ONNX_PATH = os.getenv("FORGERY_ONNX_PATH", "resnet18_ela.onnx")
+FORGERY_ONNX_THREADS = int(os.getenv("FORGERY_ONNX_THREADS", "0"))  # onnxruntime 연산 스레드 (0 = 코어 수)
+# 결과 캐시 키에 쓰는 모델 버전 (비우면 백엔드 + 모델 파일 SHA-256 으로 자동 계산)
+FORGERY_MODEL_VERSION = os.getenv("FORGERY_MODEL_VERSION", "")
+# 타일 분석 (고해상도 문서 스캔): 224px 타일 크기, 타일 간 겹침 비율, 최대 타일 수 (넘으면 이미지를 줄여서 맞춤)
+FORGERY_TILE_SIZE = int(os.getenv("FORGERY_TILE_SIZE", "224"))
+FORGERY_TILE_OVERLAP = float(os.getenv("FORGERY_TILE_OVERLAP", "0.25"))
+FORGERY_TILE_MAX_TILES = int(os.getenv("FORGERY_TILE_MAX_TILES", "64"))
+
+# 1. 모델 로딩 (지연 로드)
+_model = None
+_model_lock = threading.Lock()
+model_status = {
+    "state": "not_loaded",  # not_loaded / loading / ready / failed
+    "backend": FORGERY_BACKEND,
+    "path": None,
+    "version": None,
+    "load_seconds": None,
+    "warmup_seconds": None,
+    "error": None,
+}
+
+
+def build_resnet() -> torch.nn.Module:
+    """학습 스크립트와 같은 구조 (ResNet18 + 2 클래스 출력)"""
+    model = models.resnet18()
+    model.fc = torch.nn.Linear(model.fc.in_features, 2)
+    return model
+
+
+def _load_torch(path: str):
+    model = build_resnet()
+    model.load_state_dict(torch.load(path, map_location="cpu"))
+    return model.eval()  # 추론 모드
+
+
+def _load_torchscript(path: str):
+    return torch.jit.load(path, map_location="cpu").eval()
+
+
+def _load_onnx(path: str):
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    if FORGERY_ONNX_THREADS:
+        options.intra_op_num_threads = FORGERY_ONNX_THREADS
+    session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+    input_name = session.get_inputs()[0].name
+
+    def forward(batch: torch.Tensor) -> torch.Tensor:
+        return torch.from_numpy(session.run(None, {input_name: batch.numpy()})[0])
+
+    return forward
+
+
+# 백엔드 이름: (로더, 파일 경로 설정 이름)
+BACKENDS = {
+    "torch": (_load_torch, "FORGERY_MODEL_PATH"),
+    "torchscript": (_load_torchscript, "FORGERY_TORCHSCRIPT_PATH"),
+    "onnx": (_load_onnx, "FORGERY_ONNX_PATH"),
+}
+
+
+def load_backend(backend: str, path: Optional[str] = None):
+    """
+    백엔드별 모델 로드. 반환값은 (N, 3, 224, 224) 텐서 → (N, 2) logits 텐서 함수
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"지원하지 않는 위조분석 백엔드입니다: {backend} ({', '.join(BACKENDS)})")
+    loader, path_setting = BACKENDS[backend]
+    return loader(path or globals()[path_setting])
+
+
+_file_versions = {}
+
+
+def _model_path() -> Optional[str]:
+    return globals()[BACKENDS[FORGERY_BACKEND][1]] if FORGERY_BACKEND in BACKENDS else None
+
+
+def _file_version(backend: str, path: str) -> str:
+    if FORGERY_MODEL_VERSION:
+        return FORGERY_MODEL_VERSION
+    # 파일이 바뀌면(크기/수정 시각) 다시 해시
+    stat = os.stat(path)
+    key = (backend, os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if key not in _file_versions:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        _file_versions[key] = f"{backend}-{digest.hexdigest()[:12]}"
+    return _file_versions[key]
+
+
+def model_version() -> str:
+    """
+    위조분석 결과 캐시 키용 모델 버전
+    로드된 모델이 있으면 그 모델의 버전, 아니면 설정된 모델 파일로 계산합니다. (모델 로드 없이 캐시 조회 가능)
+    """
+    return model_status["version"] or _file_version(FORGERY_BACKEND, _model_path())
+
+
+def load_model():
+    """가중치 로드 + 워밍업 추론 (여러 스레드에서 호출해도 한 번만 로드)"""
+    global _model
+    with _model_lock:
+        if _model is not None:
+            return _model
+        path = _model_path()
+        model_status.update(state="loading", backend=FORGERY_BACKEND, path=path, error=None)
+        start = time.perf_counter()
+        try:
+            version = _file_version(FORGERY_BACKEND, path)
+            model = load_backend(FORGERY_BACKEND)
+            loaded = time.perf_counter()
+            # 워밍업: 첫 요청이 커널 초기화/메모리 할당 비용을 내지 않도록
+            with torch.no_grad():
+                model(torch.zeros(1, 3, 224, 224))
+        except Exception as e:
+            model_status.update(state="failed", error=str(e))
+            logger.error(f"위조분석 모델 로드 실패: {str(e)}")
+            raise RuntimeError(f"위조분석 모델을 불러오지 못했습니다: {str(e)}")
+
+        _model = model
+        model_status.update(state="ready", version=version, load_seconds=round(loaded - start, 3),
+                            warmup_seconds=round(time.perf_counter() - loaded, 3))
+        logger.info(f"위조분석 모델 로드 완료: {model_status}")
+        return _model
+
+
+def get_model():
+    return _model if _model is not None else load_model()
 
-# 학습된 가중치 불러오기 (경로는 실제 pth 파일 위치에 맞게 수정)
-resnet_model.load_state_dict(torch.load("resnet18_ela.pth", map_location="cpu"))
-resnet_model.eval()  # 추론 모드
+
+def is_ready() -> bool:
+    return _model is not None
 
 # 2. 이미지 전처리 (ResNet 입력 맞춤)
 transform = transforms.Compose([
@@ -22,7 +172,83 @@ transform = transforms.Compose([
                          std=[0.229, 0.224, 0.225]),
 ])
 
+normalize = transforms.Compose([
+    transforms.ToTensor(),
+    transforms.Normalize(mean=[0.485, 0.456, 0.406],
+                         std=[0.229, 0.224, 0.225]),
+])
+
 # 3. 위조 여부 판단 함수
+def preprocess(ela_image: Image.Image) -> torch.Tensor:
+    """ELA 이미지 → (3, 224, 224) 입력 텐서"""
+    tensor_img = transform(ela_image)
+    if not isinstance(tensor_img, torch.Tensor):
+        tensor_img = transforms.ToTensor()(tensor_img)
+    return tensor_img
+
+
+def _tile_starts(length: int, tile_size: int, stride: int) -> List[int]:
+    if length <= tile_size:
+        return [0]
+    count = -(-(length - tile_size) // stride) + 1
+    # 마지막 타일은 이미지 끝에 맞춤
+    return [min(index * stride, length - tile_size) for index in range(count)]
+
+
+def tile_batch(ela_image: Image.Image, tile_size: int = FORGERY_TILE_SIZE, overlap: float = FORGERY_TILE_OVERLAP,
+               max_tiles: int = FORGERY_TILE_MAX_TILES):
+    """
+    ELA 이미지를 겹치는 tile_size 타일로 잘라 (N, 3, tile, tile) 입력 텐서로 반환 (크기 조정 없이 원본 해상도 유지)
+    타일 수가 max_tiles 를 넘으면 넘지 않을 때까지 이미지를 줄입니다. (지연 시간 상한)
+    tile_size 보다 작은 변은 검은색(ELA 차이 0)으로 채웁니다.
+
+    :return: (텐서, 격자 정보 {"rows", "cols", "tile_size", "stride", "scale", "positions": [(x, y), ...]})
+    """
+    stride = max(1, int(tile_size * (1 - overlap)))
+    image, scale = ela_image, 1.0
+    while True:
+        xs = _tile_starts(image.width, tile_size, stride)
+        ys = _tile_starts(image.height, tile_size, stride)
+        if len(xs) * len(ys) <= max_tiles:
+            break
+        scale *= max(0.5, min(0.95, (max_tiles / (len(xs) * len(ys))) ** 0.5))
+        image = ela_image.resize((max(1, round(ela_image.width * scale)), max(1, round(ela_image.height * scale))),
+                                 Image.BILINEAR)
+
+    tensor = normalize(image)
+    pad_bottom, pad_right = max(0, tile_size - image.height), max(0, tile_size - image.width)
+    if pad_bottom or pad_right:
+        # 정규화 후 값으로 채워야 ELA 0 (검은색) 과 같음
+        background = normalize(Image.new("RGB", (1, 1)))[:, 0, 0].view(3, 1, 1)
+        padded = background.expand(3, image.height + pad_bottom, image.width + pad_right).clone()
+        padded[:, :image.height, :image.width] = tensor
+        tensor = padded
+    positions = [(x, y) for y in ys for x in xs]
+    tiles = torch.stack([tensor[:, y:y + tile_size, x:x + tile_size] for x, y in positions])
+    grid = {"rows": len(ys), "cols": len(xs), "tile_size": tile_size, "stride": stride,
+            "scale": round(scale, 4), "positions": positions}
+    return tiles, grid
+
+
+def predict_batch(batch: torch.Tensor) -> List[dict]:
+    """
+    (N, 3, 224, 224) 입력을 한 번의 forward 로 판별 (services/forgery_batcher.py 에서 사용)
+    """
+    with torch.no_grad():
+        output = get_model()(batch)
+        probs = torch.softmax(output, dim=1)
+        confidence, pred_class = torch.max(probs, 1)
+
+    return [
+        {
+            "is_forged": bool(pred),  # 0: 정상, 1: 위조
+            "confidence": round(conf, 4),
+            "predicted_class": "forged" if pred == 1 else "authentic"
+        }
+        for conf, pred in zip(confidence.tolist(), pred_class.tolist())
+    ]
+
+
 def predict_forgery(ela_image: Image.Image) -> dict:
     """
     ELA 이미지 입력 → 위조 여부 판별 결과 반환
@@ -34,17 +260,4 @@ def predict_forgery(ela_image: Image.Image) -> dict:
         "predicted_class": "forged" or "authentic"
     }
     """
-    tensor_img = transform(ela_image)
-    if not isinstance(tensor_img, torch.Tensor):
-        tensor_img = transforms.ToTensor()(tensor_img)
-    input_tensor = tensor_img.unsqueeze(0)
-    with torch.no_grad():
-        output = resnet_model(input_tensor)
-        probs = torch.softmax(output, dim=1)
-        confidence, pred_class = torch.max(probs, 1)
-
-    return {
-        "is_forged": bool(pred_class.item()),  # 0: 정상, 1: 위조
-        "confidence": round(confidence.item(), 4),
-        "predicted_class": "forged" if pred_class.item() == 1 else "authentic"
-    }
+    return predict_batch(preprocess(ela_image).unsqueeze(0))[0]
@@ -1,17 +1,36 @@
 import sys
 import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from io import BytesIO
 from pathlib import Path
+from typing import Callable, Dict, List, Optional
 from PIL import Image
+from prometheus_client import Histogram
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from utils.ela import convert_to_ela_image
-from services.forgery_detector import predict_forgery
+from utils.pdf_pages import PdfPages, is_pdf
+from services.forgery_batcher import FORGERY_BATCHING, forgery_batcher
 
-def analyze_forgery_from_local_path(image_path: str) -> dict:
-    """
-    로컬 이미지 경로를 받아 위조분석 결과 반환
-    """
+# 여러 이미지(진단서/영수증)의 ELA 변환을 동시에 실행하는 워커 수 (요청이 몰려도 CPU 사용량이 이 수로 제한됨)
+FORGERY_ANALYSIS_WORKERS = int(os.getenv("FORGERY_ANALYSIS_WORKERS", "4"))
+
+FORGERY_STAGE_SECONDS = Histogram(
+    "forgery_stage_seconds",
+    "위조분석 단계별 소요 시간",
+    ["stage"],  # stage: download / ela / inference
+)
+
+# 타일 분석 forward 한 번에 넣는 타일 수
+FORGERY_TILE_BATCH_SIZE = int(os.getenv("FORGERY_TILE_BATCH_SIZE", "16"))
+# 타일 위조 확률이 이 값 이상이면 위조로 판단
+FORGERY_TILE_THRESHOLD = float(os.getenv("FORGERY_TILE_THRESHOLD", "0.5"))
+
+_analysis_executor = ThreadPoolExecutor(max_workers=FORGERY_ANALYSIS_WORKERS, thread_name_prefix="forgery-ela")
+
+def _resolve_path(image_path: str) -> Path:
     path_obj = Path(image_path)
     if path_obj.is_absolute():
         full_path = path_obj
@@ -21,11 +40,154 @@ def analyze_forgery_from_local_path(image_path: str) -> dict:
 
     if not full_path.exists():
         raise FileNotFoundError(f"파일이 존재하지 않습니다: {full_path}")
+    return full_path
+
+def _submit(ela_image: Image.Image) -> Future:
+    """판별 요청 (배치 추론 사용 시 다른 요청과 모아서 한 번에 forward)"""
+    # torch/모델은 첫 판별 때 불러옴 (앱 임포트 시간에 포함되지 않도록)
+    from services.forgery_detector import predict_forgery, preprocess
 
-    img = Image.open(full_path)
+    if FORGERY_BATCHING:
+        return forgery_batcher.submit(preprocess(ela_image))
+    future: Future = Future()
+    future.set_result(predict_forgery(ela_image))
+    return future
+
+def _start_analysis(image_data: bytes) -> Callable[[], dict]:
+    """ELA 변환 후 판별 요청만 넣고, 결과를 기다리는 함수를 반환"""
+    if is_pdf(image_data):
+        return _start_pdf_analysis(image_data)
+    img = Image.open(BytesIO(image_data))
     ela_image = convert_to_ela_image(img)
-    result = predict_forgery(ela_image)
-    return result
+    return _submit(ela_image).result
+
+def analyze_forgery_from_local_path(image_path: str) -> dict:
+    """
+    로컬 이미지 경로를 받아 위조분석 결과 반환
+    """
+    return analyze_forgery_from_local_paths([image_path])[0]
+
+def analyze_forgery_from_local_paths(image_paths: List[str]) -> List[dict]:
+    """
+    여러 이미지(진단서/영수증)를 위조분석. 모든 이미지의 판별 요청을 넣은 뒤 결과를 기다리므로
+    한 번의 배치 forward 로 함께 처리됩니다.
+    """
+    pending = []
+    for image_path in image_paths:
+        with open(_resolve_path(image_path), "rb") as f:
+            pending.append(_start_analysis(f.read()))
+    return [wait() for wait in pending]
+
+
+def analyze_forgery_from_bytes(image_data: bytes) -> dict:
+    """
+    이미지 바이트를 받아 위조분석 결과 반환 (임시 파일 없이 메모리에서 처리)
+    """
+    return _start_analysis(image_data)()
+
+
+def analyze_forgery_from_bytes_list(images: List[bytes], timings: Optional[Dict[str, float]] = None) -> List[dict]:
+    """
+    여러 이미지 바이트를 위조분석 (services/forgery_cache.py 의 캐시 미스분)
+    ELA 변환은 워커 스레드에서 동시에 실행하고, 판별은 한 번의 배치 forward 로 처리합니다.
+    timings 를 주면 단계별 소요 시간(초)을 더해 넣습니다. (ela / inference)
+    """
+    start = time.perf_counter()
+    if len(images) > 1:
+        pending = list(_analysis_executor.map(_start_analysis, images))
+    else:
+        pending = [_start_analysis(image_data) for image_data in images]
+    converted = time.perf_counter()
+    results = [wait() for wait in pending]
+    finished = time.perf_counter()
+
+    FORGERY_STAGE_SECONDS.labels(stage="ela").observe(converted - start)
+    FORGERY_STAGE_SECONDS.labels(stage="inference").observe(finished - converted)
+    if timings is not None:
+        timings["ela"] = timings.get("ela", 0.0) + converted - start
+        timings["inference"] = timings.get("inference", 0.0) + finished - converted
+    return results
+
+
+def analyze_pdf_forgery(pdf_data: bytes) -> dict:
+    """
+    PDF 페이지별 위조분석 (OCR 과 같은 페이지 렌더링 캐시 사용)
+    위조로 판별된 페이지가 있으면 그중 신뢰도가 가장 높은 결과를, 없으면 가장 불확실한 정상 결과를 대표로 반환합니다.
+    """
+    return _start_pdf_analysis(pdf_data)()
+
+
+def _start_pdf_analysis(pdf_data: bytes) -> Callable[[], dict]:
+    futures = []
+    with PdfPages(pdf_data) as pages:
+        for index in range(len(pages)):
+            ela_image = convert_to_ela_image(Image.open(BytesIO(pages.render(index))))
+            futures.append(_submit(ela_image))
+    if not futures:
+        raise ValueError("PDF 에 페이지가 없습니다.")
+
+    def wait() -> dict:
+        results = [{**future.result(), "page": index + 1} for index, future in enumerate(futures)]
+        forged = [result for result in results if result["is_forged"]]
+        if forged:
+            representative = max(forged, key=lambda result: result["confidence"])
+        else:
+            representative = min(results, key=lambda result: result["confidence"])
+        return {**representative, "pages": results}
+
+    return wait
+
+
+def analyze_forgery_tiles(image_data: bytes, timings: Optional[Dict[str, float]] = None) -> dict:
+    """
+    타일 위조분석 (고해상도 문서 스캔용)
+    전체를 224×224 로 줄이면 금액 칸 같은 작은 위조 영역이 몇 픽셀로 사라지므로,
+    ELA 이미지를 겹치는 224px 타일로 잘라 배치로 판별하고 타일별 위조 확률 히트맵과 최댓값을 반환합니다.
+    PDF 는 페이지마다 분석하고 최댓값이 가장 큰 페이지를 대표로 반환합니다.
+    """
+    if is_pdf(image_data):
+        pages = []
+        with PdfPages(image_data) as pdf_pages:
+            for index in range(len(pdf_pages)):
+                pages.append({**analyze_forgery_tiles(pdf_pages.render(index), timings), "page": index + 1})
+        if not pages:
+            raise ValueError("PDF 에 페이지가 없습니다.")
+        return {**max(pages, key=lambda page: page["max_score"]), "pages": pages}
+
+    from services.forgery_detector import predict_batch, tile_batch
+
+    start = time.perf_counter()
+    ela_image = convert_to_ela_image(Image.open(BytesIO(image_data)))
+    tiles, grid = tile_batch(ela_image)
+    converted = time.perf_counter()
+    scores = []
+    for offset in range(0, len(tiles), FORGERY_TILE_BATCH_SIZE):
+        for result in predict_batch(tiles[offset:offset + FORGERY_TILE_BATCH_SIZE]):
+            # 위조 클래스 확률
+            scores.append(result["confidence"] if result["is_forged"] else round(1 - result["confidence"], 4))
+    finished = time.perf_counter()
+
+    FORGERY_STAGE_SECONDS.labels(stage="ela").observe(converted - start)
+    FORGERY_STAGE_SECONDS.labels(stage="inference").observe(finished - converted)
+    if timings is not None:
+        timings["ela"] = timings.get("ela", 0.0) + converted - start
+        timings["inference"] = timings.get("inference", 0.0) + finished - converted
+
+    cols = grid["cols"]
+    heatmap = [scores[row * cols:(row + 1) * cols] for row in range(grid["rows"])]
+    max_index = max(range(len(scores)), key=scores.__getitem__)
+    x, y = grid.pop("positions")[max_index]
+    return {
+        "is_forged": scores[max_index] >= FORGERY_TILE_THRESHOLD,
+        "max_score": scores[max_index],
+        # 원본 이미지 좌표 (타일 분석 시 이미지를 줄였으면 되돌림)
+        "max_tile": {"row": max_index // cols, "col": max_index % cols,
+                     "x": round(x / grid["scale"]), "y": round(y / grid["scale"]),
+                     "size": round(grid["tile_size"] / grid["scale"])},
+        "tiles": len(scores),
+        "grid": grid,
+        "heatmap": heatmap,
+    }
 
 
 # 여러분이 가진 테스트 이미지 경로
@@ -0,0 +1,109 @@
+# backend/services/icd_index.py
+"""
+ICD-10 코드 → 보장 분류(암/골절/뇌/심장/상해 ...) 인덱스
+
+clause_rules.yaml 의 icd_groups 범위표("C00-D48", "I60-I69", "M84.3" 등)를
+규칙 로드 시 한 번 접두어 테이블로 펼쳐 두고, 조회는 코드 앞 4자리/3자리 dict 조회 두 번으로 끝냅니다.
+진단명 키워드는 ICD 코드가 없거나 분류되지 않을 때만 사용합니다.
+"""
+
+import re
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+EMPTY: FrozenSet[str] = frozenset()
+
+# "C16.9", "c169", " S52.50 " → "C169", "S5250"
+_CODE_CHARS = re.compile(r"[^A-Z0-9]")
+# 범위 경계: 영문 1자 + 숫자 2자리 (+ 세부 분류 숫자 1자리)
+_BOUND = re.compile(r"^[A-Z][0-9]{2}[0-9]?$")
+
+# 분류 결과 캐시 크기 (같은 진단명/코드 조합이 반복되므로 작게 유지)
+_CACHE_LIMIT = 65536
+
+
+def normalize_code(icd_code: Optional[str]) -> str:
+    """ICD 코드 정규화 (대문자, 점/공백 제거)"""
+    if not icd_code:
+        return ""
+    return _CODE_CHARS.sub("", icd_code.upper())
+
+
+def _parse_bound(bound: str) -> str:
+    code = normalize_code(bound)
+    if not _BOUND.match(code):
+        raise ValueError(f"ICD 범위 형식 오류: {bound!r} (예: C00, I60-I69, M84.3)")
+    return code
+
+
+def _expand(spec: str) -> List[str]:
+    """"C00-D48" → ["C00", "C01", ..., "D48"] (경계와 같은 길이의 접두어 목록)"""
+    if "-" not in spec:
+        return [_parse_bound(spec)]
+    start, end = (_parse_bound(part) for part in spec.split("-", 1))
+    if len(start) != len(end) or start > end:
+        raise ValueError(f"ICD 범위 형식 오류: {spec!r}")
+
+    width = len(start) - 1
+    prefixes = []
+    for letter in range(ord(start[0]), ord(end[0]) + 1):
+        low = int(start[1:]) if chr(letter) == start[0] else 0
+        high = int(end[1:]) if chr(letter) == end[0] else 10 ** width - 1
+        prefixes.extend(f"{chr(letter)}{n:0{width}d}" for n in range(low, high + 1))
+    return prefixes
+
+
+class IcdIndex:
+    """ICD-10 접두어(3자리 분류 / 4자리 세분류) → 분류 그룹 집합"""
+
+    def __init__(self, groups: Dict[str, Iterable[str]]):
+        table: Dict[str, set] = {}
+        for group, ranges in (groups or {}).items():
+            for spec in ranges or []:
+                for prefix in _expand(str(spec)):
+                    table.setdefault(prefix, set()).add(group)
+        # 4자리 세분류는 3자리 분류의 그룹도 함께 갖도록 병합
+        for prefix in [p for p in table if len(p) == 4]:
+            table[prefix] |= table.get(prefix[:3], set())
+        self._table: Dict[str, FrozenSet[str]] = {p: frozenset(g) for p, g in table.items()}
+        self.groups: Tuple[str, ...] = tuple(groups or ())
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def lookup(self, icd_code: Optional[str]) -> FrozenSet[str]:
+        """ICD 코드의 분류 그룹 (분류되지 않으면 빈 집합)"""
+        code = normalize_code(icd_code)
+        if len(code) < 3:
+            return EMPTY
+        table = self._table
+        return table.get(code[:4]) or table.get(code[:3], EMPTY)
+
+
+class DiagnosisClassifier:
+    """
+    진단 분류기: ICD 코드 인덱스 우선, 진단명 키워드는 보조
+    (icd_code, diagnosis_name) 조합별 결과를 캐시합니다.
+    """
+
+    def __init__(self, index: IcdIndex, keyword_groups: Dict[str, Tuple[str, ...]]):
+        self.index = index
+        self.keyword_groups = tuple(keyword_groups.items())
+        self.groups: Tuple[str, ...] = tuple(dict.fromkeys(tuple(index.groups) + tuple(keyword_groups)))
+        self._cache: Dict[Tuple[Optional[str], Optional[str]], FrozenSet[str]] = {}
+
+    def by_name(self, diagnosis_name: Optional[str]) -> FrozenSet[str]:
+        name = (diagnosis_name or "").lower()
+        return frozenset(
+            group for group, words in self.keyword_groups
+            if any(w in name for w in words)
+        )
+
+    def classify(self, diagnosis) -> FrozenSet[str]:
+        key = (diagnosis.icd_code, diagnosis.diagnosis_name)
+        groups = self._cache.get(key)
+        if groups is None:
+            groups = self.index.lookup(key[0]) or self.by_name(key[1])
+            if len(self._cache) >= _CACHE_LIMIT:
+                self._cache.clear()
+            self._cache[key] = groups
+        return groups
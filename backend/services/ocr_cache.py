@@ -0,0 +1,142 @@
+# backend/services/ocr_cache.py
+"""
+OCR 결과 캐시 (이미지 SHA-256 + 스키마 이름 → Upstage 추출 결과)
+
+같은 이미지로 OCR 을 다시 실행하거나 같은 문서를 중복 업로드한 경우
+유료 추출 호출과 base64 인코딩을 생략합니다. 결과는 후처리 전 원본 JSON 으로 저장하므로
+후처리 로직이 바뀌어도 캐시를 비울 필요가 없습니다.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from prometheus_client import Counter
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models.models import OcrResultCache
+
+logger = logging.getLogger(__name__)
+
+# 캐시 크기/보관 기간 (초과분은 마지막 사용 시각이 오래된 것부터 삭제)
+OCR_CACHE_MAX_ENTRIES = int(os.getenv("OCR_CACHE_MAX_ENTRIES", "20000"))
+OCR_CACHE_TTL_DAYS = int(os.getenv("OCR_CACHE_TTL_DAYS", "90"))
+# 저장 N 회마다 한 번 정리
+OCR_CACHE_EVICT_EVERY = int(os.getenv("OCR_CACHE_EVICT_EVERY", "100"))
+
+OCR_CACHE_REQUESTS = Counter(
+    "ocr_cache_requests_total",
+    "OCR 결과 캐시 조회 수",
+    ["schema", "result"],  # result: hit / miss / bypass
+)
+
+_stores_since_evict = 0
+
+
+def image_digest(image_data: bytes) -> str:
+    return hashlib.sha256(image_data).hexdigest()
+
+
+def get_cached(db: Session, digest: str, schema_name: str) -> Optional[Dict]:
+    """캐시된 추출 결과 (없으면 None). 조회되면 사용 시각/횟수를 갱신합니다."""
+    entry = _find(db, digest, schema_name)
+    if entry is None or _expired(entry):
+        OCR_CACHE_REQUESTS.labels(schema=schema_name, result="miss").inc()
+        return None
+
+    OCR_CACHE_REQUESTS.labels(schema=schema_name, result="hit").inc()
+    entry.hit_count = (entry.hit_count or 0) + 1
+    entry.last_used_at = datetime.now(timezone.utc)
+    return json.loads(entry.result)
+
+
+def record_bypass(schema_name: str) -> None:
+    """force=true 로 캐시를 건너뛴 요청"""
+    OCR_CACHE_REQUESTS.labels(schema=schema_name, result="bypass").inc()
+
+
+def store(db: Session, digest: str, schema_name: str, result: Dict, commit: bool = True) -> None:
+    """
+    추출 결과 저장. 기본은 바로 커밋합니다. (이후 후처리가 실패해도 유료 호출 결과는 남김)
+    commit=False 면 호출한 쪽 트랜잭션에 포함되고, 커밋한 뒤 evict_if_due 를 호출해야 합니다. (일괄 OCR)
+    같은 이미지가 동시에 처리되면 나중 결과로 덮어씁니다.
+    """
+    global _stores_since_evict
+
+    payload = json.dumps(result, ensure_ascii=False)
+    now = datetime.now(timezone.utc)
+    entry = _find(db, digest, schema_name)
+    if entry is None:
+        try:
+            # 세이브포인트: 다른 요청이 같은 이미지를 먼저 저장했으면(유니크 제약 위반)
+            # 이 INSERT 만 되돌리고 호출한 쪽 트랜잭션은 그대로 둔 채 그 행을 덮어씀
+            with db.begin_nested():
+                db.add(OcrResultCache(image_sha256=digest, schema_name=schema_name, result=payload,
+                                      hit_count=0, created_at=now, last_used_at=now))
+        except IntegrityError:
+            entry = _find(db, digest, schema_name)
+    if entry is not None:
+        entry.result, entry.created_at, entry.last_used_at = payload, now, now
+    _stores_since_evict += 1
+    if commit:
+        db.commit()
+        evict_if_due(db)
+
+
+def evict_if_due(db: Session) -> int:
+    """저장 OCR_CACHE_EVICT_EVERY 회마다 한 번 정리 (캐시 결과를 커밋한 뒤 호출, 실패해도 요청은 계속)"""
+    global _stores_since_evict
+
+    if _stores_since_evict < OCR_CACHE_EVICT_EVERY:
+        return 0
+    _stores_since_evict = 0
+    try:
+        return evict(db)
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"OCR 캐시 정리 실패: {str(e)}")
+        return 0
+
+
+def evict(db: Session) -> int:
+    """보관 기간이 지난 항목과 최대 개수를 넘는 오래된 항목 삭제"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=OCR_CACHE_TTL_DAYS)
+    removed = db.query(OcrResultCache).filter(
+        OcrResultCache.created_at < cutoff
+    ).delete(synchronize_session=False)
+
+    overflow = db.query(OcrResultCache).count() - OCR_CACHE_MAX_ENTRIES
+    if overflow > 0:
+        stale_ids = [
+            row.id for row in db.query(OcrResultCache.id)
+            .order_by(OcrResultCache.last_used_at, OcrResultCache.id)
+            .limit(overflow)
+        ]
+        removed += db.query(OcrResultCache).filter(
+            OcrResultCache.id.in_(stale_ids)
+        ).delete(synchronize_session=False)
+
+    db.commit()
+    if removed:
+        logger.info(f"OCR 캐시 정리: {removed}개 삭제")
+    return removed
+
+
+def _find(db: Session, digest: str, schema_name: str) -> Optional[OcrResultCache]:
+    return db.query(OcrResultCache).filter(
+        OcrResultCache.image_sha256 == digest,
+        OcrResultCache.schema_name == schema_name
+    ).first()
+
+
+def _expired(entry: OcrResultCache) -> bool:
+    created_at = entry.created_at
+    if created_at is None:
+        return False
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at < datetime.now(timezone.utc) - timedelta(days=OCR_CACHE_TTL_DAYS)
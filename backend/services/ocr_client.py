@@ -0,0 +1,129 @@
+# backend/services/ocr_client.py
+"""
+Upstage Information Extraction 비동기 클라이언트
+
+OCR 호출(수 초)이 이벤트 루프를 막지 않도록 AsyncOpenAI 와 공유 httpx.AsyncClient 를 사용합니다.
+HTTP 연결 풀(keep-alive)은 앱 시작 시 한 번 만들고 OCR 호출과 원격 이미지 다운로드가 함께 사용합니다.
+"""
+
+import asyncio
+import base64
+import json
+import logging
+import os
+from typing import Dict, Optional
+
+import httpx
+from openai import AsyncOpenAI
+
+from utils.ocr_image import normalize_for_ocr
+
+logger = logging.getLogger(__name__)
+
+UPSTAGE_OCR_API_URL = os.getenv("UPSTAGE_OCR_API_URL", "https://api.upstage.ai/v1/information-extraction")
+OCR_MODEL = os.getenv("UPSTAGE_OCR_MODEL", "information-extract")
+
+# 연결 풀/타임아웃 설정
+OCR_MAX_CONNECTIONS = int(os.getenv("OCR_MAX_CONNECTIONS", "20"))
+OCR_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OCR_MAX_KEEPALIVE_CONNECTIONS", "10"))
+OCR_KEEPALIVE_EXPIRY = float(os.getenv("OCR_KEEPALIVE_EXPIRY", "30"))
+OCR_CONNECT_TIMEOUT = float(os.getenv("OCR_CONNECT_TIMEOUT", "5"))
+OCR_READ_TIMEOUT = float(os.getenv("OCR_READ_TIMEOUT", "60"))
+OCR_MAX_RETRIES = int(os.getenv("OCR_MAX_RETRIES", "2"))
+
+# 전송 전 이미지 정규화 (회전 보정/축소/JPEG 재인코딩, utils/ocr_image.py)
+OCR_PREPROCESS = os.getenv("OCR_PREPROCESS", "true").lower() == "true"
+
+
+class OcrError(Exception):
+    """OCR 호출/응답 오류 (메시지는 그대로 API 응답 detail 로 사용)"""
+
+
+class OcrClient:
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.api_key = api_key
+        self.base_url = base_url or UPSTAGE_OCR_API_URL
+        self._transport = transport
+        self._http: Optional[httpx.AsyncClient] = None
+        self._openai: Optional[AsyncOpenAI] = None
+
+    def start(self) -> None:
+        """연결 풀 생성 (앱 시작 시 한 번 호출)"""
+        if self._http is not None:
+            return
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=OCR_MAX_CONNECTIONS,
+                max_keepalive_connections=OCR_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=OCR_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(OCR_READ_TIMEOUT, connect=OCR_CONNECT_TIMEOUT),
+            transport=self._transport,
+        )
+        self._openai = AsyncOpenAI(
+            api_key=self.api_key or os.getenv("UPSTAGE_OCR_API_KEY"),
+            base_url=self.base_url,
+            http_client=self._http,
+            max_retries=OCR_MAX_RETRIES,
+        )
+        logger.info(f"OCR 클라이언트 초기화 완료: {self.base_url} (max_connections={OCR_MAX_CONNECTIONS})")
+
+    async def close(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+        self._http, self._openai = None, None
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        # 시작 이벤트 없이 사용하는 경우(스크립트/테스트)를 위해 필요 시 생성
+        self.start()
+        return self._http
+
+    @property
+    def openai(self) -> AsyncOpenAI:
+        self.start()
+        return self._openai
+
+    async def extract(self, image_data: bytes, schema: Dict, preprocess: bool = OCR_PREPROCESS) -> Dict:
+        """이미지에서 schema 에 맞는 필드 추출"""
+        if preprocess:
+            # 디코딩/리사이즈는 CPU 작업이므로 이벤트 루프 밖에서 실행
+            try:
+                image_data, _ = await asyncio.to_thread(normalize_for_ocr, image_data)
+            except Exception as e:
+                # 손상된 이미지 등은 원본 그대로 전송
+                logger.warning(f"OCR 이미지 정규화 실패, 원본 전송: {str(e)}")
+        image_b64 = base64.b64encode(image_data).decode("utf-8")
+        try:
+            extraction_response = await self.openai.chat.completions.create(
+                model=OCR_MODEL,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": [
+                            {
+                                "type": "image_url",
+                                "image_url": {"url": f"data:application/octet-stream;base64,{image_b64}"}
+                            }
+                        ]
+                    }
+                ],
+                response_format={
+                    "type": "json_schema",
+                    "json_schema": schema
+                }
+            )
+        except Exception as e:
+            raise OcrError(f"Upstage API 호출 실패: {str(e)}")
+
+        if not extraction_response.choices or not extraction_response.choices[0].message.content:
+            raise OcrError("API 응답이 비어있습니다.")
+        try:
+            return json.loads(extraction_response.choices[0].message.content)
+        except json.JSONDecodeError as e:
+            raise OcrError(f"API 응답 JSON 파싱 실패: {str(e)}")
+
+
+# 전역 OCR 클라이언트 (main.py 시작/종료 이벤트에서 연결 풀 관리)
+ocr_client = OcrClient()
@@ -1,19 +1,81 @@
+import asyncio
+import hashlib
 import os
+import tempfile
+import uuid
+from dataclasses import dataclass
 from fastapi import UploadFile
-from typing import Optional
+from typing import AsyncIterator, BinaryIO, Optional, Tuple
 from pathlib import Path
 import logging
+import httpx
 from google.cloud import storage
+from services.blob_cache import BlobCache
 
 logger = logging.getLogger(__name__)
 
+# 업로드는 고정 크기 청크로 복사 (파일 크기와 관계없이 업로드당 메모리 사용량 일정)
+STORAGE_CHUNK_SIZE = int(os.getenv("STORAGE_CHUNK_SIZE", str(1024 * 1024)))
+# GCS 재개 가능 업로드 청크 크기 (256KB 배수)
+STORAGE_GCS_CHUNK_SIZE = int(os.getenv("STORAGE_GCS_CHUNK_SIZE", str(8 * 1024 * 1024)))
+# 최대 업로드 크기 (nginx client_max_body_size 와 맞춤), 복사 도중 넘으면 중단
+STORAGE_MAX_UPLOAD_MB = int(os.getenv("STORAGE_MAX_UPLOAD_MB", "50"))
+# GCS 문서 로컬 디스크 캐시 (OCR/위조분석/이미지 조회가 같은 객체를 다시 다운로드하지 않도록)
+STORAGE_CACHE_DIR = os.getenv("STORAGE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "storage_cache"))
+STORAGE_CACHE_MAX_MB = int(os.getenv("STORAGE_CACHE_MAX_MB", "1024"))
+# GCS 다운로드용 HTTP 연결 풀 (OCR 연결 풀과 별도)
+STORAGE_HTTP_MAX_CONNECTIONS = int(os.getenv("STORAGE_HTTP_MAX_CONNECTIONS", "20"))
+STORAGE_HTTP_CONNECT_TIMEOUT = float(os.getenv("STORAGE_HTTP_CONNECT_TIMEOUT", "5"))
+STORAGE_HTTP_READ_TIMEOUT = float(os.getenv("STORAGE_HTTP_READ_TIMEOUT", "60"))
+
+
+class UploadTooLarge(ValueError):
+    """최대 업로드 크기 초과"""
+
+
+@dataclass
+class StoredFile:
+    url: str  # 저장 경로 (로컬: uploads/..., GCS: 공개 URL)
+    sha256: str
+    size: int
+
+
+class _HashingReader:
+    """읽는 동안 SHA-256 과 크기를 계산하고 최대 크기를 넘으면 중단하는 파일 래퍼 (GCS 재시도 시 seek 지원)"""
+
+    def __init__(self, raw: BinaryIO, max_bytes: int):
+        self.raw = raw
+        self.max_bytes = max_bytes
+        self.digest = hashlib.sha256()
+        self.size = 0  # 해시에 반영된 바이트 수 (재전송으로 다시 읽은 부분은 제외)
+
+    def read(self, size: int = -1) -> bytes:
+        start = self.raw.tell()
+        chunk = self.raw.read(size)
+        end = start + len(chunk)
+        if end > self.size:
+            self.digest.update(chunk[self.size - start:])
+            self.size = end
+            if self.size > self.max_bytes:
+                raise UploadTooLarge(f"파일이 너무 큽니다. (최대 {self.max_bytes // (1024 * 1024)}MB)")
+        return chunk
+
+    def tell(self) -> int:
+        return self.raw.tell()
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        return self.raw.seek(offset, whence)
+
 class StorageService:
     """통합 스토리지 서비스 - GCS 및 로컬 파일 시스템 지원"""
     
-    def __init__(self):
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
         self.storage_type = os.getenv('STORAGE_TYPE', 'local')  # local, gcs
         self.gcs_bucket_name = os.getenv('GCS_BUCKET_NAME')
         self.gcs_credentials = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
+        self.cache = BlobCache(STORAGE_CACHE_DIR, STORAGE_CACHE_MAX_MB * 1024 * 1024)
+        self._transport = transport
+        self._http: Optional[httpx.AsyncClient] = None
         
         if self.storage_type == 'gcs':
             self.gcs_client = storage.Client()
@@ -22,40 +84,134 @@ class StorageService:
         else:
             logger.info("로컬 스토리지 사용")
     
-    async def upload_file(self, file: UploadFile, folder: str, filename: str) -> str:
-        """파일을 스토리지에 업로드"""
+    async def upload_file(self, file: UploadFile, folder: str, filename: str) -> StoredFile:
+        """
+        파일을 스토리지에 업로드 (청크 단위 스트리밍, 복사하면서 SHA-256/크기 계산)
+        최대 크기를 넘으면 UploadTooLarge 를 발생시키고 쓰던 파일은 남기지 않습니다.
+        """
+        reader = _HashingReader(file.file, STORAGE_MAX_UPLOAD_MB * 1024 * 1024)
         try:
+            reader.seek(0)
+            # 디스크/네트워크 쓰기가 이벤트 루프를 막지 않도록 워커 스레드에서 복사
             if self.storage_type == 'gcs':
-                return await self._upload_gcs(file, folder, filename)
+                url = await asyncio.to_thread(self._upload_gcs, reader, folder, filename, file.content_type)
             else:
-                return await self._upload_local(file, folder, filename)
+                url = await asyncio.to_thread(self._upload_local, reader, folder, filename)
         except Exception as e:
             logger.error(f"파일 업로드 실패: {str(e)}")
             raise
+        return StoredFile(url=url, sha256=reader.digest.hexdigest(), size=reader.size)
+    
+    async def hash_file(self, file: UploadFile) -> Tuple[str, int]:
+        """업로드 파일의 SHA-256 과 크기 (청크 단위로 읽음, 최대 크기를 넘으면 UploadTooLarge)"""
+        reader = _HashingReader(file.file, STORAGE_MAX_UPLOAD_MB * 1024 * 1024)
+
+        def consume():
+            reader.seek(0)
+            while reader.read(STORAGE_CHUNK_SIZE):
+                pass
+
+        await asyncio.to_thread(consume)
+        return reader.digest.hexdigest(), reader.size
     
-    async def _upload_local(self, file: UploadFile, folder: str, filename: str) -> str:
-        """로컬 파일 시스템에 업로드"""
+    def local_path(self, file_path: str, folder: str = "") -> str:
+        """
+        로컬 저장 파일 경로. image_url 이 uploads/ 로 시작하면 그대로,
+        아니면 (이전 방식으로 파일 이름만 저장된 경우) uploads/{folder}/ 아래로 봅니다.
+        """
+        if file_path.startswith("uploads/"):
+            return file_path
+        return os.path.join("uploads", folder, os.path.basename(file_path)) if folder else os.path.join("uploads", file_path)
+    
+    async def open_file(self, file_path: str, folder: str = "") -> BinaryIO:
+        """
+        저장된 문서 파일 열기 (호출한 쪽에서 닫음)
+        http(GCS) URL 은 로컬 디스크 캐시를 거쳐 읽고(없으면 스토리지 연결 풀로 다운로드해 캐시에 저장), 아니면 로컬 파일.
+        없으면 FileNotFoundError
+        """
+        if file_path.startswith('http'):
+            return await self.cache.fetch(file_path, lambda out: self._download(file_path, out))
+        return await asyncio.to_thread(open, self.local_path(file_path, folder), "rb")
+    
+    async def open_bytes(self, file_path: str, folder: str = "") -> bytes:
+        """저장된 문서 바이트 (OCR/위조분석)"""
+        f = await self.open_file(file_path, folder)
+        try:
+            return await asyncio.to_thread(f.read)
+        finally:
+            f.close()
+    
+    async def open_stream(self, file_path: str, folder: str = "",
+                          chunk_size: int = STORAGE_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """
+        저장된 문서를 청크 단위로 읽는 비동기 이터레이터 (이미지 응답)
+        파일은 여기서 바로 열므로 없는 파일은 응답을 시작하기 전에 FileNotFoundError 로 알 수 있습니다.
+        """
+        return self.stream_file(await self.open_file(file_path, folder), chunk_size=chunk_size)
+    
+    def stream_file(self, f: BinaryIO, start: int = 0, length: Optional[int] = None,
+                    chunk_size: int = STORAGE_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """열린 파일의 start 부터 length 바이트(없으면 끝까지)를 청크 단위로 읽는 비동기 이터레이터 (다 읽으면 파일을 닫음)"""
+        f.seek(start)
+        return _iter_file(f, chunk_size, length)
+    
+    def start(self) -> None:
+        """GCS 다운로드용 HTTP 연결 풀 생성 (앱 시작 시 한 번 호출)"""
+        if self._http is not None:
+            return
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=STORAGE_HTTP_MAX_CONNECTIONS),
+            timeout=httpx.Timeout(STORAGE_HTTP_READ_TIMEOUT, connect=STORAGE_HTTP_CONNECT_TIMEOUT),
+            transport=self._transport,
+        )
+    
+    async def close(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+        self._http = None
+    
+    @property
+    def http(self) -> httpx.AsyncClient:
+        # 시작 이벤트 없이 사용하는 경우(스크립트/테스트/파이프라인)를 위해 필요 시 생성
+        self.start()
+        return self._http
+    
+    async def _download(self, url: str, out: BinaryIO) -> None:
+        async with self.http.stream("GET", url) as response:
+            if response.status_code == 404:
+                raise FileNotFoundError(url)
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes(STORAGE_CHUNK_SIZE):
+                await asyncio.to_thread(out.write, chunk)
+    
+    def _upload_local(self, reader: _HashingReader, folder: str, filename: str) -> str:
+        """로컬 파일 시스템에 업로드 (임시 파일에 쓴 뒤 이름 변경)"""
         upload_dir = Path(f"./uploads/{folder}")
         upload_dir.mkdir(parents=True, exist_ok=True)
         
         file_path = upload_dir / filename
+        # 같은 내용(같은 파일 이름)이 동시에 업로드될 수 있으므로 임시 파일 이름은 업로드마다 다르게
+        temp_path = upload_dir / f".{filename}.{uuid.uuid4().hex}.part"
+        try:
+            with open(temp_path, "wb") as buffer:
+                for chunk in iter(lambda: reader.read(STORAGE_CHUNK_SIZE), b""):
+                    buffer.write(chunk)
+            os.replace(temp_path, file_path)
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
         
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        logger.info(f"로컬 업로드 완료: {file_path}")
+        logger.info(f"로컬 업로드 완료: {file_path} ({reader.size} bytes)")
         return f"uploads/{folder}/{filename}"
     
-    async def _upload_gcs(self, file: UploadFile, folder: str, filename: str) -> str:
-        """Google Cloud Storage에 업로드"""
+    def _upload_gcs(self, reader: _HashingReader, folder: str, filename: str, content_type: Optional[str]) -> str:
+        """Google Cloud Storage에 재개 가능(resumable) 업로드로 청크 단위 전송 (중단되면 객체가 만들어지지 않음)"""
         key = f"{folder}/{filename}"
-        content = await file.read()
-        blob = self.bucket.blob(key)
-        blob.upload_from_string(content, content_type=file.content_type)
+        blob = self.bucket.blob(key, chunk_size=STORAGE_GCS_CHUNK_SIZE)
+        blob.upload_from_file(reader, content_type=content_type)
         # GCS 퍼블릭 URL
         gcs_url = f"https://storage.googleapis.com/{self.gcs_bucket_name}/{key}"
-        logger.info(f"GCS 업로드 완료: {gcs_url}")
+        logger.info(f"GCS 업로드 완료: {gcs_url} ({reader.size} bytes)")
         return gcs_url
     
     def get_file_url(self, file_path: str) -> str:
@@ -78,10 +234,11 @@ class StorageService:
                     key = file_path
                 blob = self.bucket.blob(key)
                 blob.delete()
+                self.cache.discard(self.get_file_url(key))
                 logger.info(f"GCS 파일 삭제 완료: {key}")
                 return True
             else:
-                local_path = Path(f"./uploads/{file_path}")
+                local_path = Path(self.local_path(file_path))
                 if local_path.exists():
                     local_path.unlink()
                     logger.info(f"로컬 파일 삭제 완료: {local_path}")
@@ -103,11 +260,24 @@ class StorageService:
                 blob = self.bucket.blob(key)
                 return blob.exists()
             else:
-                local_path = Path(f"./uploads/{file_path}")
+                local_path = Path(self.local_path(file_path))
                 return local_path.exists()
         except Exception as e:
             logger.error(f"파일 존재 확인 실패: {str(e)}")
             return False
 
+async def _iter_file(f: BinaryIO, chunk_size: int, length: Optional[int] = None) -> AsyncIterator[bytes]:
+    try:
+        remaining = length
+        while remaining is None or remaining > 0:
+            chunk = await asyncio.to_thread(f.read, chunk_size if remaining is None else min(chunk_size, remaining))
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
 # 전역 스토리지 서비스 인스턴스
 storage_service = StorageService() 
\ No newline at end of file
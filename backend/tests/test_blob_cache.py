@@ -0,0 +1,86 @@
+import asyncio
+import os
+
+from services.blob_cache import BlobCache
+
+
+def make_download(data: bytes, calls: list):
+    async def download(out):
+        calls.append(len(data))
+        await asyncio.sleep(0.01)
+        out.write(data)
+    return download
+
+
+def test_fetch_downloads_once_and_serves_from_disk(tmp_path):
+    cache = BlobCache(str(tmp_path / "cache"), max_bytes=10000)
+    calls = []
+
+    async def run():
+        # 같은 객체를 동시에 요청해도 다운로드는 한 번
+        files = await asyncio.gather(*[cache.fetch("https://gcs/a.jpg", make_download(b"a" * 100, calls))
+                                       for _ in range(3)])
+        data = [f.read() for f in files]
+        for f in files:
+            f.close()
+        return data
+
+    assert asyncio.run(run()) == [b"a" * 100] * 3
+    assert calls == [100]
+    stats = cache.stats()
+    assert (stats["misses"], stats["hits"], stats["bytes"]) == (1, 2, 100)
+
+    # 재시작 후에도 디스크의 파일을 그대로 사용
+    restarted = BlobCache(str(tmp_path / "cache"), max_bytes=10000)
+    f = asyncio.run(restarted.fetch("https://gcs/a.jpg", make_download(b"b", calls)))
+    assert f.read() == b"a" * 100
+    f.close()
+    assert calls == [100]
+
+
+def test_evicts_least_recently_used_by_bytes(tmp_path):
+    cache = BlobCache(str(tmp_path), max_bytes=250)
+    calls = []
+
+    async def fetch(url, size):
+        f = await cache.fetch(url, make_download(b"x" * size, calls))
+        f.close()
+
+    async def run():
+        await fetch("a", 100)
+        await fetch("b", 100)
+        await fetch("a", 100)  # a 를 최근 사용으로
+        await fetch("c", 100)  # 용량 초과 → b 삭제
+
+    asyncio.run(run())
+    assert calls == [100, 100, 100]
+    assert not os.path.exists(cache.path(cache.key("b")))
+    assert os.path.exists(cache.path(cache.key("a")))
+    assert cache.stats()["bytes"] == 200
+
+    cache.discard("a")
+    assert cache.stats()["entries"] == 1
+
+
+def test_workers_share_cache_dir(tmp_path):
+    # uvicorn --workers 처럼 같은 디렉터리를 쓰는 캐시 인스턴스 둘
+    first = BlobCache(str(tmp_path), max_bytes=250)
+    second = BlobCache(str(tmp_path), max_bytes=250)
+    calls = []
+
+    async def fetch(cache, url, size):
+        f = await cache.fetch(url, make_download(b"x" * size, calls))
+        f.close()
+
+    async def run():
+        # 동시에 요청해도 잠금 파일로 한 워커만 다운로드
+        await asyncio.gather(fetch(first, "a", 100), fetch(second, "a", 100))
+        await fetch(second, "b", 100)
+        os.utime(first.path(first.key("a")), (0, 0))  # a 가 가장 오래 사용하지 않은 파일
+        await fetch(first, "c", 100)  # 두 워커의 파일을 합쳐 용량 초과 → a 삭제
+
+    asyncio.run(run())
+    assert calls == [100, 100, 100]
+    assert (first.misses, first.hits, second.misses, second.hits) == (2, 0, 1, 1)
+    assert not os.path.exists(first.path(first.key("a")))
+    assert first.stats()["bytes"] == second.stats()["bytes"] == 200
@@ -0,0 +1,111 @@
+import pickle
+import re
+from datetime import date
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models.database import Base
+from models.models import Claim, InsuranceClause, MedicalDiagnosis, MedicalReceipt
+from services.benefit_ledger import period_key
+from services.claim_calculator import ClaimCalculator, _rate_job, calculation_fingerprint, rate_with_clauses
+from services.claim_snapshots import DiagnosisSnapshot, RatingJob, ReceiptSnapshot, snapshot_clauses
+from services.clause_rules import get_rule_engine
+
+
+def make_inputs(**diagnosis_overrides):
+    diagnosis = SimpleNamespace(patient_name="홍길동", diagnosis_name="폐렴", diagnosis_text="항생제 치료",
+                                icd_code="J18.9", admission_days=3, hospital_name="서울병원",
+                                diagnosis_date=date(2025, 1, 3))
+    for key, value in diagnosis_overrides.items():
+        setattr(diagnosis, key, value)
+    receipt = SimpleNamespace(total_amount=500000, treatment_details="기본 진찰료", receipt_date=date(2025, 1, 5))
+    clauses = [SimpleNamespace(id=1, clause_name="질병입원일당", category="입원", per_unit=50000, max_total=500000)]
+    return diagnosis, receipt, clauses
+
+
+def test_fingerprint_ignores_fields_calculator_does_not_read():
+    base = calculation_fingerprint(*make_inputs(), "rules-v1")
+    assert calculation_fingerprint(*make_inputs(hospital_name="부산병원"), "rules-v1") == base
+
+
+def test_fingerprint_changes_with_calculation_inputs():
+    base = calculation_fingerprint(*make_inputs(), "rules-v1")
+    assert calculation_fingerprint(*make_inputs(admission_days=4), "rules-v1") != base
+    assert calculation_fingerprint(*make_inputs(), "rules-v2") != base
+
+    # 날짜가 바뀌면 누적 한도 기간이 바뀔 수 있음
+    diagnosis, receipt, clauses = make_inputs()
+    receipt.receipt_date = date(2024, 12, 30)
+    assert calculation_fingerprint(diagnosis, receipt, clauses, "rules-v1") != base
+    assert calculation_fingerprint(*make_inputs(diagnosis_date=date(2024, 12, 1)), "rules-v1") != base
+
+    diagnosis, receipt, clauses = make_inputs()
+    clauses[0].per_unit = 60000
+    assert calculation_fingerprint(diagnosis, receipt, clauses, "rules-v1") != base
+
+
+def test_limit_period_key_uses_treatment_year():
+    engine = get_rule_engine()
+    diagnosis, receipt, clauses = make_inputs(diagnosis_date=date(2024, 3, 2))
+    receipt.receipt_date = date(2025, 1, 5)
+    assert period_key(engine.limit_period(clauses[0]), receipt, diagnosis) == "2025"
+
+    cancer = SimpleNamespace(id=2, clause_name="암진단비", category="진단", per_unit=1000000, max_total=1000000)
+    assert period_key(engine.limit_period(cancer), receipt, diagnosis) == "lifetime"
+
+
+def test_rating_runs_on_picklable_snapshots():
+    diagnosis, receipt, clauses = make_inputs(diagnosis_date=date(2025, 1, 3))
+    receipt.receipt_date = date(2025, 1, 5)
+    job = RatingJob(7, snapshot_clauses(clauses), DiagnosisSnapshot.from_orm(diagnosis),
+                    ReceiptSnapshot.from_orm(receipt))
+
+    claim_id, payouts = _rate_job(pickle.loads(pickle.dumps(job)))
+    assert claim_id == 7
+    assert [(p.clause.id, p.amount) for p in payouts] == [(1, 150000)]
+    assert payouts == rate_with_clauses(job.clauses, diagnosis, receipt, get_rule_engine()["clause"])
+
+
+def test_recalculation_locks_claim_before_reading_previous_payouts():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    diagnosis = MedicalDiagnosis(user_id=1, patient_name="홍길동", patient_ssn="900101-1000000",
+                                 diagnosis_name="폐렴", diagnosis_date=date(2025, 1, 3), diagnosis_text="항생제 치료",
+                                 hospital_name="서울병원", doctor_name="", icd_code="J18.9", admission_days=3)
+    receipt = MedicalReceipt(user_id=1, patient_name="홍길동", receipt_date=date(2025, 1, 5),
+                             total_amount=500000, hospital_name="서울병원")
+    clause = InsuranceClause(product_id=1, clause_code="C1", clause_name="질병입원일당", category="입원",
+                             per_unit=50000, max_total=500000, unit_type="amount")
+    db.add_all([diagnosis, receipt, clause])
+    db.flush()
+    claim = Claim(user_id=1, patient_name="홍길동", patient_ssn="900101-1000000", diagnosis_id=diagnosis.id,
+                  receipt_id=receipt.id, claim_amount=0, claim_reason="")
+    db.add(claim)
+    db.commit()
+    calculator = ClaimCalculator(db)
+    calculator.calculate_claim_with_clauses(claim.id, [clause])
+
+    statements = []
+
+    @event.listens_for(db, "do_orm_execute")
+    def record(state):
+        if state.is_select:
+            table = re.search(r"FROM (\w+)", str(state.statement)).group(1)
+            statements.append((table, state.statement._for_update_arg is not None))
+
+    result = calculator.calculate_claim_with_clauses(claim.id, [clause], force=True)
+    assert result["total_amount"] == 150000
+    assert claim.calc_fingerprint is not None
+
+    # 기존 지급분(claim_calculations) 은 청구 행을 잠근 뒤에 읽어야 함
+    locked = statements.index(("claims", True))
+    assert statements.index(("claim_calculations", False)) > locked
+
+    # 다른 방식으로 계산하면 fingerprint 를 지워서 다음 계산 때 그 결과를 재사용하지 않음
+    calculator.calculate_claim_with_subscriptions(claim.id, [SimpleNamespace(clause=clause)])
+    assert claim.calc_fingerprint is None
+    assert calculator.calculate_claim_with_clauses(claim.id, [clause])["recalculated"] is True
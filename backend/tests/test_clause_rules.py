@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+
+import pytest
+
+from services.clause_rules import RuleEngine, RuleError, get_rule_engine
+
+
+def make_clause(name, category, per_unit=100000, max_total=1000000):
+    return SimpleNamespace(id=1, clause_name=name, category=category,
+                           per_unit=per_unit, max_total=max_total)
+
+
+def make_diagnosis(name="감기", text="", icd_code="", admission_days=0):
+    return SimpleNamespace(diagnosis_name=name, diagnosis_text=text,
+                           icd_code=icd_code, admission_days=admission_days)
+
+
+@pytest.fixture
+def clause_rules():
+    return get_rule_engine()["clause"]
+
+
+def test_cancer_clause_requires_cancer_diagnosis(clause_rules):
+    clause = make_clause("암진단비", "진단")
+    receipt = SimpleNamespace(total_amount=50000)
+    assert clause_rules.is_applicable(clause, make_diagnosis("위암"), receipt)
+    assert not clause_rules.is_applicable(clause, make_diagnosis("감기"), receipt)
+
+
+def test_admission_payout_is_capped(clause_rules):
+    clause = make_clause("질병입원일당", "입원", per_unit=50000, max_total=200000)
+    diagnosis = make_diagnosis("폐렴", admission_days=10)
+    receipt = SimpleNamespace(total_amount=3000000)
+    amount, logic = clause_rules.evaluate(clause, diagnosis, receipt)
+    assert amount == 200000
+    assert "10일" in logic
+
+
+def test_outpatient_clause_not_applicable_when_admitted(clause_rules):
+    clause = make_clause("질병통원비", "통원", per_unit=30000)
+    receipt = SimpleNamespace(total_amount=10000)
+    assert clause_rules.evaluate(clause, make_diagnosis(admission_days=2), receipt) is None
+    amount, _ = clause_rules.evaluate(clause, make_diagnosis(), receipt)
+    assert amount == 10000
+
+
+def test_injury_clause_uses_icd_prefix(clause_rules):
+    clause = make_clause("상해치료비", "기타")
+    receipt = SimpleNamespace(total_amount=10000)
+    assert clause_rules.is_applicable(clause, make_diagnosis(icd_code="s52.5"), receipt)
+    assert not clause_rules.is_applicable(clause, make_diagnosis(icd_code="J00"), receipt)
+
+
+def test_category_ruleset_treatment_fallthrough():
+    rules = get_rule_engine()["category"]
+    clause = make_clause("입원통원의료비", "입원", per_unit=40000, max_total=120000)
+    receipt = SimpleNamespace(total_amount=25000)
+    amount, logic = rules.evaluate(clause, make_diagnosis(admission_days=5), receipt)
+    assert amount == 120000 and logic.startswith("입원")
+    amount, logic = rules.evaluate(clause, make_diagnosis(), receipt)
+    assert amount == 25000 and logic.startswith("외래")
+
+
+def test_invalid_rule_table_is_rejected():
+    with pytest.raises(RuleError):
+        RuleEngine({"rulesets": {"x": {"payouts": [{"formula": "unknown"}]}}})
@@ -0,0 +1,149 @@
+import asyncio
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models.database import Base
+from models.models import DocumentJob, MedicalDiagnosis
+from services.document_pipeline import DocumentPipeline, describe_job
+
+STAGE_DELAY = 0.3
+
+
+class FakePipeline(DocumentPipeline):
+    """이미지 읽기/OCR/위조분석을 지연만 흉내내는 파이프라인"""
+
+    def __init__(self, session_factory, fail_forgery=False):
+        super().__init__(session_factory, concurrency=4, forgery_workers=4)
+        self.fail_forgery = fail_forgery
+
+    async def read_image(self, document_type, image_url):
+        return b"image"
+
+    async def ocr_stage(self, document_type, document_id, image_data):
+        await asyncio.sleep(STAGE_DELAY)
+        return {}
+
+    async def forgery_stage(self, document_type, document_id, image_data):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, time.sleep, STAGE_DELAY)
+        if self.fail_forgery:
+            raise RuntimeError("모델 오류")
+        return {}
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    # DB 작업은 스레드에서 실행되므로 연결을 공유하지 않는 파일 DB 사용 (스레드마다 별도 연결)
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, autoflush=False)
+    with factory() as db:
+        for _ in range(4):
+            db.add(MedicalDiagnosis(user_id=1, patient_name="", patient_ssn="", diagnosis_name="",
+                                    diagnosis_date=date(2024, 7, 1), diagnosis_text="", hospital_name="",
+                                    doctor_name="", icd_code="", admission_days=0, image_url="diagnosis/a.jpg"))
+        db.commit()
+    return factory
+
+
+async def run_jobs(pipeline, session_factory):
+    with session_factory() as db:
+        job_ids = [pipeline.submit(db, "diagnosis", document_id).id for document_id in range(1, 5)]
+    await pipeline.wait()
+    await pipeline.close()
+    with session_factory() as db:
+        return [describe_job(db.get(DocumentJob, job_id)) for job_id in job_ids]
+
+
+@pytest.mark.asyncio
+async def test_stages_overlap_across_documents(session_factory):
+    start = time.perf_counter()
+    jobs = await run_jobs(FakePipeline(session_factory), session_factory)
+    elapsed = time.perf_counter() - start
+
+    # 문서 4개 × (OCR + 위조분석) 을 순서대로 하면 2.4초
+    assert elapsed < STAGE_DELAY * 3
+    for job in jobs:
+        assert job["status"] == "completed"
+        for stage in ("ocr", "forgery"):
+            assert job["stages"][stage]["status"] == "completed"
+            assert job["stages"][stage]["duration_ms"] >= STAGE_DELAY * 1000 * 0.9
+
+
+@pytest.mark.asyncio
+async def test_failed_stage_is_recorded(session_factory):
+    jobs = await run_jobs(FakePipeline(session_factory, fail_forgery=True), session_factory)
+    for job in jobs:
+        assert job["status"] == "failed"
+        assert job["stages"]["ocr"]["status"] == "completed"
+        assert job["stages"]["forgery"]["status"] == "failed"
+        assert job["stages"]["forgery"]["error"] == "모델 오류"
+
+
+class CountingPipeline(FakePipeline):
+    def __init__(self, session_factory, runs):
+        super().__init__(session_factory)
+        self.runs = runs
+
+    async def ocr_stage(self, document_type, document_id, image_data):
+        self.runs.append(document_id)
+        return await super().ocr_stage(document_type, document_id, image_data)
+
+
+@pytest.mark.asyncio
+async def test_unfinished_jobs_run_once_across_workers(session_factory):
+    with session_factory() as db:
+        db.add(DocumentJob(document_type="diagnosis", document_id=1, status="queued"))
+        # 다른 워커가 실행 중 (heartbeat 최신) → 가져가지 않음
+        db.add(DocumentJob(document_type="diagnosis", document_id=2, status="running", owner="other",
+                           heartbeat_at=datetime.now(timezone.utc)))
+        # 죽은 워커의 작업 (lease 만료) → 한 워커만 다시 실행
+        db.add(DocumentJob(document_type="diagnosis", document_id=3, status="running", owner="dead",
+                           heartbeat_at=datetime.now(timezone.utc) - timedelta(hours=1)))
+        db.commit()
+
+    # uvicorn --workers 처럼 같은 DB 를 보는 워커 여러 개가 동시에 시작
+    runs = []
+    workers = [CountingPipeline(session_factory, runs) for _ in range(4)]
+    for worker in workers:
+        await worker.resume()
+    for worker in workers:
+        await worker.wait()
+        await worker.close()
+
+    assert sorted(runs) == [1, 3]
+    with session_factory() as db:
+        jobs = {job.document_id: job for job in db.query(DocumentJob)}
+    assert jobs[1].status == jobs[3].status == "completed"
+    assert jobs[1].owner in {worker.owner for worker in workers}
+    assert (jobs[2].status, jobs[2].owner) == ("running", "other")
+
+
+@pytest.mark.asyncio
+async def test_start_does_not_query_db_and_sweeper_resumes(session_factory):
+    def unreachable():
+        raise RuntimeError("DB 연결 실패")
+
+    # DB 가 없어도 시작 이벤트는 실패하지 않음 (확인 작업이 오류를 기록하고 다음 주기에 재시도)
+    pipeline = FakePipeline(unreachable)
+    pipeline.start()
+    await asyncio.sleep(0.05)
+    await pipeline.close()
+
+    with session_factory() as db:
+        db.add(DocumentJob(document_type="diagnosis", document_id=1, status="queued"))
+        db.commit()
+    pipeline = FakePipeline(session_factory)
+    pipeline.start()
+    for _ in range(50):
+        await asyncio.sleep(0.05)
+        if pipeline._tasks:
+            break
+    await pipeline.wait()
+    await pipeline.close()
+    with session_factory() as db:
+        assert db.query(DocumentJob).one().status == "completed"
@@ -0,0 +1,66 @@
+import asyncio
+import os
+from io import BytesIO
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from starlette.datastructures import UploadFile
+
+from models.database import Base
+from models.models import Document, MedicalReceipt
+from services.document_store import delete_unreferenced, release, store_upload
+
+
+def test_upload_dedup_and_refcounted_delete(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine, tables=[Document.__table__])
+    db = sessionmaker(bind=engine)()
+    data = os.urandom(4096)
+
+    first, deduplicated = asyncio.run(store_upload(db, UploadFile(BytesIO(data), filename="a.jpg"), "jpg"))
+    db.commit()
+    assert not deduplicated
+    assert first.storage_url == f"uploads/documents/{first.sha256}.jpg"
+    assert (tmp_path / first.storage_url).read_bytes() == data
+
+    # 진단서/영수증 행 저장이 실패해 롤백되면 참조도 늘지 않음
+    asyncio.run(store_upload(db, UploadFile(BytesIO(data), filename="b.jpg"), "jpg"))
+    db.rollback()
+    assert db.get(Document, first.id).ref_count == 1
+
+    second, deduplicated = asyncio.run(store_upload(db, UploadFile(BytesIO(data), filename="b.jpg"), "jpg"))
+    db.commit()
+    assert deduplicated and second.id == first.id
+    assert db.get(Document, first.id).ref_count == 2
+    assert len(os.listdir(tmp_path / "uploads" / "documents")) == 1
+
+    # 참조가 남아 있으면 파일 유지, 마지막 참조가 해제되면 파일과 행 삭제
+    receipts = [MedicalReceipt(document_id=first.id), MedicalReceipt(document_id=first.id)]
+    assert release(db, receipts[0]) is None
+    db.commit()
+    assert (tmp_path / first.storage_url).exists()
+
+    # 삭제가 롤백되면 파일과 참조 수 모두 그대로
+    assert release(db, receipts[1]) == first.id
+    assert (tmp_path / first.storage_url).exists()
+    db.rollback()
+    assert db.get(Document, first.id).ref_count == 1
+
+    # 커밋 전에 같은 파일이 다시 업로드되면 (참조 수가 다시 늘면) 파일 유지
+    receipts[1].document_id = first.id
+    assert release(db, receipts[1]) == first.id
+    db.commit()
+    asyncio.run(store_upload(db, UploadFile(BytesIO(data), filename="c.jpg"), "jpg"))
+    db.commit()
+    assert delete_unreferenced(db, first.id) is False
+    assert (tmp_path / first.storage_url).exists()
+
+    # 마지막 참조 해제가 커밋된 뒤에 파일과 행 삭제
+    receipt = MedicalReceipt(document_id=first.id)
+    assert release(db, receipt) == first.id
+    db.commit()
+    assert delete_unreferenced(db, first.id) is True
+    assert not (tmp_path / first.storage_url).exists()
+    assert db.query(Document).count() == 0
@@ -30,4 +30,62 @@ def test_forgery_analysis_success(client, create_valid_diagnosis_and_receipt):
     data = {"diagnosis_id": diagnosis_id, "receipt_id": receipt_id}
     response = client.post("/api/v1/forgery_analysis", json=data)
     assert response.status_code in [200, 201]
-    # 추가적으로 응답 데이터 구조 검증 가능
\ No newline at end of file
+    # 추가적으로 응답 데이터 구조 검증 가능
+
+def test_forgery_model_loads_lazily_with_warmup(tmp_path, monkeypatch):
+    import torch
+    from torchvision import models
+    from services import forgery_detector
+
+    model = models.resnet18()
+    model.fc = torch.nn.Linear(model.fc.in_features, 2)
+    weights = tmp_path / "resnet18_ela.pth"
+    torch.save(model.state_dict(), weights)
+
+    monkeypatch.setattr(forgery_detector, "_model", None)
+    monkeypatch.setattr(forgery_detector, "model_status", {"state": "not_loaded"})
+    monkeypatch.setattr(forgery_detector, "FORGERY_MODEL_PATH", str(tmp_path / "missing.pth"))
+    with pytest.raises(RuntimeError):
+        forgery_detector.load_model()
+    assert forgery_detector.model_status["state"] == "failed"
+    assert not forgery_detector.is_ready()
+
+    monkeypatch.setattr(forgery_detector, "FORGERY_MODEL_PATH", str(weights))
+    result = forgery_detector.predict_batch(torch.zeros(2, 3, 224, 224))
+    assert len(result) == 2
+    assert forgery_detector.is_ready()
+    assert forgery_detector.model_status["state"] == "ready"
+    assert forgery_detector.model_status["warmup_seconds"] is not None
+
+def test_onnx_backend_matches_torch(tmp_path):
+    import torch
+    from services import forgery_detector
+
+    model = forgery_detector.build_resnet().eval()
+    onnx_path = tmp_path / "resnet18_ela.onnx"
+    torch.onnx.export(model, torch.zeros(1, 3, 224, 224), str(onnx_path),
+                      input_names=["input"], output_names=["logits"],
+                      dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}}, opset_version=17, dynamo=False)
+
+    onnx_model = forgery_detector.load_backend("onnx", str(onnx_path))
+    batch = torch.randn(3, 3, 224, 224)
+    with torch.no_grad():
+        assert torch.allclose(model(batch), onnx_model(batch), atol=1e-4)
+    with pytest.raises(ValueError):
+        forgery_detector.load_backend("tensorrt")
+
+def test_tile_batch_bounds_tile_count():
+    from PIL import Image
+    from services import forgery_detector
+
+    tiles, grid = forgery_detector.tile_batch(Image.new("RGB", (2480, 3508)), tile_size=224, overlap=0.25, max_tiles=64)
+    assert tiles.shape[1:] == (3, 224, 224)
+    assert len(tiles) == grid["rows"] * grid["cols"] <= 64
+    assert grid["scale"] < 1
+
+    tiles, grid = forgery_detector.tile_batch(Image.new("RGB", (600, 300)), tile_size=224, overlap=0.25, max_tiles=64)
+    assert (grid["rows"], grid["cols"], grid["scale"]) == (2, 4, 1.0)
+    assert grid["positions"][-1] == (600 - 224, 300 - 224)  # 마지막 타일은 이미지 끝에 맞춤
+
+    tiles, grid = forgery_detector.tile_batch(Image.new("RGB", (100, 50)), tile_size=224, overlap=0.25, max_tiles=64)
+    assert tiles.shape == (1, 3, 224, 224)
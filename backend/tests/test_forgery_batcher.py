@@ -0,0 +1,35 @@
+import threading
+
+import pytest
+import torch
+
+from services.forgery_batcher import ForgeryBatcher
+
+
+def test_concurrent_requests_share_one_forward():
+    batch_sizes = []
+
+    def run_batch(batch):
+        batch_sizes.append(len(batch))
+        return [{"value": float(tensor.sum())} for tensor in batch]
+
+    batcher = ForgeryBatcher(run_batch, max_batch_size=8, max_wait_ms=200)
+    futures = [batcher.submit(torch.full((3, 2, 2), float(i))) for i in range(8)]
+    results = [future.result(timeout=5) for future in futures]
+    batcher.close()
+
+    # 요청마다 자기 입력의 결과를 받음
+    assert [result["value"] for result in results] == [12.0 * i for i in range(8)]
+    assert batch_sizes == [8]
+
+
+def test_batch_error_is_raised_to_every_caller():
+    def run_batch(batch):
+        raise RuntimeError("forward 실패")
+
+    batcher = ForgeryBatcher(run_batch, max_batch_size=4, max_wait_ms=50)
+    futures = [batcher.submit(torch.zeros(3, 2, 2)) for _ in range(2)]
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=5)
+    batcher.close()
@@ -0,0 +1,83 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models.database import Base
+from models.models import ForgeryResultCache
+from services import forgery_cache, forgery_service
+
+
+def make_session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine, tables=[ForgeryResultCache.__table__])
+    return sessionmaker(bind=engine)()
+
+
+def test_cache_reuses_hits_and_invalidates_on_model_change(monkeypatch):
+    analyzed = []
+
+    def fake_analyze(images, timings=None):
+        analyzed.append(list(images))
+        return [{"is_forged": True, "confidence": 0.9, "predicted_class": "forged"} for _ in images]
+
+    monkeypatch.setattr(forgery_service, "analyze_forgery_from_bytes_list", fake_analyze)
+    monkeypatch.setattr(forgery_cache, "current_version", lambda: "torch-aaaa")
+    db = make_session()
+
+    results = forgery_cache.analyze_cached(db, [b"diagnosis", b"receipt", b"diagnosis"])
+    db.commit()
+    assert [cached for _, cached in results] == [False, False, False]
+    assert analyzed == [[b"diagnosis", b"receipt"]]  # 중복 이미지는 한 번만 추론
+
+    results = forgery_cache.analyze_cached(db, [b"diagnosis", b"new"])
+    db.commit()
+    assert [cached for _, cached in results] == [True, False]
+    assert results[0][0] == {"is_forged": True, "confidence": 0.9, "predicted_class": "forged"}
+    assert analyzed[-1] == [b"new"]
+
+    # 모델이 바뀌면 이전 결과는 쓰지 않고, 정리 때 삭제
+    monkeypatch.setattr(forgery_cache, "current_version", lambda: "torch-bbbb")
+    results = forgery_cache.analyze_cached(db, [b"diagnosis"])
+    db.commit()
+    assert results[0][1] is False
+    assert forgery_cache.evict(db, "torch-bbbb") == 3
+    assert db.query(ForgeryResultCache).count() == 1
+
+
+def test_concurrent_store_of_same_image_overwrites(monkeypatch):
+    db = make_session()
+    result = {"is_forged": False, "confidence": 0.8, "predicted_class": "authentic"}
+    forgery_cache.store(db, "abc", "torch-aaaa", result)
+
+    # 다른 요청이 먼저 저장한 행이 조회 시점에는 보이지 않았던 경우 (동시 미스)
+    find = forgery_cache._find
+    lookups = []
+
+    def racing_find(session, digest, version):
+        lookups.append(digest)
+        return None if len(lookups) == 1 else find(session, digest, version)
+
+    monkeypatch.setattr(forgery_cache, "_find", racing_find)
+    forgery_cache.store(db, "abc", "torch-aaaa", dict(result, confidence=0.7), commit=False)
+    db.commit()
+    assert db.query(ForgeryResultCache).count() == 1
+    assert db.query(ForgeryResultCache).one().confidence == 0.7
+
+
+def test_evict_runs_after_caller_commits(monkeypatch):
+    monkeypatch.setattr(forgery_service, "analyze_forgery_from_bytes_list",
+                        lambda images, timings=None: [{"is_forged": False, "confidence": 0.8,
+                                                       "predicted_class": "authentic"} for _ in images])
+    monkeypatch.setattr(forgery_cache, "current_version", lambda: "torch-aaaa")
+    monkeypatch.setattr(forgery_cache, "FORGERY_CACHE_EVICT_EVERY", 2)
+    monkeypatch.setattr(forgery_cache, "FORGERY_CACHE_MAX_ENTRIES", 1)
+    monkeypatch.setattr(forgery_cache, "_stores_since_evict", 0)
+    db = make_session()
+
+    forgery_cache.analyze_cached(db, [b"a"])
+    db.commit()
+    assert forgery_cache.evict_if_due(db) == 0
+    forgery_cache.analyze_cached(db, [b"b"])
+    db.commit()
+    assert forgery_cache.evict_if_due(db) == 1
+    assert db.query(ForgeryResultCache).count() == 1
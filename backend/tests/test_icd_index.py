@@ -0,0 +1,51 @@
+from types import SimpleNamespace
+
+import pytest
+
+from services.icd_index import DiagnosisClassifier, IcdIndex, normalize_code
+
+
+@pytest.fixture
+def index():
+    return IcdIndex({
+        "암": ["C00-D48"],
+        "뇌": ["I60-I69"],
+        "골절": ["S52", "M84.3"],
+        "상해": ["S00-T98"],
+    })
+
+
+def test_normalize_code():
+    assert normalize_code(" c16.9 ") == "C169"
+    assert normalize_code(None) == ""
+
+
+def test_range_spans_letters(index):
+    assert index.lookup("C16.9") == {"암"}
+    assert index.lookup("D09") == {"암"}
+    assert index.lookup("D49") == frozenset()
+    assert index.lookup("I63.9") == {"뇌"}
+    assert index.lookup("I70") == frozenset()
+
+
+def test_overlapping_groups_and_subcategories(index):
+    assert index.lookup("S52.5") == {"골절", "상해"}
+    assert index.lookup("S93.4") == {"상해"}
+    assert index.lookup("M84.37") == {"골절"}
+    assert index.lookup("M84.0") == frozenset()
+
+
+def test_invalid_range_is_rejected():
+    with pytest.raises(ValueError):
+        IcdIndex({"암": ["D48-C00"]})
+    with pytest.raises(ValueError):
+        IcdIndex({"암": ["암"]})
+
+
+def test_classifier_falls_back_to_name_keywords(index):
+    classifier = DiagnosisClassifier(index, {"암": ("암", "cancer"), "골절": ("골절",)})
+    # ICD 코드가 우선
+    assert classifier.classify(SimpleNamespace(icd_code="S52.5", diagnosis_name="위암")) == {"골절", "상해"}
+    # 코드가 없거나 분류되지 않으면 진단명 키워드
+    assert classifier.classify(SimpleNamespace(icd_code="", diagnosis_name="위암")) == {"암"}
+    assert classifier.classify(SimpleNamespace(icd_code="K29.7", diagnosis_name="요골 골절")) == {"골절"}
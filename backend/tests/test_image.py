@@ -0,0 +1,77 @@
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+from types import SimpleNamespace
+
+from starlette.requests import Request
+
+from api import image
+from api.image import document_response, parse_range
+
+
+def make_request(**headers):
+    return Request({"type": "http", "method": "GET", "path": "/",
+                    "headers": [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()]})
+
+
+async def respond(record, **headers):
+    response = await document_response(make_request(**headers), None, record, "receipts")
+    body = b""
+    if hasattr(response, "body_iterator"):
+        async for chunk in response.body_iterator:
+            body += chunk
+    return response, body
+
+
+def test_image_etag_and_range(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    data = os.urandom(5000)
+    sha256 = hashlib.sha256(data).hexdigest()
+    os.makedirs("uploads/documents")
+    with open(f"uploads/documents/{sha256}.pdf", "wb") as f:
+        f.write(data)
+    record = SimpleNamespace(image_url=f"uploads/documents/{sha256}.pdf", document_id=None)
+
+    response, body = asyncio.run(respond(record))
+    assert response.status_code == 200 and body == data
+    assert response.headers["etag"] == f'"{sha256}"'
+    assert response.headers["content-type"] == "application/pdf"
+
+    # 같은 ETag 로 재요청하면 본문 없이 304
+    response, body = asyncio.run(respond(record, if_none_match=f'"other", "{sha256}"'))
+    assert response.status_code == 304 and body == b""
+    # 프록시가 약한 ETag 로 바꿔 보내도 304
+    response, _ = asyncio.run(respond(record, if_none_match=f'W/"{sha256}"'))
+    assert response.status_code == 304
+
+    response, body = asyncio.run(respond(record, range="bytes=1000-1999"))
+    assert response.status_code == 206 and body == data[1000:2000]
+    assert response.headers["content-range"] == "bytes 1000-1999/5000"
+
+    # If-Range 가 다르면 (파일이 바뀐 경우) 전체 응답
+    response, body = asyncio.run(respond(record, range="bytes=0-9", if_range='"old"'))
+    assert response.status_code == 200 and body == data
+
+    response, _ = asyncio.run(respond(record, range="bytes=6000-"))
+    assert response.status_code == 416 and response.headers["content-range"] == "bytes */5000"
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-", 100) == (0, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=50-500", 100) == (50, 99)
+    assert parse_range("bytes=0-1,5-6", 100) is None
+
+
+def test_legacy_file_hashes_are_bounded(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(image, "IMAGE_HASH_CACHE_SIZE", 2)
+    monkeypatch.setattr(image, "_legacy_hashes", OrderedDict())
+    os.makedirs("uploads/receipts")
+    for name in ("a", "b", "c"):
+        with open(f"uploads/receipts/{name}.jpg", "wb") as f:
+            f.write(name.encode())
+        response, _ = asyncio.run(respond(SimpleNamespace(image_url=f"receipts/{name}.jpg", document_id=None)))
+        assert response.headers["etag"] == f'"{hashlib.sha256(name.encode()).hexdigest()}"'
+    assert [key[0] for key in image._legacy_hashes] == ["receipts/b.jpg", "receipts/c.jpg"]
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models.database import Base
+from models.models import OcrResultCache
+from services import ocr_cache
+
+
+def make_session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine, tables=[OcrResultCache.__table__])
+    return sessionmaker(bind=engine)()
+
+
+def request_count(schema_name, result):
+    return ocr_cache.OCR_CACHE_REQUESTS.labels(schema=schema_name, result=result)._value.get()
+
+
+def test_cache_hit_miss_and_bypass():
+    db = make_session()
+    digest = ocr_cache.image_digest(b"diagnosis")
+    misses = request_count("diagnosis_schema", "miss")
+    hits = request_count("diagnosis_schema", "hit")
+    bypasses = request_count("diagnosis_schema", "bypass")
+
+    assert ocr_cache.get_cached(db, digest, "diagnosis_schema") is None
+    ocr_cache.store(db, digest, "diagnosis_schema", {"patient_name": "홍길동"})
+
+    assert ocr_cache.get_cached(db, digest, "diagnosis_schema") == {"patient_name": "홍길동"}
+    assert db.query(OcrResultCache).one().hit_count == 1
+    # 스키마가 다르면 같은 이미지라도 별도 항목
+    assert ocr_cache.get_cached(db, digest, "receipt_schema") is None
+
+    # force=true 는 조회 없이 건너뛰고, 새 결과로 덮어씀
+    ocr_cache.record_bypass("diagnosis_schema")
+    ocr_cache.store(db, digest, "diagnosis_schema", {"patient_name": "김철수"})
+    assert ocr_cache.get_cached(db, digest, "diagnosis_schema") == {"patient_name": "김철수"}
+    assert db.query(OcrResultCache).count() == 1
+
+    assert request_count("diagnosis_schema", "miss") - misses == 1
+    assert request_count("diagnosis_schema", "hit") - hits == 2
+    assert request_count("diagnosis_schema", "bypass") - bypasses == 1
+
+
+def test_expired_entries_miss_and_are_evicted(monkeypatch):
+    monkeypatch.setattr(ocr_cache, "OCR_CACHE_TTL_DAYS", 30)
+    db = make_session()
+    ocr_cache.store(db, "old", "receipt_schema", {"total_amount": "1000"})
+    ocr_cache.store(db, "new", "receipt_schema", {"total_amount": "2000"})
+    db.query(OcrResultCache).filter(OcrResultCache.image_sha256 == "old").one().created_at = \
+        datetime.now(timezone.utc) - timedelta(days=31)
+    db.commit()
+
+    assert ocr_cache.get_cached(db, "old", "receipt_schema") is None
+    assert ocr_cache.evict(db) == 1
+    assert [entry.image_sha256 for entry in db.query(OcrResultCache)] == ["new"]
+
+
+def test_concurrent_store_of_same_image_overwrites(monkeypatch):
+    db = make_session()
+    ocr_cache.store(db, "abc", "diagnosis_schema", {"patient_name": "홍길동"})
+
+    # 다른 요청이 먼저 저장한 행이 조회 시점에는 보이지 않았던 경우 (동시 미스)
+    find = ocr_cache._find
+    lookups = []
+
+    def racing_find(session, digest, schema_name):
+        lookups.append(digest)
+        return None if len(lookups) == 1 else find(session, digest, schema_name)
+
+    monkeypatch.setattr(ocr_cache, "_find", racing_find)
+    ocr_cache.store(db, "abc", "diagnosis_schema", {"patient_name": "김철수"}, commit=False)
+    db.commit()
+    assert db.query(OcrResultCache).count() == 1
+    assert ocr_cache.get_cached(db, "abc", "diagnosis_schema") == {"patient_name": "김철수"}
+
+
+def test_evict_removes_least_recently_used_over_limit(monkeypatch):
+    monkeypatch.setattr(ocr_cache, "OCR_CACHE_EVICT_EVERY", 3)
+    monkeypatch.setattr(ocr_cache, "OCR_CACHE_MAX_ENTRIES", 2)
+    monkeypatch.setattr(ocr_cache, "_stores_since_evict", 0)
+    db = make_session()
+
+    ocr_cache.store(db, "a", "diagnosis_schema", {})
+    ocr_cache.store(db, "b", "diagnosis_schema", {})
+    assert db.query(OcrResultCache).count() == 2
+    # a 를 최근 사용으로
+    db.query(OcrResultCache).filter(OcrResultCache.image_sha256 == "b").one().last_used_at = \
+        datetime.now(timezone.utc) - timedelta(hours=1)
+    db.commit()
+    ocr_cache.get_cached(db, "a", "diagnosis_schema")
+    db.commit()
+
+    ocr_cache.store(db, "c", "diagnosis_schema", {})  # 세 번째 저장 → 정리, 가장 오래 사용하지 않은 b 삭제
+    assert sorted(entry.image_sha256 for entry in db.query(OcrResultCache)) == ["a", "c"]
+    assert ocr_cache.evict_if_due(db) == 0
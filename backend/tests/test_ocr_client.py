@@ -0,0 +1,240 @@
+import asyncio
+import json
+import os
+import time
+from datetime import date
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from services.ocr_client import OcrClient
+
+OCR_DELAY = 0.5
+SCHEMA = {"name": "diagnosis_schema", "schema": {"type": "object", "properties": {}}}
+
+
+async def slow_upstage(request: httpx.Request) -> httpx.Response:
+    # Upstage 응답 지연 흉내 (이벤트 루프를 막지 않는 대기)
+    await asyncio.sleep(OCR_DELAY)
+    return httpx.Response(200, json={
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "information-extract",
+        "choices": [{
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": json.dumps({"patient_name": "홍길동"})},
+        }],
+    })
+
+
+@pytest.fixture
+def ocr():
+    return OcrClient(api_key="test", base_url="http://ocr.test/v1",
+                     transport=httpx.MockTransport(slow_upstage))
+
+
+def make_app(ocr: OcrClient) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/ocr")
+    async def run_ocr():
+        return await ocr.extract(b"image-bytes", SCHEMA)
+
+    @app.get("/ping")
+    async def ping():
+        return {"status": "ok"}
+
+    return app
+
+
+async def timed(coro):
+    start = time.perf_counter()
+    result = await coro
+    return result, time.perf_counter() - start
+
+
+@pytest.mark.asyncio
+async def test_ocr_latency_does_not_block_unrelated_requests(ocr):
+    async with httpx.AsyncClient(app=make_app(ocr), base_url="http://app") as api:
+        ocr_task = asyncio.create_task(timed(api.post("/ocr")))
+        await asyncio.sleep(0.05)  # OCR 요청이 먼저 대기 상태에 들어가도록
+        ping, ping_elapsed = await timed(api.get("/ping"))
+        (ocr_response, ocr_elapsed) = await ocr_task
+    await ocr.close()
+
+    assert ocr_response.json() == {"patient_name": "홍길동"}
+    assert ping.status_code == 200
+    assert ocr_elapsed >= OCR_DELAY
+    assert ping_elapsed < OCR_DELAY / 5
+
+
+@pytest.mark.asyncio
+async def test_concurrent_ocr_calls_share_pool(ocr):
+    (results, elapsed) = await timed(asyncio.gather(*[ocr.extract(b"img", SCHEMA) for _ in range(5)]))
+    await ocr.close()
+
+    assert results == [{"patient_name": "홍길동"}] * 5
+    assert elapsed < OCR_DELAY * 2
+
+
+@pytest.fixture
+def fresh_ocr_client(monkeypatch):
+    """전역 OCR 클라이언트 대신 새 클라이언트 (다른 테스트가 남긴 연결 풀을 재사용하지 않도록)"""
+    import main
+    from api import ocr as ocr_api
+
+    client = OcrClient()
+    monkeypatch.setattr(ocr_api, "ocr_client", client)
+    monkeypatch.setattr(main, "ocr_client", client)
+    yield client
+    if client._http is not None:
+        asyncio.run(client.close())
+
+
+def test_ocr_endpoints_share_one_client_per_worker(tmp_path, monkeypatch, fresh_ocr_client):
+    """실제 /diagnoses/ocr, /receipts/ocr 라우트가 앱 시작 때 만든 하나의 OCR 클라이언트를 사용"""
+    from PIL import Image
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    import main
+    from models.database import Base, get_db
+    from models.models import MedicalDiagnosis, MedicalReceipt
+    from services.document_pipeline import document_pipeline
+
+    monkeypatch.chdir(tmp_path)
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+
+    def override_get_db():
+        with session_factory() as db:
+            yield db
+
+    os.makedirs("uploads/diagnosis")
+    os.makedirs("uploads/receipts")
+    Image.new("RGB", (64, 64), "white").save("uploads/diagnosis/a.png")
+    Image.new("RGB", (64, 64), "black").save("uploads/receipts/b.png")
+    with session_factory() as db:
+        db.add(MedicalDiagnosis(user_id=1, patient_name="", patient_ssn="", diagnosis_name="",
+                                diagnosis_date=date(2025, 1, 1), diagnosis_text="", hospital_name="",
+                                doctor_name="", icd_code="", admission_days=0,
+                                image_url="uploads/diagnosis/a.png"))
+        db.add(MedicalReceipt(user_id=1, patient_name="", receipt_date=date(2025, 1, 1), total_amount=0,
+                              hospital_name="", treatment_details="", image_url="uploads/receipts/b.png"))
+        db.commit()
+
+    fields = {
+        "diagnosis_schema": {"patient_name": "홍길동", "diagnosis_date": "2025-01-03", "admission_days": "3"},
+        "receipt_schema": {"total_amount": "120000", "receipt_date": "2025-01-05"},
+    }
+    calls = []
+
+    def upstage(request: httpx.Request) -> httpx.Response:
+        schema = json.loads(request.content)["response_format"]["json_schema"]["name"]
+        calls.append((request.url.path, schema))
+        return httpx.Response(200, json={
+            "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "information-extract",
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": json.dumps(fields[schema])}}],
+        })
+
+    # 업스트림(Upstage)만 모의 transport 로 바꾸고, 클라이언트 생성/종료는 앱 시작/종료 이벤트에 맡김
+    ocr_client = fresh_ocr_client
+    ocr_client._transport = httpx.MockTransport(upstage)
+    ocr_client.api_key = "test"
+    monkeypatch.setattr(main, "FORGERY_MODEL_PRELOAD", False)
+    monkeypatch.setattr(document_pipeline, "session_factory", session_factory)
+    monkeypatch.setitem(main.app.dependency_overrides, get_db, override_get_db)
+
+    with TestClient(main.app) as api:
+        shared = ocr_client._http
+        assert shared is not None  # 시작 이벤트에서 생성
+        diagnosis = api.patch("/api/v1/diagnoses/ocr/1")
+        receipt = api.patch("/api/v1/receipts/ocr/1")
+        assert ocr_client._http is shared  # 요청마다 새 클라이언트를 만들지 않음
+    assert ocr_client._http is None  # 종료 이벤트에서 연결 풀 정리
+
+    assert diagnosis.status_code == 200, diagnosis.text
+    assert receipt.status_code == 200, receipt.text
+    assert [schema for _, schema in calls] == ["diagnosis_schema", "receipt_schema"]
+    with session_factory() as db:
+        assert db.get(MedicalDiagnosis, 1).patient_name == "홍길동"
+        assert db.get(MedicalReceipt, 1).total_amount == 120000
+
+
+def test_ocr_batch_reports_each_item_and_reuses_cache(tmp_path, monkeypatch):
+    """일괄 OCR: 항목별 성공/실패, 같은 이미지는 한 번만 추출, 커밋 후 캐시 정리, 다시 요청하면 캐시 사용"""
+    from PIL import Image
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from api import ocr as ocr_api
+    from models.database import Base
+    from models.models import MedicalDiagnosis, MedicalReceipt, OcrResultCache
+    from services import ocr_cache
+
+    monkeypatch.chdir(tmp_path)
+    engine = create_engine(f"sqlite:///{tmp_path / 'ocr.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+
+    os.makedirs("uploads/diagnosis")
+    os.makedirs("uploads/receipts")
+    Image.new("RGB", (64, 64), "white").save("uploads/diagnosis/a.png")
+    Image.new("RGB", (64, 64), "white").save("uploads/diagnosis/a_copy.png")  # 중복 업로드
+    Image.new("RGB", (64, 64), "black").save("uploads/receipts/b.png")
+    with session_factory() as db:
+        for image_url in ("uploads/diagnosis/a.png", "uploads/diagnosis/a_copy.png", "uploads/diagnosis/gone.png"):
+            db.add(MedicalDiagnosis(user_id=1, patient_name="", patient_ssn="", diagnosis_name="",
+                                    diagnosis_date=date(2025, 1, 1), diagnosis_text="", hospital_name="",
+                                    doctor_name="", icd_code="", admission_days=0, image_url=image_url))
+        db.add(MedicalReceipt(user_id=1, patient_name="", receipt_date=date(2025, 1, 1), total_amount=0,
+                              hospital_name="", treatment_details="", image_url="uploads/receipts/b.png"))
+        db.commit()
+
+    fields = {
+        "diagnosis_schema": {"patient_name": "홍길동", "diagnosis_date": "2025-01-03", "admission_days": "3"},
+        "receipt_schema": {"total_amount": "120000", "receipt_date": "2025/01/05"},  # 날짜 형식 오류
+    }
+    calls = []
+
+    class FakeOcrClient:
+        async def extract(self, image_data, schema):
+            calls.append(schema["name"])
+            return dict(fields[schema["name"]])
+
+    evictions = []
+
+    def evict_if_due(db):
+        # 캐시 결과가 이미 커밋되어 다른 세션에서도 보여야 함
+        with session_factory() as other:
+            evictions.append(other.query(OcrResultCache).count())
+        return 0
+
+    monkeypatch.setattr(ocr_api, "ocr_client", FakeOcrClient())
+    monkeypatch.setattr(ocr_cache, "evict_if_due", evict_if_due)
+
+    def run_batch(**ids):
+        with session_factory() as db:
+            return asyncio.run(ocr_api.ocr_batch(ocr_api.BatchOcrRequest(**ids), db))
+
+    response = run_batch(diagnosis_ids=[1, 2, 3, 99], receipt_ids=[1])
+    statuses = {(item["type"], item["id"]): item["status"] for item in response["results"]}
+    assert statuses == {("diagnosis", 1): "success", ("diagnosis", 2): "success", ("diagnosis", 3): "error",
+                        ("diagnosis", 99): "error", ("receipt", 1): "error"}
+    assert (response["succeeded"], response["failed"]) == (2, 3)
+    assert sorted(calls) == ["diagnosis_schema", "receipt_schema"]  # 같은 이미지는 한 번만 추출
+    assert evictions == [2]
+    with session_factory() as db:
+        assert [d.patient_name for d in db.query(MedicalDiagnosis).order_by(MedicalDiagnosis.id)] == ["홍길동", "홍길동", ""]
+        assert db.get(MedicalReceipt, 1).total_amount == 0  # 실패 항목은 저장하지 않음
+
+    response = run_batch(diagnosis_ids=[1])
+    assert response["results"][0]["status"] == "success" and response["results"][0]["cached"] is True
+    assert len(calls) == 2
@@ -0,0 +1,77 @@
+import asyncio
+import os
+
+import fitz
+import pytest
+
+from api import ocr
+from api.ocr import diagnosis_schema, extract_document, merge_page_fields, receipt_schema
+from utils.pdf_pages import PdfPages, is_pdf
+
+
+def make_pdf(pages: int) -> bytes:
+    document = fitz.open()
+    for number in range(pages):
+        page = document.new_page()
+        page.insert_text((72, 72), f"page {number + 1}")
+    return document.tobytes()
+
+
+def test_pages_render_lazily_and_reuse_cache(tmp_path):
+    pdf_data = make_pdf(3)
+    assert is_pdf(pdf_data)
+
+    with PdfPages(pdf_data, dpi=72, cache_dir=str(tmp_path)) as pages:
+        assert len(pages) == 3
+        assert pages.render(0).startswith(b"\x89PNG")
+    # 요청한 페이지만 렌더링
+    cached_files = os.listdir(tmp_path)
+    assert len(cached_files) == 1
+
+    # 같은 PDF 는 다시 렌더링하지 않고 캐시 파일 사용
+    (tmp_path / cached_files[0]).write_bytes(b"cached")
+    with PdfPages(pdf_data, dpi=72, cache_dir=str(tmp_path)) as pages:
+        assert pages.render(0) == b"cached"
+
+
+def test_merge_page_fields_by_schema():
+    merged = merge_page_fields([
+        {"patient_name": "홍길동", "diagnosis_text": "위암", "admission_days": 3},
+        {"patient_name": "", "diagnosis_text": "수술 후 입원", "admission_days": 7, "icd_code": "C16"},
+    ], diagnosis_schema)
+    assert merged == {
+        "patient_name": "홍길동",
+        "diagnosis_text": "위암 수술 후 입원",
+        "icd_code": "C16",
+        "admission_days": 7,
+    }
+
+    merged = merge_page_fields([
+        {"total_amount": 120000, "treatment_details": "진찰료,검사료"},
+        {"total_amount": 350000, "treatment_details": "입원료"},
+    ], receipt_schema)
+    assert merged == {"total_amount": 350000, "treatment_details": "진찰료,검사료, 입원료"}
+
+
+@pytest.mark.asyncio
+async def test_pdf_pages_are_extracted_concurrently(monkeypatch):
+    monkeypatch.setattr(ocr, "OCR_PDF_CONCURRENCY", 3)
+    in_flight = 0
+    all_in_flight = asyncio.Event()
+
+    async def extract_page(page_data):
+        nonlocal in_flight
+        in_flight += 1
+        if in_flight == 3:
+            all_in_flight.set()
+        # 세 페이지가 동시에 진행 중이어야 통과 (순서대로 실행하면 첫 페이지에서 시간 초과)
+        await asyncio.wait_for(all_in_flight.wait(), timeout=5)
+        return {"patient_name": "홍길동", "admission_days": 2}, False
+
+    parsed, cached = await extract_document(make_pdf(3), diagnosis_schema, extract_page)
+    assert parsed == {"patient_name": "홍길동", "admission_days": 2}
+    assert cached is False
+    assert in_flight == 3
+
+    parsed, cached = await extract_document(b"\xff\xd8jpeg", diagnosis_schema, extract_page)
+    assert parsed == {"patient_name": "홍길동", "admission_days": 2}
@@ -0,0 +1,94 @@
+import asyncio
+import hashlib
+import os
+import threading
+from io import BytesIO
+
+import httpx
+import pytest
+from starlette.datastructures import UploadFile
+
+from services import storage_service as storage_module
+from services.blob_cache import BlobCache
+from services.storage_service import StorageService, UploadTooLarge, _HashingReader
+
+
+def test_local_upload_streams_and_hashes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(storage_module, "STORAGE_CHUNK_SIZE", 1000)
+    monkeypatch.setattr(storage_module, "STORAGE_MAX_UPLOAD_MB", 1)
+    service = StorageService()
+    data = os.urandom(5000)
+
+    stored = asyncio.run(service.upload_file(UploadFile(BytesIO(data), filename="a.jpg"), "diagnosis", "a.jpg"))
+    assert stored.url == "uploads/diagnosis/a.jpg"
+    assert (stored.size, stored.sha256) == (5000, hashlib.sha256(data).hexdigest())
+    assert (tmp_path / "uploads" / "diagnosis" / "a.jpg").read_bytes() == data
+
+    # 최대 크기를 넘으면 복사 도중 중단하고 쓰던 파일을 남기지 않음
+    too_large = UploadFile(BytesIO(b"x" * (1024 * 1024 + 1)), filename="b.jpg")
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(service.upload_file(too_large, "diagnosis", "b.jpg"))
+    assert sorted(os.listdir(tmp_path / "uploads" / "diagnosis")) == ["a.jpg"]
+
+
+def test_hashing_reader_ignores_resent_bytes():
+    data = os.urandom(3000)
+    reader = _HashingReader(BytesIO(data), max_bytes=10000)
+    reader.read(2000)
+    reader.seek(1000)  # GCS 재개 업로드가 일부를 다시 보내는 경우
+    while reader.read(700):
+        pass
+    assert reader.size == 3000
+    assert reader.digest.hexdigest() == hashlib.sha256(data).hexdigest()
+
+
+def test_concurrent_local_uploads_of_same_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(storage_module, "STORAGE_CHUNK_SIZE", 1000)
+    service = StorageService()
+    data = os.urandom(3000)
+    barrier = threading.Barrier(2, timeout=5)
+
+    class SlowFile(BytesIO):
+        def read(self, size=-1):
+            # 두 업로드가 모두 임시 파일을 연 뒤에 쓰기 시작
+            if self.tell() == 0:
+                barrier.wait()
+            return super().read(size)
+
+    async def run():
+        return await asyncio.gather(*[
+            service.upload_file(UploadFile(SlowFile(data), filename="a.jpg"), "documents", "a.jpg")
+            for _ in range(2)
+        ])
+
+    stored = asyncio.run(run())
+    assert [s.url for s in stored] == ["uploads/documents/a.jpg"] * 2
+    assert os.listdir(tmp_path / "uploads" / "documents") == ["a.jpg"]
+    assert (tmp_path / "uploads" / "documents" / "a.jpg").read_bytes() == data
+
+
+def test_gcs_reads_use_own_client_and_disk_cache(tmp_path):
+    requests = []
+
+    def handler(request):
+        requests.append(request.url.path)
+        if request.url.path.endswith("missing.jpg"):
+            return httpx.Response(404)
+        return httpx.Response(200, content=b"gcs-bytes")
+
+    # OCR 클라이언트를 시작하지 않아도 스토리지 자체 연결 풀로 다운로드
+    service = StorageService(transport=httpx.MockTransport(handler))
+    service.cache = BlobCache(str(tmp_path), max_bytes=1024)
+
+    async def run():
+        url = "https://storage.googleapis.com/bucket/documents/a.jpg"
+        data = [await service.open_bytes(url), await service.open_bytes(url)]
+        with pytest.raises(FileNotFoundError):
+            await service.open_bytes("https://storage.googleapis.com/bucket/documents/missing.jpg")
+        await service.close()
+        return data
+
+    assert asyncio.run(run()) == [b"gcs-bytes", b"gcs-bytes"]
+    assert requests == ["/bucket/documents/a.jpg", "/bucket/documents/missing.jpg"]
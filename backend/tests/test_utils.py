@@ -9,4 +9,56 @@ def test_password_hash_and_verify():
 
 def test_create_access_token():
     token = create_access_token(data={"sub": "testuser"})
-    assert isinstance(token, str)
\ No newline at end of file
+    assert isinstance(token, str)
+
+
+def test_ela_in_memory_matches_pil_pipeline(tmp_path, monkeypatch):
+    from io import BytesIO
+    import numpy as np
+    from PIL import Image, ImageChops, ImageEnhance
+    from utils.ela import convert_to_ela_image, ela_stack
+
+    monkeypatch.chdir(tmp_path)
+    rng = np.random.default_rng(0)
+    image = Image.fromarray(rng.integers(0, 255, (120, 160, 3), dtype=np.uint8))
+
+    # 기존 구현: JPEG 재저장 → ImageChops 차이 → 최대 차이 기준 밝기 보정
+    buffer = BytesIO()
+    image.save(buffer, "JPEG", quality=90)
+    diff = ImageChops.difference(image, Image.open(buffer))
+    max_diff = max(ex[1] for ex in diff.getextrema())
+    expected = ImageEnhance.Brightness(diff).enhance(255.0 / max_diff)
+
+    assert np.array_equal(np.asarray(convert_to_ela_image(image)), np.asarray(expected))
+    assert list(tmp_path.iterdir()) == []  # 작업 디렉토리에 임시 파일 없음
+    assert ela_stack(image, (95, 90)).shape == (2, 120, 160, 3)
+
+
+def test_normalize_for_ocr():
+    from io import BytesIO
+    from PIL import Image
+    from utils.ocr_image import normalize_for_ocr
+
+    def encode(image, fmt, **params):
+        buffer = BytesIO()
+        image.save(buffer, fmt, **params)
+        return buffer.getvalue()
+
+    # EXIF 회전(Orientation=6: 시계 방향 90도)대로 세움
+    photo = Image.new("RGB", (300, 100), "white")
+    exif = photo.getexif()
+    exif[0x0112] = 6
+    data, converted = normalize_for_ocr(encode(photo, "JPEG", exif=exif), max_side=1000)
+    assert converted and Image.open(BytesIO(data)).size == (100, 300)
+
+    # 큰 JPEG 는 긴 변을 max_side 이하로 축소 (draft 디코딩 포함)
+    data, converted = normalize_for_ocr(encode(Image.new("RGB", (4000, 2000), "gray"), "JPEG"), max_side=500)
+    assert converted and Image.open(BytesIO(data)).size == (500, 250)
+
+    # 투명 PNG 는 흰 바탕에 합성 (검은 바탕이 되면 글자가 묻힘)
+    transparent = Image.new("RGBA", (3000, 3000), (0, 0, 0, 0))
+    data, converted = normalize_for_ocr(encode(transparent, "PNG"), max_side=100)
+    assert converted and Image.open(BytesIO(data)).convert("L").getextrema()[0] > 240
+
+    # 디코딩할 수 없는 데이터(PDF 등)는 원본 그대로
+    assert normalize_for_ocr(b"%PDF-1.4 not an image") == (b"%PDF-1.4 not an image", False)
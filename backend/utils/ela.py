@@ -1,9 +1,58 @@
 # backend/utils/ela.py
 
-from PIL import Image, ImageChops, ImageEnhance
-import os
-import uuid
-from typing import Union
+from io import BytesIO
+from typing import Sequence, Union
+
+import numpy as np
+from PIL import Image
+
+
+def _open_rgb(image: Union[str, Image.Image]) -> Image.Image:
+    if isinstance(image, str):
+        return Image.open(image).convert("RGB")
+    # 이미 RGB 면 복사하지 않음 (원본은 읽기만 함)
+    return image if image.mode == "RGB" else image.convert("RGB")
+
+
+def _recompress(original: Image.Image, quality: int) -> np.ndarray:
+    """JPEG 로 메모리에서 재저장 후 다시 디코딩 (임시 파일 없음)"""
+    buffer = BytesIO()
+    original.save(buffer, "JPEG", quality=quality)
+    buffer.seek(0)
+    with Image.open(buffer) as compressed:
+        return np.asarray(compressed.convert("RGB"))
+
+
+def _ela_from_arrays(original: np.ndarray, compressed: np.ndarray) -> np.ndarray:
+    # |원본 - 재압축| 을 uint8 범위 안에서 계산 (int16 변환 없이)
+    diff = np.maximum(original, compressed)
+    diff -= np.minimum(original, compressed)
+
+    # 가장 큰 차이가 255 가 되도록 밝기 보정
+    # (PIL ImageEnhance.Brightness 와 같은 float32 곱셈 + 버림이라 결과가 동일하고, 최댓값 기준이라 255 를 넘지 않음)
+    max_diff = int(diff.max())
+    scale = np.float32(255.0 / max_diff if max_diff != 0 else 1.0)
+    return np.multiply(diff, scale, dtype=np.float32).astype(np.uint8)
+
+
+def ela_array(image: Union[str, Image.Image], quality: int = 90) -> np.ndarray:
+    """ELA 결과를 (H, W, 3) uint8 배열로 반환"""
+    original = _open_rgb(image)
+    return _ela_from_arrays(np.asarray(original), _recompress(original, quality))
+
+
+def ela_stack(image: Union[str, Image.Image], qualities: Sequence[int] = (95, 90, 75)) -> np.ndarray:
+    """
+    여러 JPEG 품질의 ELA 를 한 번에 계산해서 (품질 수, H, W, 3) uint8 배열로 반환
+    원본 디코딩/RGB 변환은 한 번만 하고 품질별로 재압축만 반복합니다.
+    """
+    original = _open_rgb(image)
+    original_array = np.asarray(original)
+    stack = np.empty((len(qualities), *original_array.shape), dtype=np.uint8)
+    for index, quality in enumerate(qualities):
+        stack[index] = _ela_from_arrays(original_array, _recompress(original, quality))
+    return stack
+
 
 def convert_to_ela_image(image: Union[str, Image.Image], quality: int = 90) -> Image.Image:
     """
@@ -13,40 +62,4 @@ def convert_to_ela_image(image: Union[str, Image.Image], quality: int = 90) -> I
     :param quality: JPEG 저장 품질 (보통 90 사용)
     :return: 조작 여부 분석에 사용할 ELA 이미지 객체
     """
-    # 1. 원본 이미지 열기
-    if isinstance(image, str):
-        original = Image.open(image).convert("RGB")
-    else:
-        original = image.convert("RGB")
-
-    # 2. JPEG로 재저장 (압축)
-    temp_filename = f"temp_ela_{uuid.uuid4().hex}.jpg"
-    original.save(temp_filename, "JPEG", quality=quality)
-
-    # 3. 재저장된 이미지 다시 열기
-    compressed = Image.open(temp_filename)
-
-    # 4. 차이 계산 (편집 흔적 강조)
-    diff = ImageChops.difference(original, compressed)
-
-    # 5. 차이값에 따라 밝기 증가시켜 시각화
-    extrema = diff.getextrema()
-    # Robust handling for both RGB and grayscale
-    if isinstance(extrema, tuple) and isinstance(extrema[0], tuple):  # RGB
-        max_diff = max([ex[1] for ex in extrema if isinstance(ex, tuple)])
-    elif isinstance(extrema, tuple) and len(extrema) == 2 and all(isinstance(x, (int, float)) for x in extrema):  # Grayscale
-        max_diff = extrema[1]
-    else:
-        max_diff = 1.0  # fallback
-    # Ensure max_diff is a number
-    if isinstance(max_diff, tuple):
-        max_diff = max_diff[1] if len(max_diff) > 1 else 1.0
-    if not isinstance(max_diff, (int, float)):
-        max_diff = 1.0
-    scale = 255.0 / max_diff if max_diff != 0 else 1.0
-    ela_image = ImageEnhance.Brightness(diff).enhance(scale)
-
-    # 6. 임시 파일 삭제
-    os.remove(temp_filename)
-
-    return ela_image
+    return Image.fromarray(ela_array(image, quality))
@@ -0,0 +1,59 @@
+# backend/utils/ocr_image.py
+
+from io import BytesIO
+import os
+from typing import Tuple
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# OCR 전송 전 이미지 정규화 설정
+OCR_IMAGE_MAX_SIDE = int(os.getenv("OCR_IMAGE_MAX_SIDE", "2048"))  # 긴 변 최대 픽셀
+OCR_IMAGE_QUALITY = int(os.getenv("OCR_IMAGE_QUALITY", "85"))  # JPEG 재인코딩 품질
+
+
+def normalize_for_ocr(image_data: bytes, max_side: int = OCR_IMAGE_MAX_SIDE,
+                      quality: int = OCR_IMAGE_QUALITY) -> Tuple[bytes, bool]:
+    """
+    OCR 요청 전에 이미지를 작게 만듭니다.
+    - EXIF 회전 정보대로 바로 세우고, 긴 변을 max_side 이하로 줄인 뒤 JPEG 로 다시 저장
+    - JPEG 는 draft 모드로 디코딩 단계에서 1/2, 1/4, 1/8 축소해서 읽으므로 큰 사진도 빠릅니다.
+    - 투명 영역이 있는 PNG 등은 흰 바탕에 합성합니다.
+    - 이미지가 아니거나(PDF 등) 결과가 더 크면 원본을 그대로 반환합니다.
+
+    :return: (전송할 바이트, 변환 여부)
+    """
+    try:
+        image = Image.open(BytesIO(image_data))
+    except (UnidentifiedImageError, OSError):
+        return image_data, False
+
+    if getattr(image, "n_frames", 1) > 1:
+        # 여러 페이지(TIFF 등)는 그대로 전송
+        return image_data, False
+
+    orientation = image.getexif().get(0x0112, 1)  # EXIF Orientation
+    if image.format == "JPEG" and max(image.size) > max_side:
+        # 목표 크기 이상을 유지하는 가장 작은 축척(1/2, 1/4, 1/8)으로 디코딩
+        ratio = max_side / max(image.size)
+        image.draft("RGB", (int(image.width * ratio), int(image.height * ratio)))
+
+    image = ImageOps.exif_transpose(image)
+    resized = max(image.size) > max_side
+    if resized:
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+    if image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info):
+        # 투명 배경은 검은색이 되지 않도록 흰 바탕에 합성 (스캔/캡처 문서의 글자가 묻히지 않게)
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    elif image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    buffer = BytesIO()
+    image.save(buffer, "JPEG", quality=quality, optimize=True)
+    normalized = buffer.getvalue()
+
+    if len(normalized) >= len(image_data) and not resized and orientation == 1:
+        return image_data, False
+    return normalized, True
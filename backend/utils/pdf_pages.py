@@ -0,0 +1,136 @@
+# backend/utils/pdf_pages.py
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from typing import List, Optional
+
+import fitz  # PyMuPDF
+
+logger = logging.getLogger(__name__)
+
+# 진단서/영수증 PDF 페이지 렌더링 설정
+PDF_RENDER_DPI = int(os.getenv("PDF_RENDER_DPI", "200"))  # OCR 에 충분한 해상도 (A4 ≈ 1654×2339)
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "10"))  # 앞에서부터 최대 처리 페이지 수
+# 렌더링한 페이지 PNG 캐시 (재 OCR / 위조분석에서 재사용, 오래된 파일부터 정리)
+PDF_PAGE_CACHE_DIR = os.getenv("PDF_PAGE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "pdf_page_cache"))
+PDF_PAGE_CACHE_MAX_MB = int(os.getenv("PDF_PAGE_CACHE_MAX_MB", "512"))
+PDF_PAGE_CACHE_TRIM_EVERY = 50  # 새 페이지 N 장 저장마다 정리
+
+_writes_since_trim = 0
+_trim_lock = threading.Lock()
+
+
+def is_pdf(data: bytes) -> bool:
+    return data[:5] == b"%PDF-"
+
+
+class PdfPages:
+    """
+    PDF 페이지를 필요할 때 한 장씩 PNG 로 렌더링합니다.
+    렌더링 결과는 (PDF SHA-256, DPI, 페이지 번호) 로 디스크에 캐시합니다.
+    MuPDF 문서 객체는 스레드 안전하지 않으므로 렌더링은 잠금 안에서 실행합니다.
+    """
+
+    def __init__(self, pdf_data: bytes, dpi: int = PDF_RENDER_DPI, max_pages: int = PDF_MAX_PAGES,
+                 cache_dir: Optional[str] = PDF_PAGE_CACHE_DIR):
+        self.digest = hashlib.sha256(pdf_data).hexdigest()
+        self.dpi = dpi
+        self.cache_dir = cache_dir
+        self._document = fitz.open(stream=pdf_data, filetype="pdf")
+        self._lock = threading.Lock()
+        self.total_pages = self._document.page_count
+        self.page_count = min(self.total_pages, max_pages)
+        if self.total_pages > self.page_count:
+            logger.warning(f"PDF {self.total_pages}페이지 중 앞 {self.page_count}페이지만 처리합니다.")
+
+    def __len__(self) -> int:
+        return self.page_count
+
+    def render(self, index: int) -> bytes:
+        """index 페이지 PNG 바이트 (캐시에 있으면 렌더링 생략)"""
+        if not 0 <= index < self.page_count:
+            raise IndexError(index)
+        path = self._cache_path(index)
+        if path and os.path.exists(path):
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+                os.utime(path)  # 최근 사용 표시 (정리 순서)
+                return data
+            except OSError:
+                pass
+
+        with self._lock:
+            data = self._document[index].get_pixmap(dpi=self.dpi).tobytes("png")
+        if path:
+            _write_cache(path, data)
+        return data
+
+    def render_all(self) -> List[bytes]:
+        return [self.render(index) for index in range(self.page_count)]
+
+    def close(self) -> None:
+        self._document.close()
+
+    def __enter__(self) -> "PdfPages":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _cache_path(self, index: int) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, f"{self.digest}_{self.dpi}_{index + 1}.png")
+
+
+def _write_cache(path: str, data: bytes) -> None:
+    global _writes_since_trim
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 같은 페이지를 동시에 렌더링해도 반쯤 쓴 파일을 읽지 않도록 임시 파일 후 교체
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except OSError as e:
+        logger.warning(f"PDF 페이지 캐시 저장 실패: {str(e)}")
+        return
+
+    with _trim_lock:
+        _writes_since_trim += 1
+        if _writes_since_trim < PDF_PAGE_CACHE_TRIM_EVERY:
+            return
+        _writes_since_trim = 0
+    trim_page_cache(os.path.dirname(path))
+
+
+def trim_page_cache(cache_dir: str = PDF_PAGE_CACHE_DIR, max_bytes: int = PDF_PAGE_CACHE_MAX_MB * 1024 * 1024) -> int:
+    """캐시 용량을 넘으면 마지막 사용 시각이 오래된 파일부터 삭제"""
+    try:
+        entries = []
+        for entry in os.scandir(cache_dir):
+            if entry.name.endswith(".png"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+    except OSError:
+        return 0
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    if removed:
+        logger.info(f"PDF 페이지 캐시 정리: {removed}개 삭제")
+    return removed
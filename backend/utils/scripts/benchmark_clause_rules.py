@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+특약 규칙 엔진 벤치마크
+- 기존 if-체인(문자열 비교) 방식과 컴파일된 규칙 엔진의 처리량을 비교합니다.
+- DB 없이 더미 특약/진단서/영수증으로 실행합니다.
+
+사용법: python utils/scripts/benchmark_clause_rules.py [--claims 20000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from services.clause_rules import get_rule_engine
+
+
+# 기존 ClaimCalculator 의 if-체인 (비교용)
+def legacy_is_applicable(clause, diagnosis, receipt) -> bool:
+    clause_name = clause.clause_name.lower()
+    diagnosis_name = diagnosis.diagnosis_name.lower()
+    category = clause.category.lower()
+    if "암" in clause_name:
+        return "암" in diagnosis_name or "cancer" in diagnosis_name.lower()
+    if "골절" in clause_name:
+        return "골절" in diagnosis_name
+    if "입원" in clause_name or "입원" in category:
+        return diagnosis.admission_days > 0
+    if any(word in clause_name for word in ["외래", "통원"]) or any(word in category for word in ["외래", "통원"]):
+        return diagnosis.admission_days == 0
+    if "진단" in clause_name or "진단" in category:
+        return True
+    if "수술" in clause_name:
+        return "수술" in diagnosis.diagnosis_text or "절제" in diagnosis.diagnosis_text
+    if "질병" in clause_name:
+        return True
+    if "상해" in clause_name:
+        return bool(diagnosis.icd_code and diagnosis.icd_code.startswith("S"))
+    return False
+
+
+def legacy_amount(clause, diagnosis, receipt) -> float:
+    category = clause.category.lower()
+    clause_name = clause.clause_name.lower()
+    if "진단" in clause_name or "진단" in category:
+        return clause.per_unit
+    if "입원" in clause_name or "입원" in category:
+        if diagnosis.admission_days > 0:
+            return min(diagnosis.admission_days * clause.per_unit, clause.max_total)
+        return 0
+    if any(word in clause_name for word in ["외래", "통원"]) or any(word in category for word in ["외래", "통원"]):
+        if diagnosis.admission_days == 0:
+            return min(receipt.total_amount, clause.per_unit)
+        return 0
+    if "수술" in clause_name:
+        if "수술" in diagnosis.diagnosis_text or "절제" in diagnosis.diagnosis_text:
+            return clause.per_unit
+        return 0
+    return clause.per_unit
+
+
+def legacy_logic(clause, diagnosis, receipt, amount: float) -> str:
+    category = clause.category.lower()
+    clause_name = clause.clause_name.lower()
+    if "진단" in clause_name or "진단" in category:
+        return f"진단 특약 '{clause.clause_name}': {diagnosis.diagnosis_name} 진단으로 {amount:,.0f}원 지급"
+    if "입원" in clause_name or "입원" in category:
+        return f"입원 특약 '{clause.clause_name}': {diagnosis.admission_days}일 × {clause.per_unit:,.0f}원 = {amount:,.0f}원"
+    if any(word in clause_name for word in ["외래", "통원"]) or any(word in category for word in ["외래", "통원"]):
+        return f"외래/통원 특약 '{clause.clause_name}': min({receipt.total_amount:,.0f}, {clause.per_unit:,.0f}) = {amount:,.0f}원"
+    if "수술" in clause_name:
+        return f"수술 특약 '{clause.clause_name}': {diagnosis.diagnosis_name} 수술로 {amount:,.0f}원 지급"
+    return f"특약 '{clause.clause_name}': {amount:,.0f}원 지급"
+
+
+CLAUSES = [
+    ("암진단비", "진단"), ("골절진단비", "진단"), ("질병입원일당", "입원"),
+    ("상해입원일당", "입원"), ("질병통원의료비", "통원"), ("외래진료비", "외래진료"),
+    ("질병수술비", "수술"), ("상해수술비", "수술"), ("뇌졸중진단비", "진단"),
+    ("급성심근경색진단비", "진단"), ("상해후유장해", "상해"), ("질병사망", "사망"),
+]
+DIAGNOSES = [
+    ("위암", "위 절제술 시행", "C16.9", 12), ("요골 골절", "도수정복", "S52.5", 0),
+    ("급성 기관지염", "기침, 발열", "J20.9", 0), ("뇌경색", "입원 치료", "I63.9", 20),
+    ("폐렴", "항생제 치료", "J18.9", 5), ("발목 염좌", "물리치료", "S93.4", 0),
+]
+
+
+def build_cases(n_claims: int, seed: int = 42):
+    rng = random.Random(seed)
+    clauses = [
+        SimpleNamespace(id=i, clause_name=name, category=category,
+                        per_unit=rng.choice([30000, 50000, 1000000]), max_total=3000000)
+        for i, (name, category) in enumerate(CLAUSES)
+    ]
+    cases = []
+    for _ in range(n_claims):
+        name, text, icd, days = rng.choice(DIAGNOSES)
+        diagnosis = SimpleNamespace(diagnosis_name=name, diagnosis_text=text,
+                                    icd_code=icd, admission_days=days)
+        receipt = SimpleNamespace(total_amount=rng.randint(10000, 5000000))
+        cases.append((diagnosis, receipt))
+    return clauses, cases
+
+
+def run_legacy(clauses, cases):
+    results = []
+    for diagnosis, receipt in cases:
+        for clause in clauses:
+            if legacy_is_applicable(clause, diagnosis, receipt):
+                amount = legacy_amount(clause, diagnosis, receipt)
+                if amount > 0:
+                    results.append((amount, legacy_logic(clause, diagnosis, receipt, amount)))
+    return results
+
+
+def run_engine(clauses, cases):
+    ruleset = get_rule_engine()["clause"]
+    results = []
+    for diagnosis, receipt in cases:
+        for clause in clauses:
+            result = ruleset.evaluate(clause, diagnosis, receipt)
+            if result is not None and result[0] > 0:
+                results.append(result)
+    return results
+
+
+def timed(fn, *args, repeat: int = 3):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="특약 규칙 엔진 벤치마크")
+    parser.add_argument("--claims", type=int, default=20000)
+    args = parser.parse_args()
+
+    clauses, cases = build_cases(args.claims)
+    evaluations = len(clauses) * len(cases)
+
+    legacy_time, legacy_results = timed(run_legacy, clauses, cases)
+    engine_time, engine_results = timed(run_engine, clauses, cases)
+
+    if legacy_results != engine_results:
+        print("❌ 결과 불일치: 규칙 테이블이 기존 로직과 다릅니다.")
+        sys.exit(1)
+
+    print(f"청구 {len(cases):,}건 × 특약 {len(clauses)}개 = {evaluations:,}회 평가")
+    print(f"기존 if-체인 : {legacy_time:.3f}s ({evaluations / legacy_time:,.0f} evals/s)")
+    print(f"규칙 엔진    : {engine_time:.3f}s ({evaluations / engine_time:,.0f} evals/s)")
+    print(f"속도 향상    : {legacy_time / engine_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
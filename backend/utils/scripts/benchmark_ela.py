@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+ELA 변환 벤치마크
+- 기존 방식(임시 JPEG 파일 저장 → 다시 열기 → ImageChops 차이 → ImageEnhance 밝기 보정)과
+  메모리 재압축 + NumPy 방식의 초당 처리 이미지 수를 비교합니다.
+- 두 방식의 결과가 픽셀 단위로 같은지 확인하고, 여러 품질 ELA(스택) 시간도 함께 출력합니다.
+- --corpus 를 주지 않으면 4000×3000 스캔 모양 이미지를 만들어 사용합니다.
+
+사용법: python utils/scripts/benchmark_ela.py [--corpus ./scans] [--count 5] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from io import BytesIO
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import numpy as np
+from PIL import Image, ImageChops, ImageDraw, ImageEnhance
+
+from utils.ela import convert_to_ela_image, ela_stack
+
+
+# 기존 utils/ela.py 구현 (비교용)
+def legacy_convert_to_ela_image(image, quality: int = 90) -> Image.Image:
+    original = image.convert("RGB")
+    temp_filename = f"temp_ela_{uuid.uuid4().hex}.jpg"
+    original.save(temp_filename, "JPEG", quality=quality)
+    compressed = Image.open(temp_filename)
+    diff = ImageChops.difference(original, compressed)
+    extrema = diff.getextrema()
+    max_diff = max([ex[1] for ex in extrema])
+    scale = 255.0 / max_diff if max_diff != 0 else 1.0
+    ela_image = ImageEnhance.Brightness(diff).enhance(scale)
+    os.remove(temp_filename)
+    return ela_image
+
+
+def synthetic_scan(seed: int) -> Image.Image:
+    """4000×3000 문서 스캔 흉내 (종이 질감 노이즈 + 글자 줄 + 도장), JPEG 92 로 저장 후 다시 연 이미지"""
+    rng = random.Random(seed)
+    image = Image.merge("RGB", [Image.effect_noise((4000, 3000), 12).point(lambda v: 200 + v // 5)] * 3)
+    draw = ImageDraw.Draw(image)
+    for line in range(60):
+        y = 200 + line * 44
+        x = 250
+        while x < 3600:
+            width = rng.randint(40, 220)
+            draw.rectangle((x, y, x + width, y + 22), fill=(20, 20, 30))
+            x += width + rng.randint(15, 50)
+    draw.ellipse((3000, 2400, 3400, 2800), outline=(200, 30, 30), width=12)
+    buffer = BytesIO()
+    image.save(buffer, "JPEG", quality=92)
+    return Image.open(BytesIO(buffer.getvalue()))
+
+
+def load_corpus(corpus, count: int):
+    if corpus:
+        paths = sorted(p for p in Path(corpus).iterdir() if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+        images = [Image.open(p) for p in paths[:count]]
+    else:
+        images = [synthetic_scan(i) for i in range(count)]
+    for image in images:
+        image.load()
+    return images
+
+
+def images_per_second(func, images, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for image in images:
+            func(image)
+    return len(images) * repeat / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ELA 변환 벤치마크")
+    parser.add_argument("--corpus", help="스캔 이미지 폴더 (jpg/png)")
+    parser.add_argument("--count", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    images = load_corpus(args.corpus, args.count)
+    if not images:
+        print("❌ 샘플 이미지가 없습니다.")
+        sys.exit(1)
+
+    # 결과 동일성 확인
+    for image in images:
+        legacy = np.asarray(legacy_convert_to_ela_image(image))
+        current = np.asarray(convert_to_ela_image(image))
+        if not np.array_equal(legacy, current):
+            print(f"❌ 결과 불일치: 최대 차이 {np.abs(legacy.astype(int) - current).max()}")
+            sys.exit(1)
+    print(f"✅ 결과 동일 ({len(images)}장, {images[0].size[0]}×{images[0].size[1]})")
+
+    # 기존 방식은 작업 디렉토리에 임시 파일을 쓰므로 임시 폴더에서 실행
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            legacy_rate = images_per_second(legacy_convert_to_ela_image, images, args.repeat)
+        finally:
+            os.chdir(cwd)
+    current_rate = images_per_second(convert_to_ela_image, images, args.repeat)
+    stack_rate = images_per_second(lambda image: ela_stack(image, (95, 90, 75)), images, args.repeat)
+
+    print(f"기존 방식 (임시 파일)      : {legacy_rate:.2f} images/sec")
+    print(f"메모리 + NumPy             : {current_rate:.2f} images/sec ({current_rate / legacy_rate:.2f}x)")
+    print(f"ELA 스택 (품질 95/90/75)   : {stack_rate:.2f} images/sec")
+
+
+if __name__ == "__main__":
+    main()
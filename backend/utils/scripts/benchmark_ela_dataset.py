@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+학습 데이터 파이프라인 벤치마크 (ELA 이미지 폴더 vs ELA 텐서 캐시)
+- 기존: make_ela_dataset.py 로 이미지를 하나씩 ELA 변환해 저장 → ELAImageDataset 이 매 에폭 파일을 다시 열고 리사이즈
+        (단일 프로세스 DataLoader)
+- 캐시: build_ela_cache.py 로 프로세스 풀에서 변환해 메모리 맵에 저장 → ELATensorDataset + 워커 DataLoader
+변환(1회) 시간과 에폭당 데이터 로딩 시간(모델 forward 제외)을 비교합니다.
+--input 을 주지 않으면 문서 스캔 모양의 합성 이미지(Original/Tampered)를 만들어 사용합니다.
+
+사용법: python utils/scripts/benchmark_ela_dataset.py [--input normal] [--count 200] [--workers 4] [--epochs 2]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from PIL import Image, ImageDraw
+from torch.utils.data import DataLoader
+
+from build_ela_cache import CLASSES, build
+from ela_dataset import ELAImageDataset, ELATensorDataset
+from make_ela_dataset import save_ela_images
+
+
+def make_corpus(root: Path, count: int):
+    """count 장씩 Original/Tampered 합성 이미지 (위조본은 금액 칸을 덧칠 후 다시 저장)"""
+    rng = random.Random(0)
+    for sub in CLASSES:
+        (root / sub).mkdir(parents=True, exist_ok=True)
+    for index in range(count):
+        image = Image.new("RGB", (1600, 1200), (235, 235, 228))
+        draw = ImageDraw.Draw(image)
+        for line in range(20):
+            draw.rectangle((100, 80 + line * 50, 100 + rng.randint(400, 1300), 100 + line * 50), fill=(30, 30, 40))
+        image.save(root / "Original" / f"{index}.jpg", quality=92)
+        draw.rectangle((1100, 900, 1400, 960), fill=(235, 235, 228))
+        draw.text((1120, 915), f"{rng.randint(10000, 999999):,}", fill=(30, 30, 40))
+        image.save(root / "Tampered" / f"{index}.jpg", quality=75)
+
+
+def epoch_seconds(dataset, workers: int, epochs: int) -> float:
+    loader = DataLoader(dataset, batch_size=32, shuffle=True, num_workers=workers, persistent_workers=workers > 0)
+    times = []
+    for _ in range(epochs):
+        start = time.perf_counter()
+        for _batch in loader:
+            pass
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ELA 학습 데이터 파이프라인 벤치마크")
+    parser.add_argument("--input", default="", help="원본 이미지 폴더 (Original/Tampered)")
+    parser.add_argument("--count", type=int, default=200, help="합성 이미지 수 (클래스별)")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--epochs", type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        input_dir = Path(args.input) if args.input else tmp / "normal"
+        if not args.input:
+            make_corpus(input_dir, args.count)
+
+        # 기존: 이미지 하나씩 ELA 변환 후 저장
+        start = time.perf_counter()
+        stdout, sys.stdout = sys.stdout, open(os.devnull, "w")  # make_ela_dataset 의 파일별 출력 숨김
+        try:
+            for sub in CLASSES:
+                save_ela_images(str(input_dir / sub), str(tmp / "normal_ela" / sub))
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        legacy_build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        build(str(input_dir), str(tmp / "cache"), args.workers, "float32")
+        cache_build = time.perf_counter() - start
+
+        legacy = ELAImageDataset(str(tmp / "normal_ela"))
+        cached = ELATensorDataset(str(tmp / "cache"))
+        print(f"이미지 {len(legacy)}장, 워커 {args.workers}개")
+        print(f"{'':<28} {'변환(1회)':>10} {'에폭 로딩':>10}")
+        print(f"{'ELA 폴더 (workers=0)':<28} {legacy_build:>9.1f}s {epoch_seconds(legacy, 0, args.epochs):>9.2f}s")
+        print(f"{'ELA 폴더 (workers=' + str(args.workers) + ')':<28} {'-':>10} "
+              f"{epoch_seconds(legacy, args.workers, args.epochs):>9.2f}s")
+        print(f"{'텐서 캐시 (workers=0)':<28} {cache_build:>9.1f}s {epoch_seconds(cached, 0, args.epochs):>9.2f}s")
+        print(f"{'텐서 캐시 (workers=' + str(args.workers) + ')':<28} {'-':>10} "
+              f"{epoch_seconds(cached, args.workers, args.epochs):>9.2f}s")
+
+
+if __name__ == "__main__":
+    main()
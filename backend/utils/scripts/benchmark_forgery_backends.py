@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+위조분석 추론 백엔드 비교 (PyTorch fp32 / TorchScript / ONNX Runtime / ONNX int8)
+- 정확도 동등성: 검증용 ELA 세트(Original/Tampered 폴더, make_ela_dataset.py 출력 형식)의
+  정확도와 PyTorch fp32 대비 예측 일치율, 최대 확률 차이를 출력합니다.
+- 지연 시간: 배치 크기별 forward 시간 (p50)
+- 메모리: 백엔드마다 새 프로세스에서 로드 후 RSS 증가량과 최대 RSS
+--ela-dir 가 없으면 무작위 입력으로 일치율/확률 차이만 비교합니다.
+
+사용법: python utils/scripts/benchmark_forgery_backends.py --model-dir . [--ela-dir normal_ela_holdout] [--batch-sizes 1 16]
+(모델 파일은 utils/scripts/export_forgery_model.py --quantize 로 생성)
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+# 비교 대상: 이름 → (백엔드, 파일 이름)
+VARIANTS = {
+    "torch-fp32": ("torch", "resnet18_ela.pth"),
+    "torchscript": ("torchscript", "resnet18_ela.torchscript.pt"),
+    "onnx-fp32": ("onnx", "resnet18_ela.onnx"),
+    "onnx-int8": ("onnx", "resnet18_ela.int8.onnx"),
+}
+
+
+def rss_mb() -> float:
+    import psutil
+    return psutil.Process().memory_info().rss / 1e6
+
+
+def load_inputs(ela_dir: str, limit: int):
+    """검증 세트 (입력 텐서, 라벨). 라벨: 0 정상 / 1 위조"""
+    import torch
+    from PIL import Image
+    from services.forgery_detector import preprocess
+
+    if not ela_dir:
+        torch.manual_seed(0)
+        return torch.randn(64, 3, 224, 224), None
+    tensors, labels = [], []
+    for label, sub in enumerate(["Original", "Tampered"]):
+        folder = Path(ela_dir) / sub
+        for path in sorted(folder.iterdir())[:limit]:
+            if path.suffix.lower() in (".jpg", ".jpeg", ".png"):
+                tensors.append(preprocess(Image.open(path).convert("RGB")))
+                labels.append(label)
+    return torch.stack(tensors), labels
+
+
+def worker(variant: str, model_dir: str, ela_dir: str, limit: int, batch_sizes, repeat: int) -> dict:
+    """새 프로세스에서 한 백엔드 측정 (메모리 측정이 다른 백엔드의 영향을 받지 않도록)"""
+    import torch
+    from services.forgery_detector import load_backend
+
+    inputs, _ = load_inputs(ela_dir, limit)
+    before = rss_mb()
+    backend, filename = VARIANTS[variant]
+    model = load_backend(backend, str(Path(model_dir) / filename))
+    with torch.no_grad():
+        model(inputs[:1])  # 워밍업
+        loaded = rss_mb()
+
+        probs = []
+        for start in range(0, len(inputs), 32):
+            probs.append(torch.softmax(model(inputs[start:start + 32]), dim=1))
+        probs = torch.cat(probs)
+
+        latency = {}
+        for batch_size in batch_sizes:
+            batch = inputs[:batch_size]
+            if len(batch) < batch_size:
+                batch = batch.repeat((batch_size + len(batch) - 1) // len(batch), 1, 1, 1)[:batch_size]
+            times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                model(batch)
+                times.append(time.perf_counter() - start)
+            latency[batch_size] = statistics.median(times) * 1000
+
+    return {
+        "probs": probs[:, 1].tolist(),
+        "latency_ms": latency,
+        "load_rss_mb": loaded - before,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="위조분석 추론 백엔드 비교")
+    parser.add_argument("--model-dir", default=".", help="resnet18_ela.pth 와 내보낸 모델 폴더")
+    parser.add_argument("--ela-dir", default="", help="검증용 ELA 세트 (Original/Tampered)")
+    parser.add_argument("--limit", type=int, default=500, help="클래스별 최대 이미지 수")
+    parser.add_argument("--variants", nargs="+", default=list(VARIANTS))
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 16])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = worker(args.worker, args.model_dir, args.ela_dir, args.limit, args.batch_sizes, args.repeat)
+        print(json.dumps(result))
+        return
+
+    _, labels = load_inputs(args.ela_dir, args.limit)
+    results = {}
+    for variant in args.variants:
+        if not (Path(args.model_dir) / VARIANTS[variant][1]).exists():
+            print(f"⚠️ {variant}: 모델 파일 없음 ({VARIANTS[variant][1]}), 건너뜀")
+            continue
+        output = subprocess.run(
+            [sys.executable, __file__, "--worker", variant, "--model-dir", args.model_dir,
+             "--ela-dir", args.ela_dir, "--limit", str(args.limit), "--repeat", str(args.repeat),
+             "--batch-sizes", *map(str, args.batch_sizes)],
+            capture_output=True, text=True,
+        )
+        if output.returncode != 0:
+            print(f"❌ {variant}: {output.stderr.strip().splitlines()[-1]}")
+            continue
+        results[variant] = json.loads(output.stdout.strip().splitlines()[-1])
+
+    if not results:
+        print("❌ 측정된 백엔드가 없습니다.")
+        sys.exit(1)
+
+    reference = results.get("torch-fp32")
+    header = f"{'backend':<12} {'accuracy':>9} {'agree':>7} {'max Δp':>8}"
+    header += "".join(f" {f'b{size}(ms)':>9}" for size in args.batch_sizes)
+    header += f" {'load RSS':>9} {'peak RSS':>9}"
+    print(f"\n검증 입력 {len(next(iter(results.values()))['probs'])}개" + ("" if labels else " (무작위 입력)"))
+    print(header)
+    for variant, result in results.items():
+        predictions = [p >= 0.5 for p in result["probs"]]
+        accuracy = (f"{sum(int(p) == label for p, label in zip(predictions, labels)) / len(labels):.2%}"
+                    if labels else "-")
+        agree, max_delta = "-", "-"
+        if reference:
+            reference_predictions = [p >= 0.5 for p in reference["probs"]]
+            agree = f"{sum(a == b for a, b in zip(predictions, reference_predictions)) / len(predictions):.1%}"
+            max_delta = f"{max(abs(a - b) for a, b in zip(result['probs'], reference['probs'])):.4f}"
+        line = f"{variant:<12} {accuracy:>9} {agree:>7} {max_delta:>8}"
+        line += "".join(f" {result['latency_ms'][str(size)]:>9.1f}" for size in args.batch_sizes)
+        line += f" {result['load_rss_mb']:>7.0f}MB {result['peak_rss_mb']:>7.0f}MB"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
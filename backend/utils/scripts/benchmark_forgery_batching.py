@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+위조분석 마이크로 배치 추론 벤치마크
+- 동시 요청(클라이언트 스레드)을 ForgeryBatcher 로 보내 최대 배치 크기 1~32 별
+  처리량(images/sec)과 요청 지연 시간(p50/p95/p99)을 측정합니다.
+- 입력은 (3, 224, 224) 텐서라 ELA 변환 시간은 포함하지 않습니다. (forward 만 비교)
+- --weights 가 없으면 학습되지 않은 ResNet18 을 사용합니다. (연산량은 같으므로 속도 측정에는 충분)
+
+사용법: python utils/scripts/benchmark_forgery_batching.py [--clients 32] [--requests 20] [--wait-ms 5] [--threads 0]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import torch
+from torchvision import models
+
+from services.forgery_batcher import ForgeryBatcher
+
+BATCH_SIZES = (1, 2, 4, 8, 16, 32)
+
+
+def build_model(weights: str):
+    model = models.resnet18()
+    model.fc = torch.nn.Linear(model.fc.in_features, 2)
+    if weights:
+        model.load_state_dict(torch.load(weights, map_location="cpu"))
+    model.eval()
+
+    def run_batch(batch: torch.Tensor):
+        with torch.no_grad():
+            probs = torch.softmax(model(batch), dim=1)
+            confidence, pred_class = torch.max(probs, 1)
+        return [{"confidence": c, "predicted_class": p} for c, p in zip(confidence.tolist(), pred_class.tolist())]
+
+    return run_batch
+
+
+def percentile(values, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def measure(run_batch, batch_size: int, clients: int, requests: int, wait_ms: float):
+    batcher = ForgeryBatcher(run_batch, max_batch_size=batch_size, max_wait_ms=wait_ms)
+    tensor = torch.randn(3, 224, 224)
+    batcher.predict(tensor)  # 배치 스레드 시작 + 워밍업
+    latencies = []
+    lock = threading.Lock()
+
+    def client():
+        local = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            batcher.predict(tensor)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    batcher.close()
+    return len(latencies) / elapsed, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="위조분석 마이크로 배치 추론 벤치마크")
+    parser.add_argument("--clients", type=int, default=32, help="동시 요청 스레드 수")
+    parser.add_argument("--requests", type=int, default=20, help="스레드당 요청 수")
+    parser.add_argument("--wait-ms", type=float, default=5, help="배치 최대 대기 시간")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=list(BATCH_SIZES))
+    parser.add_argument("--threads", type=int, default=0, help="torch 연산 스레드 수 (0 = 기본값)")
+    parser.add_argument("--weights", default="", help="학습된 가중치 (resnet18_ela.pth)")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    run_batch = build_model(args.weights)
+    run_batch(torch.randn(1, 3, 224, 224))
+
+    print(f"동시 요청 {args.clients}개 × {args.requests}회, 최대 대기 {args.wait_ms}ms, torch 스레드 {torch.get_num_threads()}개")
+    print(f"{'batch':>6} {'images/sec':>11} {'p50(ms)':>8} {'p95(ms)':>8} {'p99(ms)':>8} {'mean(ms)':>9}")
+    baseline = None
+    for batch_size in args.batch_sizes:
+        throughput, latencies = measure(run_batch, batch_size, args.clients, args.requests, args.wait_ms)
+        baseline = baseline or throughput
+        print(f"{batch_size:>6} {throughput:>11.1f} {percentile(latencies, 0.5) * 1000:>8.1f} "
+              f"{percentile(latencies, 0.95) * 1000:>8.1f} {percentile(latencies, 0.99) * 1000:>8.1f} "
+              f"{statistics.mean(latencies) * 1000:>9.1f}  ({throughput / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+위조분석 평가/벤치마크 (합성 위조/정상 문서 세트)
+- 정확도: accuracy, ROC-AUC (위조 확률 기준), 혼동 행렬
+- 단계별 지연 시간 (이미지 1장): decode / ELA / transform / forward 의 p50, p95
+- 처리량: 배치 크기 × torch 스레드 수별 images/sec (forward 만)
+- 최대 RSS
+ELA 나 추론 백엔드를 바꿀 때 같은 세트로 전후를 비교하는 용도입니다.
+
+합성 세트 (--corpus 가 없을 때): 문서 스캔 모양 이미지를 JPEG 로 저장한 정상본과,
+다른 문서에서 잘라 다른 품질로 압축한 조각(금액/날짜 칸)을 붙여 넣고 다시 저장한 위조본.
+--corpus 는 Original/Tampered 폴더 (학습 데이터와 같은 형식) 를 받습니다.
+
+사용법: python utils/scripts/benchmark_forgery_eval.py [--weights resnet18_ela.pth] [--backend torch]
+        [--count 100] [--batch-sizes 1 8 32] [--threads 1 2 4] [--save-corpus eval_corpus]
+"""
+
+import argparse
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import torch
+from PIL import Image, ImageDraw
+
+from services import forgery_detector
+from utils.ela import convert_to_ela_image
+
+CLASSES = ["Original", "Tampered"]
+
+
+def synthetic_document(rng: random.Random) -> Image.Image:
+    """영수증/진단서 스캔 흉내 (종이 노이즈 + 글자 줄 + 표 + 도장)"""
+    width, height = rng.choice([(1240, 1754), (1654, 2339)])
+    image = Image.merge("RGB", [Image.effect_noise((width, height), 10).point(lambda v: 205 + v // 6)] * 3)
+    draw = ImageDraw.Draw(image)
+    for line in range(height // 60):
+        y = 120 + line * 50
+        x = 100
+        while x < width - 300:
+            word = rng.randint(30, 180)
+            draw.rectangle((x, y, x + word, y + 18), fill=(25, 25, 35))
+            x += word + rng.randint(12, 40)
+    for row in range(6):
+        draw.line((100, height - 700 + row * 80, width - 100, height - 700 + row * 80), fill=(60, 60, 60), width=2)
+    cx, cy = width - 300, height - 250
+    draw.ellipse((cx - 90, cy - 90, cx + 90, cy + 90), outline=(190, 30, 30), width=8)
+    return image
+
+
+def encode(image: Image.Image, quality: int) -> bytes:
+    buffer = BytesIO()
+    image.save(buffer, "JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def tamper(original: bytes, donor: bytes, rng: random.Random) -> bytes:
+    """다른 문서의 조각을 다른 품질로 압축해 붙여 넣은 뒤 다시 저장 (붙여넣기 + 재압축)"""
+    image = Image.open(BytesIO(original)).convert("RGB")
+    source = Image.open(BytesIO(donor)).convert("RGB")
+    w, h = rng.randint(160, 420), rng.randint(40, 120)
+    sx, sy = rng.randint(0, source.width - w), rng.randint(0, source.height - h)
+    patch = Image.open(BytesIO(encode(source.crop((sx, sy, sx + w, sy + h)), rng.randint(60, 98))))
+    if rng.random() < 0.5:
+        # 금액을 고쳐 쓴 것처럼 조각 위에 숫자 덧칠
+        draw = ImageDraw.Draw(patch)
+        draw.rectangle((5, 5, w - 5, h - 5), fill=(215, 215, 210))
+        draw.text((10, h // 3), f"{rng.randint(10000, 9999999):,}", fill=(20, 20, 30))
+    image.paste(patch, (rng.randint(100, image.width - w - 100), rng.randint(100, image.height - h - 100)))
+    return encode(image, rng.randint(85, 95))
+
+
+def make_corpus(count: int, seed: int):
+    rng = random.Random(seed)
+    originals = [encode(synthetic_document(rng), rng.randint(85, 95)) for _ in range(count)]
+    tampered = [tamper(originals[index], originals[(index + 1) % count], rng) for index in range(count)]
+    return [(data, 0) for data in originals] + [(data, 1) for data in tampered]
+
+
+def load_corpus(folder: str, limit: int):
+    samples = []
+    for label, sub in enumerate(CLASSES):
+        for path in sorted((Path(folder) / sub).iterdir())[:limit]:
+            if path.suffix.lower() in (".jpg", ".jpeg", ".png"):
+                samples.append((path.read_bytes(), label))
+    return samples
+
+
+def roc_auc(scores, labels) -> float:
+    """위조 확률 순위 기반 AUC (Mann-Whitney U, 동점은 평균 순위)"""
+    order = sorted(range(len(scores)), key=scores.__getitem__)
+    ranks = [0.0] * len(scores)
+    start = 0
+    while start < len(order):
+        end = start
+        while end + 1 < len(order) and scores[order[end + 1]] == scores[order[start]]:
+            end += 1
+        for position in range(start, end + 1):
+            ranks[order[position]] = (start + end) / 2 + 1
+        start = end + 1
+    positives = sum(labels)
+    negatives = len(labels) - positives
+    if not positives or not negatives:
+        return float("nan")
+    rank_sum = sum(rank for rank, label in zip(ranks, labels) if label == 1)
+    return (rank_sum - positives * (positives + 1) / 2) / (positives * negatives)
+
+
+def percentile(values, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def evaluate(model, samples):
+    """이미지별 단계 시간 측정 + 위조 확률"""
+    stages = {"decode": [], "ela": [], "transform": [], "forward": []}
+    scores, tensors = [], []
+    with torch.no_grad():
+        for data, _ in samples:
+            start = time.perf_counter()
+            image = Image.open(BytesIO(data))
+            image.load()
+            decoded = time.perf_counter()
+            ela_image = convert_to_ela_image(image)
+            converted = time.perf_counter()
+            tensor = forgery_detector.preprocess(ela_image)
+            transformed = time.perf_counter()
+            probs = torch.softmax(model(tensor.unsqueeze(0)), dim=1)
+            finished = time.perf_counter()
+
+            stages["decode"].append(decoded - start)
+            stages["ela"].append(converted - decoded)
+            stages["transform"].append(transformed - converted)
+            stages["forward"].append(finished - transformed)
+            scores.append(probs[0, 1].item())
+            tensors.append(tensor)
+    return stages, scores, torch.stack(tensors)
+
+
+def throughput(model, tensors, batch_size: int, repeat: int) -> float:
+    batch = tensors[:batch_size]
+    if len(batch) < batch_size:
+        batch = batch.repeat((batch_size + len(batch) - 1) // len(batch), 1, 1, 1)[:batch_size]
+    with torch.no_grad():
+        model(batch)  # 워밍업
+        start = time.perf_counter()
+        for _ in range(repeat):
+            model(batch)
+    return batch_size * repeat / (time.perf_counter() - start)
+
+
+def default_model_path(backend: str) -> str:
+    return getattr(forgery_detector, forgery_detector.BACKENDS[backend][1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="위조분석 평가/벤치마크")
+    parser.add_argument("--corpus", default="", help="평가 이미지 폴더 (Original/Tampered), 없으면 합성 세트")
+    parser.add_argument("--count", type=int, default=100, help="클래스별 이미지 수")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save-corpus", default="", help="합성 세트를 이 폴더에 저장")
+    parser.add_argument("--backend", default=forgery_detector.FORGERY_BACKEND, choices=list(forgery_detector.BACKENDS))
+    parser.add_argument("--weights", default="", help="모델 파일 (없으면 백엔드 기본 경로, torch 는 없으면 무작위 가중치)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--threads", type=int, nargs="+", default=sorted({1, torch.get_num_threads()}))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    samples = load_corpus(args.corpus, args.count) if args.corpus else make_corpus(args.count, args.seed)
+    print(f"평가 세트: {len(samples)}장 ({'폴더 ' + args.corpus if args.corpus else '합성'}, "
+          f"준비 {time.perf_counter() - start:.1f}s)")
+    if args.save_corpus:
+        for index, (data, label) in enumerate(samples):
+            folder = Path(args.save_corpus) / CLASSES[label]
+            folder.mkdir(parents=True, exist_ok=True)
+            (folder / f"{index}.jpg").write_bytes(data)
+        print(f"💾 합성 세트 저장: {args.save_corpus}")
+
+    path = args.weights or default_model_path(args.backend)
+    if args.backend == "torch" and not os.path.exists(path):
+        print(f"⚠️ 모델 파일이 없어 무작위 가중치 사용: {path} (정확도는 의미 없음, 속도 측정용)")
+        model = forgery_detector.build_resnet().eval()
+    else:
+        model = forgery_detector.load_backend(args.backend, path)
+
+    stages, scores, tensors = evaluate(model, samples)
+    labels = [label for _, label in samples]
+    predictions = [int(score >= 0.5) for score in scores]
+    accuracy = sum(p == label for p, label in zip(predictions, labels)) / len(labels)
+    matrix = {(actual, predicted): 0 for actual in (0, 1) for predicted in (0, 1)}
+    for predicted, actual in zip(predictions, labels):
+        matrix[(actual, predicted)] += 1
+
+    print(f"\n[정확도] backend={args.backend}")
+    print(f"accuracy {accuracy:.2%}  ROC-AUC {roc_auc(scores, labels):.4f}")
+    print(f"정상→정상 {matrix[(0, 0)]}  정상→위조 {matrix[(0, 1)]}  위조→정상 {matrix[(1, 0)]}  위조→위조 {matrix[(1, 1)]}")
+
+    print("\n[단계별 지연 시간, 이미지 1장]")
+    print(f"{'stage':<10} {'p50(ms)':>8} {'p95(ms)':>8} {'mean(ms)':>9}")
+    total = [sum(values) for values in zip(*stages.values())]
+    for name, values in list(stages.items()) + [("total", total)]:
+        print(f"{name:<10} {percentile(values, 0.5) * 1000:>8.1f} {percentile(values, 0.95) * 1000:>8.1f} "
+              f"{statistics.mean(values) * 1000:>9.1f}")
+
+    print("\n[처리량 images/sec, forward 만]")
+    print(f"{'threads':>8}" + "".join(f" {f'b{size}':>8}" for size in args.batch_sizes))
+    default_threads = torch.get_num_threads()
+    for threads in args.threads:
+        torch.set_num_threads(threads)
+        line = f"{threads:>8}"
+        for batch_size in args.batch_sizes:
+            line += f" {throughput(model, tensors, batch_size, args.repeat):>8.1f}"
+        print(line)
+    torch.set_num_threads(default_threads)
+
+    print(f"\n최대 RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
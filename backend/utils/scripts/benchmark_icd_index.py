@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+ICD-10 분류 인덱스 조회 벤치마크
+- clause_rules.yaml 의 icd_groups 로 만든 접두어 인덱스와
+  범위표를 매번 선형 탐색하는 방식, 진단명 키워드 부분 문자열 비교 방식의 조회 처리량을 비교합니다.
+- DB 없이 임의로 생성한 ICD 코드로 실행합니다.
+
+사용법: python utils/scripts/benchmark_icd_index.py [--lookups 200000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import yaml
+
+from services.clause_rules import RULES_PATH, get_rule_engine
+from services.icd_index import normalize_code
+
+DIAGNOSIS_NAMES = ["위암", "요골 골절", "급성 기관지염", "뇌경색", "폐렴", "발목 염좌", "협심증", "급성 위염"]
+
+
+def build_codes(n: int, seed: int = 42):
+    rng = random.Random(seed)
+    letters = "ABCDEFGHIJKLMNOPQRSTZ"
+    return [
+        f"{rng.choice(letters)}{rng.randint(0, 99):02d}.{rng.randint(0, 9)}"
+        for _ in range(n)
+    ]
+
+
+def build_range_table(icd_groups):
+    """비교용: (시작, 끝, 그룹) 범위 목록을 매번 처음부터 탐색"""
+    table = []
+    for group, ranges in icd_groups.items():
+        for spec in ranges:
+            start, _, end = str(spec).partition("-")
+            start, end = normalize_code(start), normalize_code(end or start)
+            table.append((start, end, group))
+    return table
+
+
+def run_linear(table, codes):
+    results = []
+    for code in codes:
+        code = normalize_code(code)
+        results.append(frozenset(
+            group for start, end, group in table
+            if start <= code[:len(start)] and code[:len(end)] <= end
+        ))
+    return results
+
+
+def run_index(index, codes):
+    lookup = index.lookup
+    return [lookup(code) for code in codes]
+
+
+def run_keywords(keyword_groups, names):
+    return [
+        frozenset(group for group, words in keyword_groups.items() if any(w in name for w in words))
+        for name in names
+    ]
+
+
+def timed(fn, *args, repeat: int = 3):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ICD-10 분류 인덱스 조회 벤치마크")
+    parser.add_argument("--lookups", type=int, default=200000)
+    args = parser.parse_args()
+
+    engine = get_rule_engine()
+    icd_groups = yaml.safe_load(RULES_PATH.read_text(encoding="utf-8")).get("icd_groups") or {}
+
+    codes = build_codes(args.lookups)
+    names = [DIAGNOSIS_NAMES[i % len(DIAGNOSIS_NAMES)] for i in range(args.lookups)]
+    table = build_range_table(icd_groups)
+
+    linear_time, linear_results = timed(run_linear, table, codes)
+    index_time, index_results = timed(run_index, engine.icd_index, codes)
+    keyword_time, _ = timed(run_keywords, engine.keyword_groups, names)
+
+    if linear_results != index_results:
+        print("❌ 결과 불일치: 인덱스와 범위표 탐색 결과가 다릅니다.")
+        sys.exit(1)
+
+    classified = sum(1 for groups in index_results if groups)
+    print(f"ICD 코드 {len(codes):,}건 조회 (분류됨 {classified:,}건, 인덱스 접두어 {len(engine.icd_index):,}개)")
+    print(f"범위표 선형 탐색 : {linear_time:.3f}s ({len(codes) / linear_time:,.0f} lookups/s)")
+    print(f"접두어 인덱스    : {index_time:.3f}s ({len(codes) / index_time:,.0f} lookups/s)")
+    print(f"진단명 키워드    : {keyword_time:.3f}s ({len(names) / keyword_time:,.0f} lookups/s)")
+    print(f"속도 향상(선형 대비): {linear_time / index_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
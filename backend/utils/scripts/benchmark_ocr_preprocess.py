@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+OCR 전송 전 이미지 정규화 벤치마크
+- 샘플 이미지마다 원본/정규화 후 전송 바이트(base64 포함)와 정규화 시간을 비교합니다.
+- --ocr 를 주면 실제 추출 API(UPSTAGE_OCR_API_URL)를 호출해서 정규화 전/후 전체 OCR 지연 시간도 측정합니다.
+- --corpus 를 주지 않으면 휴대폰 사진 크기(4032×3024, JPEG 95, EXIF 회전)의 영수증 모양 이미지를 만들어 사용합니다.
+
+사용법: python utils/scripts/benchmark_ocr_preprocess.py [--corpus ./samples] [--count 10] [--ocr]
+"""
+
+import argparse
+import asyncio
+import base64
+import os
+import random
+import statistics
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from PIL import Image, ImageDraw
+
+from utils.ocr_image import OCR_IMAGE_MAX_SIDE, normalize_for_ocr
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+
+
+def synthetic_photo(seed: int) -> bytes:
+    """영수증을 찍은 휴대폰 사진 흉내 (글자 줄 + 노이즈, 세로 촬영 EXIF)"""
+    rng = random.Random(seed)
+    image = Image.effect_noise((4032, 3024), 24).convert("RGB")
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((600, 300, 3400, 2700), fill=(245, 245, 240))
+    for line in range(40):
+        y = 360 + line * 58
+        x = 680
+        for _ in range(rng.randint(4, 12)):
+            width = rng.randint(60, 260)
+            draw.rectangle((x, y, x + width, y + 30), fill=(30, 30, 30))
+            x += width + rng.randint(20, 60)
+            if x > 3300:
+                break
+    exif = image.getexif()
+    exif[0x0112] = 6  # 90도 회전해서 찍힌 사진
+    buffer = BytesIO()
+    image.save(buffer, "JPEG", quality=95, exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+def load_corpus(corpus, count: int):
+    if corpus:
+        paths = sorted(p for p in Path(corpus).iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+        return [(p.name, p.read_bytes()) for p in paths[:count]]
+    return [(f"synthetic_{i}.jpg", synthetic_photo(i)) for i in range(count)]
+
+
+async def measure_ocr(samples, preprocess: bool):
+    from services.ocr_client import ocr_client
+    from api.ocr import receipt_schema
+
+    latencies = []
+    for _, data in samples:
+        start = time.perf_counter()
+        await ocr_client.extract(data, receipt_schema, preprocess=preprocess)
+        latencies.append(time.perf_counter() - start)
+    await ocr_client.close()
+    return latencies
+
+
+def percentile(values, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR 이미지 정규화 벤치마크")
+    parser.add_argument("--corpus", help="샘플 이미지 폴더 (jpg/png)")
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--ocr", action="store_true", help="추출 API 를 실제로 호출해서 지연 시간 측정")
+    args = parser.parse_args()
+
+    samples = load_corpus(args.corpus, args.count)
+    if not samples:
+        print("❌ 샘플 이미지가 없습니다.")
+        sys.exit(1)
+
+    raw_bytes = raw_b64 = norm_bytes = norm_b64 = 0
+    prep_times = []
+    for name, data in samples:
+        start = time.perf_counter()
+        normalized, changed = normalize_for_ocr(data)
+        prep_times.append(time.perf_counter() - start)
+        raw_bytes += len(data)
+        raw_b64 += len(base64.b64encode(data))
+        norm_bytes += len(normalized)
+        norm_b64 += len(base64.b64encode(normalized))
+        size = Image.open(BytesIO(normalized)).size
+        print(f"  {name}: {len(data) / 1e6:.2f}MB → {len(normalized) / 1e6:.2f}MB {size}{'' if changed else ' (원본 유지)'}")
+
+    print(f"\n샘플 {len(samples)}개 (최대 변 {OCR_IMAGE_MAX_SIDE}px)")
+    print(f"원본 전송량   : {raw_bytes / 1e6:.2f}MB (base64 {raw_b64 / 1e6:.2f}MB)")
+    print(f"정규화 전송량 : {norm_bytes / 1e6:.2f}MB (base64 {norm_b64 / 1e6:.2f}MB), {1 - norm_b64 / raw_b64:.1%} 감소")
+    print(f"정규화 시간   : 평균 {statistics.mean(prep_times) * 1000:.0f}ms, p95 {percentile(prep_times, 0.95) * 1000:.0f}ms")
+
+    if args.ocr:
+        before = asyncio.run(measure_ocr(samples, preprocess=False))
+        after = asyncio.run(measure_ocr(samples, preprocess=True))
+        print(f"OCR 지연(원본)   : p50 {percentile(before, 0.5):.2f}s, p95 {percentile(before, 0.95):.2f}s")
+        print(f"OCR 지연(정규화) : p50 {percentile(after, 0.5):.2f}s, p95 {percentile(after, 0.95):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+OCR 엔드포인트 처리량 벤치마크 (로컬 OCR 대역 서버 사용)
+- utils/scripts/ocr_stub_server.py 를 띄우고, 백엔드를 uvicorn 워커 수별로 실행한 뒤
+  locust(OcrUser)로 진단서/영수증 OCR 엔드포인트에 부하를 줍니다.
+- 워커 수별 p50/p95/p99 지연 시간과 초당 요청 수를 표로 출력합니다.
+- DB 에 이미지가 업로드된 진단서/영수증이 있어야 합니다. (ID 를 인자로 전달)
+
+사용법: python utils/scripts/benchmark_ocr_throughput.py --diagnosis-ids 1,2,3 --receipt-ids 4,5 \\
+        [--workers 1 2 4] [--users 50] [--duration 30s] [--latency-ms 1500]
+"""
+
+import argparse
+import csv
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+
+def wait_until_up(url: str, timeout: float = 60) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=2).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"서버가 응답하지 않습니다: {url}")
+
+
+def stop(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def aggregated_stats(csv_prefix: str) -> dict:
+    with open(f"{csv_prefix}_stats.csv", newline="") as f:
+        for row in csv.DictReader(f):
+            if row["Name"] == "Aggregated":
+                return row
+    raise RuntimeError("locust 결과에 Aggregated 행이 없습니다.")
+
+
+def run_locust(host: str, users: int, duration: str, csv_prefix: str, env: dict) -> dict:
+    subprocess.run(
+        [sys.executable, "-m", "locust", "-f", str(BACKEND_DIR / "locustfile.py"), "OcrUser",
+         "--headless", "-u", str(users), "-r", str(users), "-t", duration,
+         "--host", host, "--csv", csv_prefix, "--only-summary"],
+        cwd=BACKEND_DIR, env=env, check=False, stdout=subprocess.DEVNULL,
+    )
+    return aggregated_stats(csv_prefix)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR 엔드포인트 처리량 벤치마크")
+    parser.add_argument("--diagnosis-ids", default="", help="진단서 ID (쉼표 구분)")
+    parser.add_argument("--receipt-ids", default="", help="영수증 ID (쉼표 구분)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="uvicorn 워커 수 목록")
+    parser.add_argument("--users", type=int, default=50, help="동시 사용자 수")
+    parser.add_argument("--duration", default="30s", help="워커 수별 부하 시간 (locust -t)")
+    parser.add_argument("--latency-ms", type=float, default=1500, help="OCR 대역 서버 평균 지연")
+    parser.add_argument("--jitter-ms", type=float, default=300)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--api-port", type=int, default=8100)
+    parser.add_argument("--stub-port", type=int, default=8900)
+    args = parser.parse_args()
+
+    if not args.diagnosis_ids and not args.receipt_ids:
+        print("❌ --diagnosis-ids 또는 --receipt-ids 가 필요합니다.")
+        sys.exit(1)
+
+    env = dict(os.environ)
+    env.update({
+        "UPSTAGE_OCR_API_URL": f"http://127.0.0.1:{args.stub_port}/v1/information-extraction",
+        "UPSTAGE_OCR_API_KEY": env.get("UPSTAGE_OCR_API_KEY", "stub"),
+        "LOCUST_DIAGNOSIS_IDS": args.diagnosis_ids,
+        "LOCUST_RECEIPT_IDS": args.receipt_ids,
+    })
+
+    stub = subprocess.Popen(
+        [sys.executable, str(SCRIPT_DIR / "ocr_stub_server.py"), "--port", str(args.stub_port),
+         "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+         "--error-rate", str(args.error_rate)],
+        cwd=BACKEND_DIR,
+    )
+    results = []
+    try:
+        wait_until_up(f"http://127.0.0.1:{args.stub_port}/stats")
+        for workers in args.workers:
+            print(f"🚀 워커 {workers}개로 백엔드 실행, 사용자 {args.users}명 × {args.duration}")
+            api = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+                 "--port", str(args.api_port), "--workers", str(workers), "--log-level", "warning"],
+                cwd=BACKEND_DIR, env=env,
+            )
+            try:
+                host = f"http://127.0.0.1:{args.api_port}"
+                wait_until_up(f"{host}/health")
+                with tempfile.TemporaryDirectory() as tmp:
+                    stats = run_locust(host, args.users, args.duration, os.path.join(tmp, "ocr"), env)
+                results.append((workers, stats))
+            finally:
+                stop(api)
+    finally:
+        stop(stub)
+
+    print(f"\nOCR 대역 서버 지연 {args.latency_ms:.0f}±{args.jitter_ms:.0f}ms, 오류율 {args.error_rate:.1%}")
+    print(f"{'workers':>8} {'requests':>9} {'fail':>6} {'p50(ms)':>8} {'p95(ms)':>8} {'p99(ms)':>8} {'req/s':>8}")
+    for workers, stats in results:
+        print(f"{workers:>8} {stats['Request Count']:>9} {stats['Failure Count']:>6} "
+              f"{stats['50%']:>8} {stats['95%']:>8} {stats['99%']:>8} {float(stats['Requests/s']):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+학습용 ELA 텐서 캐시 생성
+- 원본 이미지(Original/Tampered 폴더)를 프로세스 풀에서 병렬로 ELA 변환하고,
+  추론과 같은 전처리(forgery_detector.preprocess: 224×224 리사이즈 + 정규화)를 거친 텐서를
+  하나의 메모리 맵 배열(tensors.npy, (N, 3, 224, 224))에 씁니다.
+- 라벨/파일 목록은 index.json 에 저장합니다. (0 정상 / 1 위조)
+- 학습 시 ela_dataset.ELATensorDataset 이 이 배열을 복사 없이 읽으므로 매 에폭 이미지 디코딩/ELA 가 없습니다.
+- make_ela_dataset.py 와 달리 ELA 결과를 JPEG/PNG 로 다시 저장하지 않아 학습 입력이 서비스 추론 입력과 같습니다.
+
+사용법: python utils/scripts/build_ela_cache.py --input normal --output normal_ela_cache [--workers 8] [--dtype float16]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import numpy as np
+
+CLASSES = ["Original", "Tampered"]
+EXTENSIONS = (".jpg", ".jpeg", ".png")
+SHAPE = (3, 224, 224)
+
+
+def list_samples(input_dir: str):
+    samples = []
+    for label, sub in enumerate(CLASSES):
+        folder = Path(input_dir) / sub
+        for path in sorted(folder.iterdir()):
+            if path.suffix.lower() in EXTENSIONS:
+                samples.append((str(path), label))
+    return samples
+
+
+def _init_worker():
+    # 프로세스마다 torch 스레드를 1개로 (프로세스 수만큼 코어 사용)
+    import torch
+    torch.set_num_threads(1)
+
+
+def convert(path: str):
+    """이미지 하나 → 정규화된 (3, 224, 224) float32 배열 (실패 시 None)"""
+    from PIL import Image
+    from services.forgery_detector import preprocess
+    from utils.ela import convert_to_ela_image
+
+    try:
+        with Image.open(path) as image:
+            return preprocess(convert_to_ela_image(image)).numpy()
+    except Exception as e:
+        print(f"⚠️ 변환 실패: {path}: {e}")
+        return None
+
+
+def build(input_dir: str, output_dir: str, workers: int, dtype: str) -> dict:
+    samples = list_samples(input_dir)
+    if not samples:
+        raise ValueError(f"이미지가 없습니다: {input_dir}/{{{','.join(CLASSES)}}}")
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    tensors = np.lib.format.open_memmap(output / "tensors.npy", mode="w+", dtype=dtype,
+                                        shape=(len(samples),) + SHAPE)
+
+    files, labels = [], []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        # map 은 입력 순서대로 결과를 돌려주므로 실패한 이미지만 건너뛰고 앞에서부터 채움
+        for (path, label), array in zip(samples, pool.map(convert, [path for path, _ in samples], chunksize=8)):
+            if array is None:
+                continue
+            tensors[len(files)] = array
+            files.append(os.path.relpath(path, input_dir))
+            labels.append(label)
+            if len(files) % 500 == 0:
+                print(f"  {len(files)}/{len(samples)}")
+    tensors.flush()
+    del tensors
+
+    if len(files) < len(samples):
+        # 실패한 만큼 배열 크기 줄이기 (헤더의 shape 수정)
+        full = np.load(output / "tensors.npy", mmap_mode="r")
+        trimmed = np.lib.format.open_memmap(output / "tensors.tmp.npy", mode="w+", dtype=dtype,
+                                            shape=(len(files),) + SHAPE)
+        trimmed[:] = full[:len(files)]
+        trimmed.flush()
+        del full, trimmed
+        os.replace(output / "tensors.tmp.npy", output / "tensors.npy")
+
+    index = {
+        "count": len(files),
+        "shape": list(SHAPE),
+        "dtype": dtype,
+        "classes": CLASSES,
+        "files": files,
+        "labels": labels,
+    }
+    with open(output / "index.json", "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="학습용 ELA 텐서 캐시 생성")
+    parser.add_argument("--input", default="normal", help="원본 이미지 폴더 (Original/Tampered)")
+    parser.add_argument("--output", default="normal_ela_cache", help="캐시 폴더 (tensors.npy, index.json)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="ELA 변환 프로세스 수")
+    parser.add_argument("--dtype", choices=["float32", "float16"], default="float32",
+                        help="저장 형식 (float16 이면 디스크/페이지 캐시 절반, 읽을 때 float32 로 변환)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = build(args.input, args.output, args.workers, args.dtype)
+    elapsed = time.perf_counter() - start
+    size_mb = os.path.getsize(Path(args.output) / "tensors.npy") / 1e6
+    print(f"✅ {index['count']}개 변환 완료 ({elapsed:.1f}s, {index['count'] / elapsed:.1f} images/sec, "
+          f"{size_mb:.0f}MB, 정상 {index['labels'].count(0)} / 위조 {index['labels'].count(1)})")
+
+
+if __name__ == "__main__":
+    main()
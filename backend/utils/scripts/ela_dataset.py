@@ -1,4 +1,7 @@
+import json
 import os
+import numpy as np
+import torch
 from torch.utils.data import Dataset
 from torchvision import transforms
 from PIL import Image
@@ -25,6 +28,35 @@ class ELAImageDataset(Dataset):
         img = Image.open(path).convert('RGB')
         return self.transform(img), label
 
+class ELATensorDataset(Dataset):
+    """
+    build_ela_cache.py 로 만든 ELA 텐서 캐시(tensors.npy 메모리 맵 + index.json)를 읽는 데이터셋
+    이미지 디코딩/ELA/리사이즈 없이 메모리 맵에서 바로 텐서를 만듭니다. (float32 는 복사 없음)
+    DataLoader 워커마다 메모리 맵을 따로 열므로 num_workers 를 늘려도 배열이 복사되지 않습니다.
+    """
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        with open(os.path.join(cache_dir, "index.json"), encoding="utf-8") as f:
+            self.index = json.load(f)
+        self.labels = self.index["labels"]
+        self._tensors = None
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getstate__(self):
+        # 워커 프로세스로 넘길 때 메모리 맵은 빼고 경로만 전달
+        return {**self.__dict__, "_tensors": None}
+
+    def __getitem__(self, idx):
+        if self._tensors is None:
+            # copy-on-write 로 열어 쓰기 가능한 배열 → torch.from_numpy 가 복사 없이 감쌈
+            self._tensors = np.load(os.path.join(self.cache_dir, "tensors.npy"), mmap_mode="c")
+        tensor = torch.from_numpy(self._tensors[idx])
+        if tensor.dtype != torch.float32:
+            tensor = tensor.float()
+        return tensor, self.labels[idx]
+
 # 사용 예시
 if __name__ == "__main__":
     dataset = ELAImageDataset("normal_ela")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+위조분석 ResNet18-ELA 모델 내보내기 (CPU 추론 백엔드용)
+- ONNX (배치 크기 가변) 와 TorchScript 로 내보내고, --quantize 면 ONNX 동적 int8 양자화 모델도 만듭니다.
+- 내보낸 모델과 원본 PyTorch 모델의 출력(logits)을 무작위 입력으로 비교해서 최대 차이를 출력합니다.
+  (실제 데이터 정확도 비교는 utils/scripts/benchmark_forgery_backends.py)
+
+사용법: python utils/scripts/export_forgery_model.py [--weights resnet18_ela.pth] [--out-dir .] [--quantize] [--no-torchscript]
+백엔드 선택: FORGERY_BACKEND=onnx FORGERY_ONNX_PATH=resnet18_ela.int8.onnx
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import torch
+
+from services.forgery_detector import load_backend
+
+
+def export_onnx(model: torch.nn.Module, path: Path, opset: int) -> None:
+    torch.onnx.export(
+        model, torch.zeros(1, 3, 224, 224), str(path),
+        input_names=["input"], output_names=["logits"],
+        dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}},
+        opset_version=opset, dynamo=False,
+    )
+
+
+def quantize_onnx(source: Path, target: Path) -> None:
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    # 양자화 전 그래프 최적화/shape 추론 (권장 전처리)
+    prepared = target.with_suffix(".prep.onnx")
+    quant_pre_process(str(source), str(prepared))
+    try:
+        # CPU 실행기의 ConvInteger 는 uint8 가중치만 지원
+        quantize_dynamic(str(prepared), str(target), weight_type=QuantType.QUInt8)
+    finally:
+        prepared.unlink(missing_ok=True)
+
+
+def max_logit_diff(reference: torch.nn.Module, backend: str, path: Path) -> float:
+    exported = load_backend(backend, str(path))
+    batch = torch.randn(8, 3, 224, 224)
+    with torch.no_grad():
+        return float((reference(batch) - exported(batch)).abs().max())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="위조분석 모델 ONNX/TorchScript 내보내기")
+    parser.add_argument("--weights", default="resnet18_ela.pth")
+    parser.add_argument("--out-dir", default=".")
+    parser.add_argument("--opset", type=int, default=17)
+    parser.add_argument("--quantize", action="store_true", help="ONNX 동적 int8 양자화 모델도 생성")
+    parser.add_argument("--no-torchscript", action="store_true")
+    args = parser.parse_args()
+
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stem = Path(args.weights).stem
+    model = load_backend("torch", args.weights)
+
+    onnx_path = out_dir / f"{stem}.onnx"
+    export_onnx(model, onnx_path, args.opset)
+    print(f"✅ ONNX: {onnx_path} ({onnx_path.stat().st_size / 1e6:.1f}MB), "
+          f"최대 logit 차이 {max_logit_diff(model, 'onnx', onnx_path):.2e}")
+
+    if args.quantize:
+        int8_path = out_dir / f"{stem}.int8.onnx"
+        quantize_onnx(onnx_path, int8_path)
+        print(f"✅ ONNX int8: {int8_path} ({int8_path.stat().st_size / 1e6:.1f}MB), "
+              f"최대 logit 차이 {max_logit_diff(model, 'onnx', int8_path):.2e}")
+
+    if not args.no_torchscript:
+        script_path = out_dir / f"{stem}.torchscript.pt"
+        with torch.no_grad():
+            traced = torch.jit.trace(model, torch.zeros(1, 3, 224, 224))
+        traced = torch.jit.freeze(traced)
+        traced.save(str(script_path))
+        print(f"✅ TorchScript: {script_path}, "
+              f"최대 logit 차이 {max_logit_diff(model, 'torchscript', script_path):.2e}")
+
+
+if __name__ == "__main__":
+    main()
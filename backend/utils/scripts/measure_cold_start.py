@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+위조분석 모델 콜드 스타트 측정
+- 기존 방식: api.forgeries 임포트 시 torch 임포트 + 가중치 로드까지 끝나야 앱이 요청을 받기 시작
+- 지연 로드: api.forgeries 임포트만 하고, 모델은 시작 태스크(백그라운드 스레드)나 첫 요청에서 로드
+각 방식을 새 프로세스에서 여러 번 실행해 중앙값을 출력합니다.
+--server 를 주면 uvicorn 으로 main:app 을 띄워 /health, /ready 가 200 이 될 때까지의 시간도 측정합니다. (DB/환경변수 필요)
+
+사용법: python utils/scripts/measure_cold_start.py [--repeat 3] [--weights resnet18_ela.pth] [--server]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+SCENARIOS = {
+    "기존 방식 (임포트 시 모델 로드)": """
+import api.forgeries
+from services import forgery_detector
+forgery_detector.load_model()
+""",
+    "지연 로드 (api.forgeries 임포트)": """
+import api.forgeries
+""",
+    "지연 로드 후 첫 위조분석 (모델 로드 포함)": """
+import api.forgeries
+from PIL import Image
+from services.forgery_service import analyze_forgery_from_bytes
+from io import BytesIO
+buffer = BytesIO()
+Image.new("RGB", (800, 600), "white").save(buffer, "JPEG")
+analyze_forgery_from_bytes(buffer.getvalue())
+""",
+}
+
+
+def timed_run(code: str, env: dict) -> float:
+    wrapper = (
+        "import time\n_start = time.perf_counter()\n" + code +
+        "\nimport json\nprint(json.dumps(time.perf_counter() - _start))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", wrapper], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def server_start(env: dict, port: int) -> dict:
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    times = {}
+    try:
+        while "ready" not in times and time.perf_counter() - start < 120:
+            for name, path in (("health", "/health"), ("ready", "/ready")):
+                if name in times:
+                    continue
+                try:
+                    if httpx.get(f"http://127.0.0.1:{port}{path}", timeout=1).status_code == 200:
+                        times[name] = time.perf_counter() - start
+                except httpx.HTTPError:
+                    pass
+            time.sleep(0.05)
+    finally:
+        process.terminate()
+        process.wait()
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="위조분석 모델 콜드 스타트 측정")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--weights", default=os.getenv("FORGERY_MODEL_PATH", "resnet18_ela.pth"))
+    parser.add_argument("--server", action="store_true", help="uvicorn 으로 /health, /ready 까지 시간 측정")
+    parser.add_argument("--port", type=int, default=8150)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("UPSTAGE_OCR_API_KEY", "cold-start")
+    env.setdefault("JWT_SECRET_KEY", "cold-start")
+    with tempfile.TemporaryDirectory() as tmp:
+        weights = BACKEND_DIR / args.weights
+        if not weights.exists():
+            # 가중치 파일이 없으면 같은 구조의 무작위 가중치로 측정 (로드 시간은 파일 크기가 같아 동일)
+            import torch
+            from torchvision import models
+            model = models.resnet18()
+            model.fc = torch.nn.Linear(model.fc.in_features, 2)
+            weights = Path(tmp) / "resnet18_ela.pth"
+            torch.save(model.state_dict(), weights)
+            print(f"⚠️ 가중치 파일이 없어 무작위 가중치 사용: {weights}")
+        env["FORGERY_MODEL_PATH"] = str(weights)
+
+        for name, code in SCENARIOS.items():
+            try:
+                times = [timed_run(code, env) for _ in range(args.repeat)]
+            except RuntimeError as e:
+                print(f"❌ {name}: {e}")
+                continue
+            print(f"{name:<36}: {statistics.median(times):.2f}s (최소 {min(times):.2f}s)")
+
+        if args.server:
+            for preload in ("true", "false"):
+                times = server_start({**env, "FORGERY_MODEL_PRELOAD": preload}, args.port)
+                print(f"uvicorn 시작 (FORGERY_MODEL_PRELOAD={preload}): "
+                      f"/health {times.get('health', float('nan')):.2f}s, /ready {times.get('ready', float('nan')):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Upstage Information Extraction 로컬 대역 서버 (부하 테스트용)
+- OpenAI chat-completions 형식의 information-extract 요청을 받아 스키마에 맞는 고정 응답(fixture)을 돌려줍니다.
+- 응답 지연(평균/편차)과 오류 비율을 설정할 수 있어 유료 API 없이 OCR 처리량 한계를 측정할 수 있습니다.
+- 스키마 이름과 같은 ocr_fixtures/<schema_name>.json 이 있으면 그 값을, 없으면 스키마 타입으로 만든 값을 사용합니다.
+
+사용법: python utils/scripts/ocr_stub_server.py [--port 8900] [--latency-ms 1500] [--jitter-ms 300] [--error-rate 0.01]
+백엔드 연결: UPSTAGE_OCR_API_URL=http://127.0.0.1:8900/v1/information-extraction
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+FIXTURE_DIR = Path(__file__).resolve().parent / "ocr_fixtures"
+DEFAULT_VALUES = {"string": "", "integer": 0, "number": 0, "boolean": False, "array": [], "object": {}}
+
+
+def load_fixtures(fixture_dir: Path) -> Dict[str, Dict]:
+    fixtures = {}
+    for path in sorted(fixture_dir.glob("*.json")):
+        with open(path, encoding="utf-8") as f:
+            fixtures[path.stem] = json.load(f)
+    return fixtures
+
+
+def conform(schema: Dict, fixture: Optional[Dict]) -> Dict:
+    """fixture 에서 스키마에 있는 필드만 골라 응답 생성 (없는 필드는 타입 기본값)"""
+    fixture = fixture or {}
+    return {
+        field: fixture.get(field, DEFAULT_VALUES.get(spec.get("type"), None))
+        for field, spec in schema.get("properties", {}).items()
+    }
+
+
+def create_app(latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0,
+               error_status: int = 503, fixture_dir: Path = FIXTURE_DIR, seed: Optional[int] = None) -> FastAPI:
+    app = FastAPI(title="Upstage OCR stub")
+    fixtures = load_fixtures(fixture_dir)
+    rng = random.Random(seed)
+    stats = {"requests": 0, "errors": 0}
+
+    def error(status: int, message: str) -> JSONResponse:
+        return JSONResponse(status_code=status, content={"error": {"message": message, "type": "stub_error"}})
+
+    @app.post("/chat/completions")
+    @app.post("/{prefix:path}/chat/completions")
+    async def chat_completions(request: Request, prefix: str = ""):
+        stats["requests"] += 1
+        body = await request.json()
+
+        # 요청 형식 확인 (실제 API 가 거부하는 요청은 여기서도 거부)
+        try:
+            content = body["messages"][0]["content"][0]
+            image_url = content["image_url"]["url"]
+            json_schema = body["response_format"]["json_schema"]
+        except (KeyError, IndexError, TypeError):
+            return error(400, "invalid information-extract request")
+        if not image_url.startswith("data:") or ";base64," not in image_url:
+            return error(400, "image_url must be a base64 data URL")
+
+        delay = max(0.0, rng.gauss(latency_ms, jitter_ms)) / 1000 if jitter_ms else latency_ms / 1000
+        await asyncio.sleep(delay)
+
+        if error_rate and rng.random() < error_rate:
+            stats["errors"] += 1
+            return error(error_status, "stub injected error")
+
+        parsed = conform(json_schema.get("schema", {}), fixtures.get(json_schema.get("name")))
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "information-extract"),
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": json.dumps(parsed, ensure_ascii=False)},
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Upstage OCR 로컬 대역 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=float(os.getenv("OCR_STUB_LATENCY_MS", "1500")))
+    parser.add_argument("--jitter-ms", type=float, default=float(os.getenv("OCR_STUB_JITTER_MS", "300")))
+    parser.add_argument("--error-rate", type=float, default=float(os.getenv("OCR_STUB_ERROR_RATE", "0")))
+    parser.add_argument("--error-status", type=int, default=503, help="오류 응답 상태 코드 (429/500/503 등)")
+    parser.add_argument("--fixtures", type=Path, default=FIXTURE_DIR)
+    args = parser.parse_args()
+
+    print(f"🧪 OCR 대역 서버: http://{args.host}:{args.port} "
+          f"(지연 {args.latency_ms:.0f}±{args.jitter_ms:.0f}ms, 오류율 {args.error_rate:.1%})")
+    app = create_app(args.latency_ms, args.jitter_ms, args.error_rate, args.error_status, args.fixtures)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
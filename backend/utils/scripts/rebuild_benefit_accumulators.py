@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+누적 지급액(benefit_accumulators) 재구성 작업
+- claim_calculations 를 환자 × 특약 × 기간별로 합산해서 누적액 테이블을 다시 만듭니다.
+- 마이그레이션 직후, 또는 계산 결과를 직접 수정해서 누적액이 어긋났을 때 실행하세요.
+- 실행 중에는 청구 계산과 동시에 돌지 않도록 점검 시간에 실행하는 것을 권장합니다.
+
+사용법: python utils/scripts/rebuild_benefit_accumulators.py
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+
+from models.database import SessionLocal
+from services.benefit_ledger import BenefitLedger
+
+
+def main():
+    db = SessionLocal()
+    try:
+        count = BenefitLedger(db).rebuild()
+    except Exception as e:
+        db.rollback()
+        print(f"❌ 누적액 재구성 실패: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    print(f"✅ 누적액 재구성 완료: {count}개 (환자 × 특약 × 기간)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+변경된 청구 일괄 재계산 작업
+- 특약/규칙 파일/진단서/영수증 수정 후 계산 입력값 fingerprint 가 바뀐 청구만 재계산합니다.
+- cron 등에서 주기적으로 실행하거나 특약 수정 직후 수동으로 실행하세요.
+
+- 대상이 많으면 규칙 평가를 프로세스 풀로 나눠서 실행합니다. (CLAIM_RECALC_WORKERS, CLAIM_RECALC_PARALLEL_MIN)
+
+사용법: python utils/scripts/recalculate_stale_claims.py [--force] [--workers 4]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+
+from models.database import SessionLocal
+from services.claim_calculator import ClaimCalculator
+
+
+def main():
+    parser = argparse.ArgumentParser(description="fingerprint 가 바뀐 청구만 재계산")
+    parser.add_argument("--force", action="store_true", help="fingerprint 와 관계없이 전체 재계산")
+    parser.add_argument("--workers", type=int, default=None, help="규칙 평가 프로세스 수 (기본: CLAIM_RECALC_WORKERS 또는 CPU 수)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        stats = ClaimCalculator(db).recalculate_stale_claims(force=args.force, workers=args.workers)
+    finally:
+        db.close()
+
+    print(f"🔍 검사한 청구: {stats['checked']}개")
+    print(f"✅ 최신 상태: {stats['up_to_date']}개")
+    print(f"🔄 재계산: {stats['recalculated']}개 (프로세스 {stats['workers']}개)")
+    print(f"⏭️  건너뜀(가입 보험 없음): {stats['skipped']}개")
+    if stats["failed"]:
+        print(f"❌ 실패: {stats['failed']}개 {stats['failed_ids']}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
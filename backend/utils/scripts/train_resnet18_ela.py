@@ -1,43 +1,67 @@
+import argparse
+import os
+import time
 import torch
 from torch import nn
 from torch.utils.data import DataLoader
 from torchvision import models
-from ela_dataset import ELAImageDataset
+from ela_dataset import ELAImageDataset, ELATensorDataset
 
 # 하이퍼파라미터
 BATCH_SIZE = 32
 EPOCHS = 5
 LR = 1e-4
 
-# 데이터셋 및 DataLoader
-dataset = ELAImageDataset("normal_ela")
-dataloader = DataLoader(dataset, batch_size=BATCH_SIZE, shuffle=True)
-
-# 모델 준비
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-model = models.resnet18(pretrained=True)
-model.fc = nn.Linear(model.fc.in_features, 2)
-model = model.to(device)
-
-# 손실함수/옵티마이저
-criterion = nn.CrossEntropyLoss()
-optimizer = torch.optim.Adam(model.parameters(), lr=LR)
-
-# 학습 루프
-for epoch in range(EPOCHS):
-    model.train()
-    running_loss = 0.0
-    for imgs, labels in dataloader:
-        imgs, labels = imgs.to(device), labels.to(device)
-        optimizer.zero_grad()
-        outputs = model(imgs)
-        loss = criterion(outputs, labels)
-        loss.backward()
-        optimizer.step()
-        running_loss += loss.item() * imgs.size(0)
-    avg_loss = running_loss / len(dataset)
-    print(f"Epoch {epoch+1}/{EPOCHS} - Loss: {avg_loss:.4f}")
-
-# 모델 저장
-torch.save(model.state_dict(), "resnet18_ela.pth")
-print("모델 저장 완료: resnet18_ela.pth")
\ No newline at end of file
+
+def main():
+    parser = argparse.ArgumentParser(description="ELA + ResNet18 위조 판별 모델 학습")
+    parser.add_argument("--data", default="normal_ela", help="ELA 이미지 폴더 (make_ela_dataset.py 출력)")
+    parser.add_argument("--cache", default="normal_ela_cache",
+                        help="ELA 텐서 캐시 폴더 (build_ela_cache.py 출력, 있으면 --data 대신 사용)")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="DataLoader 워커 수")
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    args = parser.parse_args()
+
+    # 데이터셋 및 DataLoader
+    if os.path.exists(os.path.join(args.cache, "index.json")):
+        dataset = ELATensorDataset(args.cache)
+        print(f"ELA 텐서 캐시 사용: {args.cache} ({len(dataset)}개)")
+    else:
+        dataset = ELAImageDataset(args.data)
+        print(f"ELA 이미지 폴더 사용: {args.data} ({len(dataset)}개)")
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    dataloader = DataLoader(dataset, batch_size=BATCH_SIZE, shuffle=True, num_workers=args.workers,
+                            pin_memory=device.type == "cuda", persistent_workers=args.workers > 0)
+
+    # 모델 준비
+    model = models.resnet18(pretrained=True)
+    model.fc = nn.Linear(model.fc.in_features, 2)
+    model = model.to(device)
+
+    # 손실함수/옵티마이저
+    criterion = nn.CrossEntropyLoss()
+    optimizer = torch.optim.Adam(model.parameters(), lr=LR)
+
+    # 학습 루프
+    for epoch in range(args.epochs):
+        model.train()
+        running_loss = 0.0
+        start = time.perf_counter()
+        for imgs, labels in dataloader:
+            imgs, labels = imgs.to(device, non_blocking=True), labels.to(device, non_blocking=True)
+            optimizer.zero_grad()
+            outputs = model(imgs)
+            loss = criterion(outputs, labels)
+            loss.backward()
+            optimizer.step()
+            running_loss += loss.item() * imgs.size(0)
+        avg_loss = running_loss / len(dataset)
+        print(f"Epoch {epoch+1}/{args.epochs} - Loss: {avg_loss:.4f} ({time.perf_counter() - start:.1f}s)")
+
+    # 모델 저장
+    torch.save(model.state_dict(), "resnet18_ela.pth")
+    print("모델 저장 완료: resnet18_ela.pth")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,15 @@
 -- 데이터베이스 초기화 스크립트 (Patient 테이블 없이 주민번호 기반)
 -- 기존 테이블 삭제 (순서 주의)
+DROP TABLE IF EXISTS document_jobs CASCADE;
+DROP TABLE IF EXISTS forgery_result_cache CASCADE;
+DROP TABLE IF EXISTS ocr_result_cache CASCADE;
 DROP TABLE IF EXISTS forgery_analysis CASCADE;
+DROP TABLE IF EXISTS benefit_accumulators CASCADE;
 DROP TABLE IF EXISTS claim_calculations CASCADE;
 DROP TABLE IF EXISTS claims CASCADE;
 DROP TABLE IF EXISTS medical_receipts CASCADE;
 DROP TABLE IF EXISTS medical_diagnoses CASCADE;
+DROP TABLE IF EXISTS documents CASCADE;
 DROP TABLE IF EXISTS user_subscriptions CASCADE;
 DROP TABLE IF EXISTS user_contracts CASCADE;
 DROP TABLE IF EXISTS insurance_clauses CASCADE;
@@ -96,6 +101,17 @@ CREATE TABLE user_subscriptions (
     is_deleted BOOLEAN DEFAULT FALSE
 );
 
+-- 업로드 문서 원본 (내용 해시 기준 중복 제거, 참조 수)
+CREATE TABLE documents (
+    id SERIAL PRIMARY KEY,
+    sha256 VARCHAR(64) NOT NULL UNIQUE,  -- 파일 바이트 SHA-256
+    storage_url VARCHAR(500) NOT NULL,  -- uploads/documents/{sha256}.{ext} 또는 GCS URL
+    size INTEGER NOT NULL,
+    content_type VARCHAR(100),
+    ref_count INTEGER NOT NULL DEFAULT 0,  -- 참조하는 진단서/영수증 수
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
 -- 의료 진단서 테이블 (환자 정보 직접 저장)
 CREATE TABLE medical_diagnoses (
     id SERIAL PRIMARY KEY,
@@ -110,6 +126,7 @@ CREATE TABLE medical_diagnoses (
     icd_code VARCHAR(50),
     admission_days INTEGER DEFAULT 0,
     image_url VARCHAR(500),
+    document_id INTEGER REFERENCES documents(id),  -- 원본 문서
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     is_deleted BOOLEAN DEFAULT FALSE
@@ -126,6 +143,7 @@ CREATE TABLE medical_receipts (
     hospital_name VARCHAR(255) NOT NULL,
     treatment_details TEXT,
     image_url VARCHAR(500),
+    document_id INTEGER REFERENCES documents(id),  -- 원본 문서
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     is_deleted BOOLEAN DEFAULT FALSE
@@ -142,6 +160,7 @@ CREATE TABLE claims (
     claim_amount FLOAT NOT NULL,
     claim_reason TEXT NOT NULL,
     status VARCHAR(50) DEFAULT 'pending',
+    calc_fingerprint VARCHAR(64),  -- 보험금 계산 입력값 해시 (같으면 재계산 생략)
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     is_deleted BOOLEAN DEFAULT FALSE
@@ -154,11 +173,24 @@ CREATE TABLE claim_calculations (
     clause_id INTEGER NOT NULL REFERENCES insurance_clauses(id),
     calculated_amount FLOAT NOT NULL,
     calculation_logic TEXT,
+    limit_period VARCHAR(20),  -- 누적 한도 기간 키 ("2025", "lifetime")
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     is_deleted BOOLEAN DEFAULT FALSE
 );
 
+-- 누적 지급액 테이블 (환자 × 특약 × 기간별 누적 한도 관리)
+CREATE TABLE benefit_accumulators (
+    id SERIAL PRIMARY KEY,
+    patient_ssn VARCHAR(14) NOT NULL,  -- 피보험자 주민등록번호
+    clause_id INTEGER NOT NULL REFERENCES insurance_clauses(id),
+    period VARCHAR(20) NOT NULL,  -- 연도("2025") 또는 "lifetime"
+    paid_amount FLOAT NOT NULL DEFAULT 0,
+    claim_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_benefit_accumulators_patient_clause_period UNIQUE (patient_ssn, clause_id, period)
+);
+
 -- 위조 분석 테이블
 CREATE TABLE forgery_analysis (
     id SERIAL PRIMARY KEY,
@@ -172,6 +204,53 @@ CREATE TABLE forgery_analysis (
     is_deleted BOOLEAN DEFAULT FALSE
 );
 
+-- OCR 결과 캐시 (이미지 해시 + 스키마)
+CREATE TABLE ocr_result_cache (
+    id SERIAL PRIMARY KEY,
+    image_sha256 VARCHAR(64) NOT NULL,  -- 이미지 바이트 SHA-256
+    schema_name VARCHAR(50) NOT NULL,  -- diagnosis_schema / receipt_schema
+    result TEXT NOT NULL,  -- Upstage 추출 결과 JSON (후처리 전)
+    hit_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_ocr_result_cache_image_schema UNIQUE (image_sha256, schema_name)
+);
+
+-- 위조분석 결과 캐시 (이미지 해시 + 모델 버전)
+CREATE TABLE forgery_result_cache (
+    id SERIAL PRIMARY KEY,
+    image_sha256 VARCHAR(64) NOT NULL,  -- 이미지(PDF) 바이트 SHA-256
+    model_version VARCHAR(100) NOT NULL,  -- 백엔드 + 모델 파일 해시
+    predicted_class VARCHAR(20) NOT NULL,  -- forged / authentic
+    confidence FLOAT NOT NULL,
+    pages TEXT,  -- PDF 페이지별 결과 JSON
+    hit_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_forgery_result_cache_image_model UNIQUE (image_sha256, model_version)
+);
+
+-- 업로드 파이프라인 작업 (OCR/위조분석 단계별 상태)
+CREATE TABLE document_jobs (
+    id SERIAL PRIMARY KEY,
+    document_type VARCHAR(20) NOT NULL,  -- diagnosis / receipt
+    document_id INTEGER NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',  -- queued / running / completed / failed
+    ocr_status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    ocr_started_at TIMESTAMP WITH TIME ZONE,
+    ocr_finished_at TIMESTAMP WITH TIME ZONE,
+    ocr_error TEXT,
+    forgery_status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    forgery_started_at TIMESTAMP WITH TIME ZONE,
+    forgery_finished_at TIMESTAMP WITH TIME ZONE,
+    forgery_error TEXT,
+    forgery_analysis_id INTEGER REFERENCES forgery_analysis(id),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP WITH TIME ZONE,
+    owner VARCHAR(100),  -- 작업을 가져간 워커
+    heartbeat_at TIMESTAMP WITH TIME ZONE  -- 실행 중 주기적으로 갱신 (lease 만료 판단)
+);
+
 -- 인덱스 생성
 CREATE INDEX idx_users_email ON users(email);
 CREATE INDEX idx_insurance_companies_code ON insurance_companies(code);
@@ -180,6 +259,8 @@ CREATE INDEX idx_insurance_clauses_product_id ON insurance_clauses(product_id);
 CREATE INDEX idx_medical_diagnoses_user_id ON medical_diagnoses(user_id);
 CREATE INDEX idx_medical_diagnoses_patient_ssn ON medical_diagnoses(patient_ssn);  -- 주민번호 인덱스
 CREATE INDEX idx_medical_receipts_user_id ON medical_receipts(user_id);
+CREATE INDEX idx_medical_diagnoses_document_id ON medical_diagnoses(document_id);
+CREATE INDEX idx_medical_receipts_document_id ON medical_receipts(document_id);
 -- 영수증 테이블에는 주민번호가 없으므로 인덱스 제거
 CREATE INDEX idx_claims_user_id ON claims(user_id);
 CREATE INDEX idx_claims_patient_ssn ON claims(patient_ssn);  -- 주민번호 인덱스
@@ -187,6 +268,10 @@ CREATE INDEX idx_claims_diagnosis_id ON claims(diagnosis_id);
 CREATE INDEX idx_claims_receipt_id ON claims(receipt_id);
 CREATE INDEX idx_user_contracts_patient_ssn ON user_contracts(patient_ssn);  -- 환자 주민번호 인덱스
 CREATE INDEX idx_user_subscriptions_patient_ssn ON user_subscriptions(patient_ssn);  -- 환자 주민번호 인덱스
+CREATE INDEX idx_ocr_result_cache_last_used_at ON ocr_result_cache(last_used_at);  -- 캐시 정리용
+CREATE INDEX idx_forgery_result_cache_last_used_at ON forgery_result_cache(last_used_at);  -- 캐시 정리용
+CREATE INDEX idx_document_jobs_document ON document_jobs(document_type, document_id);
+CREATE INDEX idx_document_jobs_status ON document_jobs(status);  -- 재시작 시 미완료 작업 조회
 
 -- 시스템 사용자 생성
 INSERT INTO users (id, email, name, password) VALUES 
@@ -0,0 +1,3 @@
+-- 기존 DB 업그레이드: 청구 계산 fingerprint 컬럼 추가
+-- (신규 설치는 init_database.sql 에 포함되어 있음)
+ALTER TABLE claims ADD COLUMN IF NOT EXISTS calc_fingerprint VARCHAR(64);
@@ -0,0 +1,14 @@
+-- 기존 DB 업그레이드: 누적 지급 한도 관리
+-- 적용 후 python utils/scripts/rebuild_benefit_accumulators.py 로 기존 청구 기준 누적액을 채우세요.
+ALTER TABLE claim_calculations ADD COLUMN IF NOT EXISTS limit_period VARCHAR(20);
+
+CREATE TABLE IF NOT EXISTS benefit_accumulators (
+    id SERIAL PRIMARY KEY,
+    patient_ssn VARCHAR(14) NOT NULL,
+    clause_id INTEGER NOT NULL REFERENCES insurance_clauses(id),
+    period VARCHAR(20) NOT NULL,
+    paid_amount FLOAT NOT NULL DEFAULT 0,
+    claim_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_benefit_accumulators_patient_clause_period UNIQUE (patient_ssn, clause_id, period)
+);
@@ -0,0 +1,13 @@
+-- 기존 DB 업그레이드: OCR 결과 캐시 (이미지 SHA-256 + 스키마 이름)
+CREATE TABLE IF NOT EXISTS ocr_result_cache (
+    id SERIAL PRIMARY KEY,
+    image_sha256 VARCHAR(64) NOT NULL,
+    schema_name VARCHAR(50) NOT NULL,
+    result TEXT NOT NULL,
+    hit_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_ocr_result_cache_image_schema UNIQUE (image_sha256, schema_name)
+);
+
+CREATE INDEX IF NOT EXISTS idx_ocr_result_cache_last_used_at ON ocr_result_cache(last_used_at);
@@ -0,0 +1,21 @@
+-- 기존 DB 업그레이드: 업로드 파이프라인 작업 (OCR/위조분석 단계별 상태와 소요 시간)
+CREATE TABLE IF NOT EXISTS document_jobs (
+    id SERIAL PRIMARY KEY,
+    document_type VARCHAR(20) NOT NULL,
+    document_id INTEGER NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    ocr_status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    ocr_started_at TIMESTAMP WITH TIME ZONE,
+    ocr_finished_at TIMESTAMP WITH TIME ZONE,
+    ocr_error TEXT,
+    forgery_status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    forgery_started_at TIMESTAMP WITH TIME ZONE,
+    forgery_finished_at TIMESTAMP WITH TIME ZONE,
+    forgery_error TEXT,
+    forgery_analysis_id INTEGER REFERENCES forgery_analysis(id),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX IF NOT EXISTS idx_document_jobs_document ON document_jobs(document_type, document_id);
+CREATE INDEX IF NOT EXISTS idx_document_jobs_status ON document_jobs(status);
@@ -0,0 +1,15 @@
+-- 기존 DB 업그레이드: 위조분석 결과 캐시 (이미지 SHA-256 + 모델 버전)
+CREATE TABLE IF NOT EXISTS forgery_result_cache (
+    id SERIAL PRIMARY KEY,
+    image_sha256 VARCHAR(64) NOT NULL,
+    model_version VARCHAR(100) NOT NULL,
+    predicted_class VARCHAR(20) NOT NULL,
+    confidence FLOAT NOT NULL,
+    pages TEXT,
+    hit_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_forgery_result_cache_image_model UNIQUE (image_sha256, model_version)
+);
+
+CREATE INDEX IF NOT EXISTS idx_forgery_result_cache_last_used_at ON forgery_result_cache(last_used_at);
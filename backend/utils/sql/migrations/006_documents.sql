@@ -0,0 +1,16 @@
+-- 기존 DB 업그레이드: 내용 해시 기준 중복 제거 문서 저장 (documents + 진단서/영수증 참조)
+CREATE TABLE IF NOT EXISTS documents (
+    id SERIAL PRIMARY KEY,
+    sha256 VARCHAR(64) NOT NULL UNIQUE,
+    storage_url VARCHAR(500) NOT NULL,
+    size INTEGER NOT NULL,
+    content_type VARCHAR(100),
+    ref_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE medical_diagnoses ADD COLUMN IF NOT EXISTS document_id INTEGER REFERENCES documents(id);
+ALTER TABLE medical_receipts ADD COLUMN IF NOT EXISTS document_id INTEGER REFERENCES documents(id);
+
+CREATE INDEX IF NOT EXISTS idx_medical_diagnoses_document_id ON medical_diagnoses(document_id);
+CREATE INDEX IF NOT EXISTS idx_medical_receipts_document_id ON medical_receipts(document_id);
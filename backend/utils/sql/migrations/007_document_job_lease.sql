@@ -0,0 +1,4 @@
+-- 기존 DB 업그레이드: 문서 처리 작업 소유 워커/heartbeat (여러 워커 프로세스에서 중복 실행 방지)
+-- (신규 설치는 init_database.sql 에 포함되어 있음)
+ALTER TABLE document_jobs ADD COLUMN IF NOT EXISTS owner VARCHAR(100);
+ALTER TABLE document_jobs ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP WITH TIME ZONE;